@@ -1,41 +1,229 @@
-from collections import Counter
 from functools import partial
-from typing import Text, Optional, Dict, Tuple
+from typing import Text, Optional, Tuple, List, Callable, Any
 import os
+import time
 from flask import Flask, Blueprint, send_from_directory, \
-    make_response, request, send_file
+    make_response, request, Response, g, has_app_context
 from flask.cli import ScriptInfo
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
-import cv2
+from pydantic import ValidationError
+import base64
+import hashlib
 import io
-import PIL.Image
 import numpy as np
-import requests
 
-import table_annotator.img
+import table_annotator.dir_listing
+import table_annotator.image_cache
+import table_annotator.image_metadata
 import table_annotator.io
+import table_annotator.metrics
 import table_annotator.ocr
 import table_annotator.cellgrid
+import table_annotator.edits
 import table_annotator.column_types
 import table_annotator.pre_annotated
-from table_annotator import matching
-from table_annotator.types import CellGrid, Table, DOCUMENT_STATE_TODO
+import table_annotator.profiling
+import table_annotator.pyramid
+import table_annotator.segmentation
+import table_annotator.serialization
+import table_annotator.services
+import table_annotator.state_index
+from table_annotator.cache import LRUCache
+from table_annotator.jobs import JobManager, JobProgress
+from table_annotator.types import CellGrid, Table, TablesPatch, JOB_STATUS_DONE, \
+    JOB_STATUS_FAILED
 
 DATA_PATH = "data_path"
+CELL_IMAGE_CACHE_MAX_BYTES = "cell_image_cache_max_bytes"
+CELL_IMAGE_CACHE_TTL = "cell_image_cache_ttl"
+OCR_JOB_WORKERS = "ocr_job_workers"
+IMAGE_CACHE_MAX_BYTES = "image_cache_max_bytes"
+PROFILE_DIR = "profile_dir"
+PROFILE_SAMPLE_RATE = "profile_sample_rate"
+
+
+def encode_jpeg(rgb_image: np.ndarray) -> bytes:
+    import PIL.Image
+    file_object = io.BytesIO()
+    PIL.Image.fromarray(rgb_image.astype('uint8')).save(file_object, 'JPEG')
+    return file_object.getvalue()
+
+
+def encoded_cell_grid_size(cell_image_grid: CellGrid[bytes]) -> int:
+    return sum(len(img) for row in cell_image_grid for img in row)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Encodes and decodes request and response bodies with the configured library."""
+
+    def dumps(self, obj, **kwargs) -> str:
+        return table_annotator.serialization.dumps(
+            obj, sort_keys=self.sort_keys, default=self.default).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        return table_annotator.serialization.loads(s)
+
+
+class TableChanged(Exception):
+    """The table was written while its cell images were being created."""
 
 
 def create_app(script_info: Optional[ScriptInfo] = None, data_path: Text = "data"):
     app = Flask(__name__)
+    app.json = FastJSONProvider(app)
     api = Blueprint("api", __name__, url_prefix="/api")
     CORS(app)
     app.config[DATA_PATH] = data_path
+    app.config[CELL_IMAGE_CACHE_MAX_BYTES] = \
+        int(os.environ.get("CELL_IMAGE_CACHE_MAX_BYTES", 256 * 1024 ** 2))
+    app.config[CELL_IMAGE_CACHE_TTL] = \
+        float(os.environ.get("CELL_IMAGE_CACHE_TTL", 4 * 60 * 60))
+    app.config[OCR_JOB_WORKERS] = int(os.environ.get("OCR_JOB_WORKERS", 2))
+    app.config[IMAGE_CACHE_MAX_BYTES] = table_annotator.image_cache.IMAGE_CACHE_MAX_BYTES
+    # profiling is disabled unless a directory for the profiles is configured
+    app.config[PROFILE_DIR] = os.environ.get("PROFILE_DIR") or None
+    app.config[PROFILE_SAMPLE_RATE] = float(os.environ.get("PROFILE_SAMPLE_RATE", 0.0))
     app.logger.info(f'Starting server serving documents from directory {data_path}')
-
-    cell_image_cache: Dict[Tuple[Text, int], CellGrid[PIL.Image]] = {}
+    for service in [table_annotator.services.OCR_SERVICE,
+                    table_annotator.services.SEGMENTING_SERVICE]:
+        client = table_annotator.services.configure(service)
+        app.logger.info(f'Using {service} service at {", ".join(client.urls)}')
+
+    table_annotator.image_cache.configure(app.config[IMAGE_CACHE_MAX_BYTES])
+
+    # jpeg encoded cell images keyed by image path, image file version and table
+    # fingerprint
+    cell_image_cache: LRUCache[Tuple[Text, Tuple[int, int], Text], CellGrid[bytes]] = \
+        LRUCache(app.config[CELL_IMAGE_CACHE_MAX_BYTES], encoded_cell_grid_size,
+                 app.config[CELL_IMAGE_CACHE_TTL])
+
+    # json payloads of packed cell images with the same keys as the cell image cache
+    cell_sprite_cache: LRUCache[Tuple[Text, Tuple[int, int], Text], bytes] = \
+        LRUCache(app.config[CELL_IMAGE_CACHE_MAX_BYTES], len,
+                 app.config[CELL_IMAGE_CACHE_TTL])
+
+    def invalidate_cell_images(image_path: Text) -> None:
+        table_annotator.image_cache.invalidate(image_path)
+        cell_image_cache.invalidate(lambda key: key[0] == image_path)
+        cell_sprite_cache.invalidate(lambda key: key[0] == image_path)
+
+    ocr_jobs = JobManager(app.config[OCR_JOB_WORKERS])
+
+    table_annotator.metrics.register_cache("images", table_annotator.image_cache.stats)
+    table_annotator.metrics.register_cache("cell_images", cell_image_cache.stats)
+    table_annotator.metrics.register_cache("cell_sprites", cell_sprite_cache.stats)
+
+    # profiling hooks are registered before the metrics hooks, so they wrap them and
+    # writing a profile is not counted in the request duration
+    @app.before_request
+    def start_profiling():
+        if app.config[PROFILE_DIR] is None:
+            return
+        header = request.headers.get(table_annotator.profiling.PROFILE_HEADER)
+        if table_annotator.profiling.should_profile(header,
+                                                    app.config[PROFILE_SAMPLE_RATE]):
+            g.profiler = table_annotator.profiling.start()
+
+    def stop_profiling() -> Optional[Text]:
+        """Writes the profile of the request if it is profiled, returns its path."""
+        profiler = g.pop("profiler", None)
+        if profiler is None:
+            return None
+        view_args = request.view_args or {}
+        return table_annotator.profiling.stop_and_write(
+            profiler, app.config[PROFILE_DIR], request.endpoint or "unmatched",
+            view_args.get("image_name"))
+
+    @app.after_request
+    def write_profile(response: Response) -> Response:
+        profile_path = stop_profiling()
+        if profile_path is not None:
+            response.headers[table_annotator.profiling.PROFILE_FILE_HEADER] = \
+                os.path.basename(profile_path)
+        return response
+
+    @app.teardown_request
+    def write_profile_of_failed_request(error: Optional[BaseException]) -> None:
+        # after_request hooks are skipped when the view raises an exception that
+        # propagates, the profiler must not keep running in this thread. A test client
+        # that preserves the request context can tear it down after the app context.
+        if has_app_context():
+            stop_profiling()
+
+    @app.before_request
+    def start_request_timer():
+        g.request_start = time.perf_counter()
+
+    @app.after_request
+    def observe_request(response: Response) -> Response:
+        start = g.pop("request_start", None)
+        # requests that matched no route are counted together
+        endpoint = request.endpoint or "unmatched"
+        if start is not None:
+            table_annotator.metrics.REQUEST_DURATION.observe(
+                time.perf_counter() - start, endpoint=endpoint, method=request.method)
+        table_annotator.metrics.REQUESTS.inc(endpoint=endpoint, method=request.method,
+                                             status=response.status_code)
+        return response
+
+    @app.route("/metrics")
+    def get_metrics():
+        """Metrics of this process in the Prometheus text format."""
+        return Response(table_annotator.metrics.render(),
+                        mimetype="text/plain; version=0.0.4")
 
     def get_workdir(bucket: Text, project: Text, subdir: Text) -> Text:
         return os.path.join(app.config[DATA_PATH], bucket, project, subdir)
 
+    def overwrite_requested() -> bool:
+        """Whether the request asks to replace existing ocr predictions."""
+        return request.args.get('overwrite', '0').lower() in {'1', 'true'}
+
+    def read_cell_image_grid(image_path: Text, table_id: int,
+                             fingerprint: Text) -> Optional[CellGrid[np.ndarray]]:
+        """Extracts the cell images of a table as RGB images."""
+        tables = table_annotator.io.read_tables_for_image(image_path)
+
+        if table_id not in set(range(len(tables))):
+            return None
+
+        table = tables[table_id]
+        if table.fingerprint() != fingerprint:
+            # the images would end up in the cache under the wrong fingerprint
+            raise TableChanged()
+        cell_image_grid = table_annotator.image_cache.get_cell_image_grid(image_path,
+                                                                          table)
+        import cv2
+        convert_image = partial(cv2.cvtColor, code=cv2.COLOR_BGR2RGB)
+        return table_annotator.cellgrid.apply_to_cells(convert_image, cell_image_grid)
+
+    def file_etag(file_path: Text) -> Text:
+        """Identifies the current content of a file that might not exist.
+
+        Files are replaced atomically, so every write creates a new inode. It tells
+        writes apart that keep the size and happen within one mtime tick.
+        """
+        try:
+            stat = os.stat(file_path)
+        except FileNotFoundError:
+            return "missing"
+        return f"{stat.st_ino}-{stat.st_mtime_ns}-{stat.st_size}"
+
+    def json_response_with_etag(etag: Text, create: Callable[[], Any]) -> Response:
+        """Answers with 304 if the client has the etag, otherwise with created json.
+
+        Clients have to revalidate on every use, so they never show stale data.
+        """
+        if request.if_none_match.contains(etag):
+            response = make_response(b"", 304)
+        else:
+            response = make_response(create())
+        response.set_etag(etag)
+        response.cache_control.no_cache = True
+        response.cache_control.private = True
+        return response
+
     @api.route("/")
     def get_all_status_folders():
         data_path = app.config[DATA_PATH]
@@ -48,9 +236,21 @@ def create_app(script_info: Optional[ScriptInfo] = None, data_path: Text = "data
         bucket_dir = os.path.join(app.config[DATA_PATH], bucket)
         if not os.path.isdir(bucket_dir):
             return make_response({"msg": "The state dir does not exist."}, 404)
-        project_names = table_annotator.io.get_all_non_hidden_dirs(bucket_dir,
-                                                                   return_base_names=True)
-        return {"projectNames": sorted(project_names)}
+        project_names = sorted(table_annotator.io.get_all_non_hidden_dirs(
+            bucket_dir, return_base_names=True))
+        projects = []
+        for project_name in project_names:
+            work_dirs = table_annotator.io.get_all_non_hidden_dirs(
+                os.path.join(bucket_dir, project_name))
+            summaries = [table_annotator.state_index.get_workdir_summary(work_dir)
+                         for work_dir in work_dirs]
+            projects.append({
+                "name": project_name,
+                "numDocuments": sum(s["numDocuments"] for s in summaries),
+                "numDocumentsDone": sum(s["numDocumentsDone"] for s in summaries),
+                "numDocumentsTodo": sum(s["numDocumentsTodo"] for s in summaries)
+            })
+        return {"projectNames": project_names, "projects": projects}
 
     @api.route('/<bucket>/<project>')
     def get_project(bucket: str, project: str):
@@ -58,31 +258,8 @@ def create_app(script_info: Optional[ScriptInfo] = None, data_path: Text = "data
         if not os.path.isdir(project_path):
             return make_response({"msg": "The project does not exist."}, 404)
         work_dirs = table_annotator.io.get_all_non_hidden_dirs(project_path)
-        work_dir_infos = []
-
-        for work_dir in work_dirs:
-            images = [os.path.join(work_dir, image)
-                      for image in table_annotator.io.list_images(work_dir)]
-            states = [table_annotator.io.read_state_for_image(image).state
-                      for image in images]
-            states_counter = Counter(states)
-            try:
-                first_todo_doc_index = states.index(DOCUMENT_STATE_TODO)
-                first_todo_doc = os.path.splitext(images[first_todo_doc_index])[0]
-                first_todo_doc = os.path.split(first_todo_doc)[-1]
-            except ValueError:
-                first_todo_doc = None
-
-            num_processed_docs = \
-                len(states_counter) - states_counter[DOCUMENT_STATE_TODO]
-
-            work_dir_infos.append({
-                "name": os.path.basename(work_dir),
-                "numDocuments": len(images),
-                "numDocumentsDone": num_processed_docs,
-                "numDocumentsTodo": states_counter[DOCUMENT_STATE_TODO],
-                "firstTodoDoc": first_todo_doc
-            })
+        work_dir_infos = [table_annotator.state_index.get_workdir_summary(work_dir)
+                          for work_dir in work_dirs]
         work_dir_infos = sorted(work_dir_infos, key=lambda wdi: wdi["name"])
         return {"project": {
             "name": project,
@@ -95,26 +272,44 @@ def create_app(script_info: Optional[ScriptInfo] = None, data_path: Text = "data
         if not os.path.isdir(workdir):
             return make_response(
                 {"msg": "The workdir you tried to access does not exist."}, 404)
-        image_names = table_annotator.io.list_images(workdir)
-        images_with_metadata = []
-        for image_name in image_names:
-            image_path = os.path.join(workdir, image_name)
-            image = table_annotator.io.read_image(image_path)
-            width, height = table_annotator.img.get_dimensions(image)
-            has_pre_annotated_data = \
-                table_annotator.pre_annotated.image_has_pre_annotated_data(image_path)
-            has_matching_data = os.path.exists(
-                os.path.join(app.config[DATA_PATH], project, "persdata.csv")
-            )
-            center = {"x": width // 2, "y": height // 2}
-            images_with_metadata.append(
-                {"src": f"{bucket}/{project}/{subdir}/image/{image_name}", "width": width,
-                 "height": height, "center": center,
-                 "name": image_name, "docId": os.path.splitext(image_name)[0],
-                 "hasPreAnnotatedData": has_pre_annotated_data,
-                 "hasMatchingData": has_matching_data
-                 })
-        return {"images": images_with_metadata}
+        has_matching_data = os.path.exists(
+            os.path.join(app.config[DATA_PATH], project, "persdata.csv")
+        )
+        # images, their sizes and pre-annotated files only change with the workdir
+        workdir_mtime = os.stat(workdir).st_mtime_ns
+
+        def create_images_list():
+            image_names = table_annotator.io.list_images(workdir)
+            files_in_workdir = table_annotator.io.list_files(workdir)
+            images_metadata = table_annotator.image_metadata.get_images_metadata(
+                workdir, image_names)
+            images_with_metadata = []
+            for image_name in image_names:
+                metadata = images_metadata[image_name]
+                width, height = metadata.width, metadata.height
+                pre_annotated_data_file = os.path.basename(
+                    table_annotator.pre_annotated.pre_annotated_data_file_for_image(
+                        image_name))
+                has_pre_annotated_data = pre_annotated_data_file in files_in_workdir
+                center = {"x": width // 2, "y": height // 2}
+                images_with_metadata.append(
+                    {"src": f"{bucket}/{project}/{subdir}/image/{image_name}",
+                     "width": width, "height": height, "center": center,
+                     "name": image_name, "docId": os.path.splitext(image_name)[0],
+                     "hasPreAnnotatedData": has_pre_annotated_data,
+                     "hasMatchingData": has_matching_data
+                     })
+            return {"images": images_with_metadata}
+
+        if time.time_ns() - workdir_mtime > table_annotator.dir_listing.RACY_INTERVAL_NS:
+            etag = f"{workdir_mtime}-{int(has_matching_data)}"
+            return json_response_with_etag(etag, create_images_list)
+        # the workdir could still change without changing its mtime, see dir_listing,
+        # so the etag is taken from the list itself, which is sent as encoded here
+        encoded = table_annotator.serialization.dumps(create_images_list())
+        etag = hashlib.blake2b(encoded, digest_size=16).hexdigest()
+        return json_response_with_etag(
+            etag, lambda: Response(encoded, mimetype="application/json"))
 
     @api.route('/<bucket>/<project>/<subdir>/image/invert/<image_name>', methods=["POST"])
     def invert_image(bucket: Text, project: Text, subdir: Text, image_name: Text):
@@ -126,6 +321,7 @@ def create_app(script_info: Optional[ScriptInfo] = None, data_path: Text = "data
         image = table_annotator.io.read_image(image_path)
         image = np.invert(image)
         table_annotator.io.write_image(image_path, image)
+        invalidate_cell_images(image_path)
         return make_response({"msg": "Ok"}, 200)
 
     @api.route('/<bucket>/<project>/<subdir>/image/rotate/<image_name>', methods=["POST"])
@@ -138,6 +334,7 @@ def create_app(script_info: Optional[ScriptInfo] = None, data_path: Text = "data
         image = table_annotator.io.read_image(image_path)
         image = np.rot90(image, 3)
         table_annotator.io.write_image(image_path, image)
+        invalidate_cell_images(image_path)
         return make_response({"msg": "Ok"}, 200)
 
     @api.route('/<bucket>/<project>/<subdir>/image/<image_name>')
@@ -145,6 +342,34 @@ def create_app(script_info: Optional[ScriptInfo] = None, data_path: Text = "data
         workdir = get_workdir(bucket, project, subdir)
         return send_from_directory(workdir, image_name)
 
+    @api.route('/<bucket>/<project>/<subdir>/image/<image_name>/pyramid')
+    def get_image_pyramid(bucket: Text, project: Text, subdir: Text, image_name: Text):
+        """Describes the zoom levels of an image and how they are cut into tiles."""
+        workdir = get_workdir(bucket, project, subdir)
+        image_path = os.path.join(workdir, image_name)
+        if not os.path.isfile(image_path):
+            return make_response({"msg": "The image does not exist."}, 404)
+        _, pyramid = table_annotator.pyramid.get_pyramid(image_path)
+        return {"pyramid": pyramid}
+
+    @api.route('/<bucket>/<project>/<subdir>/image/<image_name>/tiles/<int:level>/'
+               '<int:column>/<int:row>')
+    def get_image_tile(bucket: Text, project: Text, subdir: Text, image_name: Text,
+                       level: int, column: int, row: int):
+        """Returns a tile of a zoom level of an image, level 0 is the full image."""
+        workdir = get_workdir(bucket, project, subdir)
+        image_path = os.path.join(workdir, image_name)
+        if not os.path.isfile(image_path):
+            return make_response({"msg": "The image does not exist."}, 404)
+        tile_path = table_annotator.pyramid.get_tile(image_path, level, column, row)
+        if tile_path is None:
+            return make_response({"msg": "The tile does not exist."}, 404)
+        # tiles change when the image is rotated or inverted, so clients revalidate
+        response = send_from_directory(os.path.dirname(tile_path),
+                                       os.path.basename(tile_path), max_age=0)
+        response.cache_control.no_cache = True
+        return response
+
     @api.route('/<bucket>/<project>/<subdir>/state/<image_name>', methods=["GET"])
     def get_document_state(bucket: Text, project: Text, subdir: Text, image_name: Text):
         workdir = get_workdir(bucket, project, subdir)
@@ -153,8 +378,10 @@ def create_app(script_info: Optional[ScriptInfo] = None, data_path: Text = "data
             return make_response({"msg": "The image for which you tried to retrieve "
                                          "state data does not exist."}, 404)
 
-        state = table_annotator.io.read_state_for_image(image_path)
-        return state.dict()
+        state_file = table_annotator.io.state_file_for_image(image_path)
+        etag = file_etag(state_file)
+        return json_response_with_etag(
+            etag, lambda: table_annotator.io.read_state_for_image(image_path).dict())
 
     @api.route('/<bucket>/<project>/<subdir>/state/<image_name>', methods=["POST"])
     def set_document_state(bucket: Text, project: Text, subdir: Text, image_name: Text):
@@ -178,10 +405,40 @@ def create_app(script_info: Optional[ScriptInfo] = None, data_path: Text = "data
             return make_response({"msg": "The image for which you tried to save "
                                          "table data does not exist."}, 404)
 
-        table_annotator.io.write_tables_for_image(image_path,
-                                                  [Table(**t) for t in request.json])
+        tables = [Table(**t) for t in request.json]
+        tables_file = table_annotator.io.tables_file_for_image(image_path)
+        with table_annotator.io.lock_for_update(tables_file):
+            version = table_annotator.io.write_tables_for_image(image_path, tables)
 
-        return {"msg": "OK"}
+        return {"msg": "OK", "version": version}
+
+    @api.route('/<bucket>/<project>/<subdir>/tables/<image_name>', methods=["PATCH"])
+    def patch_tables(bucket: Text, project: Text, subdir: Text, image_name: Text):
+        """Applies small edits to the tables, e.g. setting the text of one cell.
+
+        The body names the version of the document that the edits are based on. If
+        the document has been written since then, nothing is applied and the
+        response is a 409 with the current version.
+        """
+        workdir = get_workdir(bucket, project, subdir)
+        image_path = os.path.join(workdir, image_name)
+        if not os.path.isfile(image_path):
+            return make_response({"msg": "The image for which you tried to edit "
+                                         "table data does not exist."}, 404)
+        try:
+            patch = TablesPatch.parse_obj(request.json)
+        except ValidationError as e:
+            return make_response({"msg": str(e)}, 400)
+
+        try:
+            version = table_annotator.edits.patch_tables_for_image(
+                image_path, patch.version, patch.edits)
+        except table_annotator.edits.VersionConflict as e:
+            return make_response({"msg": str(e), "version": e.current_version}, 409)
+        except ValueError as e:
+            return make_response({"msg": str(e)}, 400)
+
+        return {"msg": "OK", "version": version}
 
     @api.route('/<bucket>/<project>/<subdir>/tables/<image_name>', methods=["GET"])
     def get_tables(bucket, project: Text, subdir: Text, image_name: Text):
@@ -191,12 +448,20 @@ def create_app(script_info: Optional[ScriptInfo] = None, data_path: Text = "data
             return make_response({"msg": "The image for which you tried to retrieve "
                                          "table data does not exist."}, 404)
 
-        tables = table_annotator.io.read_tables_for_image(image_path)
-        tables_json = {
-            "tables": [table_annotator.io.table_as_json(t) for t in tables]
-        }
+        # the version is read first, so that it is never newer than the tables
+        version = table_annotator.io.read_tables_version(image_path)
+        tables_file = table_annotator.io.tables_file_for_image(image_path)
+        etag = f"{version}-{file_etag(tables_file)}"
+
+        def create_tables_json():
+            tables = table_annotator.io.read_tables_for_image(image_path)
+            return {
+                "tables": [table_annotator.io.table_as_json(t) for t in tables],
+                "fingerprints": [t.fingerprint() for t in tables],
+                "version": version
+            }
 
-        return tables_json
+        return json_response_with_etag(etag, create_tables_json)
 
     @api.route(
         '/<bucket>/<project>/<subdir>/<image_name>/predict_table_structure/<int:table_id>',
@@ -214,13 +479,15 @@ def create_app(script_info: Optional[ScriptInfo] = None, data_path: Text = "data
             return make_response({"msg": "The table does not exist."}, 404)
 
         table = tables[table_id]
-        image = table_annotator.io.read_image(image_path)
-        table_image = table_annotator.img.extract_table_image(image, table)
+        table_image = table_annotator.image_cache.extract_table_image(image_path, table)
+        import cv2
         table_image_bw = cv2.cvtColor(table_image, cv2.COLOR_BGR2GRAY)
-        r = requests.post('http://localhost:5002/segment',
-                          json={"table_image": table_image_bw.tolist()})
-
-        rows = r.json()["rows"]
+        scale = request.args.get(
+            'scale', default=table_annotator.segmentation.SEGMENTATION_IMAGE_SCALE,
+            type=float)
+        if not 0 < scale <= 1:
+            return make_response({"msg": "The scale needs to be in (0, 1]."}, 400)
+        rows = table_annotator.segmentation.predict_rows(table_image_bw, scale)
 
         return {"rows": rows}
 
@@ -230,7 +497,7 @@ def create_app(script_info: Optional[ScriptInfo] = None, data_path: Text = "data
                                image_name: Text, table_id: int):
         workdir = get_workdir(bucket, project, subdir)
         image_path = os.path.join(workdir, image_name)
-        overwrite = bool(request.args.get('overwrite', 0))
+        overwrite = overwrite_requested()
 
         if not os.path.isfile(image_path):
             return make_response({"msg": "The image does not exist."}, 404)
@@ -240,7 +507,6 @@ def create_app(script_info: Optional[ScriptInfo] = None, data_path: Text = "data
         if table_id not in set(range(len(tables))):
             return make_response({"msg": "The table does not exist."}, 404)
 
-        image = table_annotator.io.read_image(image_path)
         table = tables[table_id]
 
         # Try to guess column types if tabel has not been OCR-ed before
@@ -252,7 +518,7 @@ def create_app(script_info: Optional[ScriptInfo] = None, data_path: Text = "data
                 table_annotator.column_types.guess_column_types(image_path,
                                                                 tables, table_id)
 
-        updated_cells = table_annotator.ocr.table_ocr(image, table, overwrite)
+        updated_cells = table_annotator.ocr.table_ocr(image_path, table, overwrite)
 
         return {"cells": table_annotator.cellgrid.apply_to_cells(
             lambda c: {k: v for k, v in c.dict().items() if v is not None},
@@ -279,6 +545,8 @@ def create_app(script_info: Optional[ScriptInfo] = None, data_path: Text = "data
         if not os.path.isfile(pers_data_path):
             return make_response({"msg": "No persdata for project."}, 404)
 
+        # pandas and the normalization rules are only loaded for matching
+        from table_annotator import matching
         pers_data_index = matching.read_persdata_index(pers_data_path)
         table = tables[table_id]
         matches = matching.match_table(table, pers_data_index)
@@ -322,40 +590,215 @@ def create_app(script_info: Optional[ScriptInfo] = None, data_path: Text = "data
                methods=["GET"])
     def get_cell_image(bucket: Text, project: Text, subdir: Text, image_name: Text,
                        table_id: int, row: int, col: int, table_hash: int):
+        """Returns the image of a single cell.
+
+        table_hash only changes the url with the table, on the server tables are
+        identified by their fingerprint. Browsers revalidate every cell image, which
+        is answered with a 304 as long as neither image nor table changed.
+        """
         workdir = get_workdir(bucket, project, subdir)
         image_path = os.path.join(workdir, image_name)
-        if (image_path, table_hash) not in cell_image_cache:
-            if not os.path.isfile(image_path):
-                return make_response({"msg": "The image does not exist."}, 404)
+        if not os.path.isfile(image_path):
+            return make_response({"msg": "The image does not exist."}, 404)
 
-            tables = table_annotator.io.read_tables_for_image(image_path)
+        image_version = table_annotator.io.file_version(image_path)
+        fingerprints = table_annotator.io.read_table_fingerprints(image_path)
+        if table_id >= len(fingerprints):
+            return make_response({"msg": "The table does not exist."}, 404)
+        fingerprint = fingerprints[table_id]
+        etag = f"{image_version[0]}-{image_version[1]}-{fingerprint}-{row}-{col}"
+
+        def cell_image_response(data: Optional[bytes]) -> Response:
+            response = make_response(data if data is not None else b"")
+            response.mimetype = "image/jpeg"
+            response.set_etag(etag)
+            response.cache_control.private = True
+            # the url stays the same when the image is inverted or rotated, so
+            # browsers revalidate against the etag, which covers the image version
+            response.cache_control.no_cache = True
+            if data is None:
+                response.status_code = 304
+            return response
+
+        if request.if_none_match.contains(etag):
+            return cell_image_response(None)
+
+        def create_cell_image_grid() -> Optional[CellGrid[bytes]]:
+            cell_image_grid = read_cell_image_grid(image_path, table_id, fingerprint)
+            if cell_image_grid is None:
+                return None
+            return table_annotator.cellgrid.apply_to_cells(encode_jpeg, cell_image_grid)
+
+        # concurrent requests for cells of the same table share a single creation
+        cache_key = (image_path, image_version, fingerprint)
+        try:
+            cell_image_grid = cell_image_cache.get_or_create(cache_key,
+                                                             create_cell_image_grid)
+        except TableChanged:
+            return make_response({"msg": "The table changed, please retry."}, 409)
+        if cell_image_grid is None:
+            return make_response({"msg": "The table does not exist."}, 404)
+        if row >= len(cell_image_grid) or col >= len(cell_image_grid[row]):
+            return make_response({"msg": "The cell does not exist."}, 404)
 
-            if table_id not in set(range(len(tables))):
-                return make_response({"msg": "The table does not exist."}, 404)
+        return cell_image_response(cell_image_grid[row][col])
 
-            table = tables[table_id]
-            app.logger.info("creating cache")
-            image = table_annotator.io.read_image(image_path)
-            cell_image_grid = table_annotator.cellgrid.get_cell_image_grid(image, table)
-            convert_image = partial(cv2.cvtColor, code=cv2.COLOR_BGR2RGB)
-            cell_image_grid = table_annotator.cellgrid.apply_to_cells(convert_image,
-                                                                      cell_image_grid)
+    @api.route('/<bucket>/<project>/<subdir>/<image_name>/cell_images/<int:table_id>/'
+               '<int:table_hash>',
+               methods=["GET"])
+    def get_cell_images(bucket: Text, project: Text, subdir: Text, image_name: Text,
+                        table_id: int, table_hash: int):
+        """Returns all cell images of a table packed into one image.
+
+        The packed image is embedded as a jpeg data url, cells lists the rectangle of
+        every cell inside of it.
+        """
+        workdir = get_workdir(bucket, project, subdir)
+        image_path = os.path.join(workdir, image_name)
+        if not os.path.isfile(image_path):
+            return make_response({"msg": "The image does not exist."}, 404)
 
-            def to_pil_img(cell_img: np.ndarray):
-                return PIL.Image.fromarray(cell_img.astype('uint8'))
+        image_version = table_annotator.io.file_version(image_path)
+        fingerprints = table_annotator.io.read_table_fingerprints(image_path)
+        if table_id >= len(fingerprints):
+            return make_response({"msg": "The table does not exist."}, 404)
+        fingerprint = fingerprints[table_id]
+        etag = f"{image_version[0]}-{image_version[1]}-{fingerprint}-sprite"
+
+        def cell_images_response(data: Optional[bytes]) -> Response:
+            response = make_response(data if data is not None else b"")
+            response.mimetype = "application/json"
+            response.set_etag(etag)
+            response.cache_control.private = True
+            # revalidated like single cell images, the url misses the image version
+            response.cache_control.no_cache = True
+            if data is None:
+                response.status_code = 304
+            return response
+
+        if request.if_none_match.contains(etag):
+            return cell_images_response(None)
+
+        def create_cell_sprite() -> Optional[bytes]:
+            cell_image_grid = read_cell_image_grid(image_path, table_id, fingerprint)
+            if cell_image_grid is None:
+                return None
+            sprite, cell_rectangles = \
+                table_annotator.cellgrid.pack_grid(cell_image_grid)
+            sprite_base64 = base64.b64encode(encode_jpeg(sprite)).decode("ascii")
+            payload = {
+                "sprite": f"data:image/jpeg;base64,{sprite_base64}",
+                "width": sprite.shape[1],
+                "height": sprite.shape[0],
+                "cells": table_annotator.cellgrid.apply_to_cells(
+                    lambda r: {"x": r.topLeft.x, "y": r.topLeft.y,
+                               "width": r.width(), "height": r.height()},
+                    cell_rectangles)
+            }
+            return table_annotator.serialization.dumps(payload)
+
+        cache_key = (image_path, image_version, fingerprint)
+        try:
+            cell_sprite = cell_sprite_cache.get_or_create(cache_key, create_cell_sprite)
+        except TableChanged:
+            return make_response({"msg": "The table changed, please retry."}, 409)
+        if cell_sprite is None:
+            return make_response({"msg": "The table does not exist."}, 404)
 
-            cell_image_grid = table_annotator.cellgrid.apply_to_cells(to_pil_img,
-                                                                      cell_image_grid)
+        return cell_images_response(cell_sprite)
+
+    @api.route('/cache_stats', methods=["GET"])
+    def get_cache_stats():
+        """Sizes and hit counts of the in-memory caches of this process."""
+        return {"images": table_annotator.image_cache.stats(),
+                "cellImages": cell_image_cache.stats(),
+                "cellSprites": cell_sprite_cache.stats()}
+
+    def submit_ocr_job(description: Text, image_paths: List[Text],
+                       table_ids: Optional[List[int]] = None,
+                       overwrite: bool = False) -> Response:
+        def work(progress: JobProgress) -> None:
+            progress.set_total(len(image_paths))
+            for image_path in image_paths:
+                try:
+                    table_annotator.ocr.ocr_tables_for_image(image_path, table_ids,
+                                                             overwrite)
+                    progress.item_done()
+                except Exception as e:
+                    app.logger.exception(f"OCR of {image_path} failed")
+                    progress.item_failed(f"{os.path.basename(image_path)}: {e}")
+
+        job = ocr_jobs.submit(description, work)
+        return make_response({"job": job.dict()}, 202)
+
+    @api.route('/<bucket>/<project>/<subdir>/<image_name>/ocr_jobs/<int:table_id>',
+               methods=["POST"])
+    def submit_table_ocr_job(bucket: Text, project: Text, subdir: Text,
+                             image_name: Text, table_id: int):
+        """Starts ocr of a table in the background, see get_ocr_job for progress."""
+        workdir = get_workdir(bucket, project, subdir)
+        image_path = os.path.join(workdir, image_name)
+        overwrite = overwrite_requested()
+        if not os.path.isfile(image_path):
+            return make_response({"msg": "The image does not exist."}, 404)
 
-            cell_image_cache[(image_path, table_hash)] = cell_image_grid
+        tables = table_annotator.io.read_tables_for_image(image_path)
+        if table_id not in set(range(len(tables))):
+            return make_response({"msg": "The table does not exist."}, 404)
 
-        img = cell_image_cache[(image_path, table_hash)][row][col]
+        return submit_ocr_job(f"{bucket}/{project}/{subdir}/{image_name}/{table_id}",
+                              [image_path], [table_id], overwrite)
 
-        file_object = io.BytesIO()
-        img.save(file_object, 'JPEG')
-        file_object.seek(0)
+    @api.route('/<bucket>/<project>/<subdir>/ocr_jobs', methods=["POST"])
+    def submit_workdir_ocr_job(bucket: Text, project: Text, subdir: Text):
+        """Starts ocr of all tables of a workdir that are lacking it."""
+        workdir = get_workdir(bucket, project, subdir)
+        if not os.path.isdir(workdir):
+            return make_response(
+                {"msg": "The workdir you tried to access does not exist."}, 404)
+        image_paths = [os.path.join(workdir, image_name)
+                       for image_name in table_annotator.io.list_images(workdir)]
+        return submit_ocr_job(f"{bucket}/{project}/{subdir}", image_paths)
 
-        return send_file(file_object, mimetype='image/JPEG')
+    @api.route('/<bucket>/<project>/ocr_jobs', methods=["POST"])
+    def submit_project_ocr_job(bucket: Text, project: Text):
+        """Starts ocr of all tables of a project that are lacking it."""
+        project_path = os.path.join(app.config[DATA_PATH], bucket, project)
+        if not os.path.isdir(project_path):
+            return make_response({"msg": "The project does not exist."}, 404)
+        image_paths = [os.path.join(workdir, image_name)
+                       for workdir in sorted(
+                           table_annotator.io.get_all_non_hidden_dirs(project_path))
+                       for image_name in table_annotator.io.list_images(workdir)]
+        return submit_ocr_job(f"{bucket}/{project}", image_paths)
+
+    @api.route('/ocr_jobs/<job_id>', methods=["GET"])
+    def get_ocr_job(job_id: Text):
+        job = ocr_jobs.get(job_id)
+        if job is None:
+            return make_response({"msg": "The job does not exist."}, 404)
+        return {"job": job.dict()}
+
+    @api.route('/ocr_jobs/<job_id>/events', methods=["GET"])
+    def stream_ocr_job(job_id: Text):
+        """Streams the progress of a job as server-sent events until it finishes."""
+        if ocr_jobs.get(job_id) is None:
+            return make_response({"msg": "The job does not exist."}, 404)
+
+        def events():
+            last_sent = None
+            while True:
+                job = ocr_jobs.get(job_id)
+                if job is None:
+                    return
+                if job != last_sent:
+                    yield f"data: {job.json()}\n\n"
+                    last_sent = job
+                if job.status in {JOB_STATUS_DONE, JOB_STATUS_FAILED}:
+                    return
+                time.sleep(0.5)
+
+        return Response(events(), mimetype="text/event-stream")
 
     app.register_blueprint(api)
     return app
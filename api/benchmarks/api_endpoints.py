@@ -0,0 +1,276 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+from typing import Text, List, Dict, Any, Callable, Optional
+
+import numpy as np
+from flask import Flask
+from flask.testing import FlaskClient
+
+import table_annotator.io
+from api import create_app
+from benchmarks.fake_services import FakeServices
+from benchmarks.synthetic_corpus import generate_corpus
+from table_annotator.types import EDIT_SET_HUMAN_TEXT, DOCUMENT_STATE_DONE, \
+    JOB_STATUS_DONE, JOB_STATUS_FAILED
+
+# endpoints that are not part of the api
+IGNORED_ENDPOINTS = {"static"}
+
+
+class Document:
+    """An image of the corpus, addressed the way the api addresses it."""
+
+    def __init__(self, data_path: Text, image_path: Text) -> None:
+        self.image_path = image_path
+        self.bucket, self.project, self.subdir, self.image_name = \
+            os.path.relpath(image_path, data_path).split(os.sep)
+
+    def url(self, suffix: Text) -> Text:
+        return f"/api/{self.bucket}/{self.project}/{self.subdir}/{suffix}"
+
+
+class Scenario:
+    """Requests to one endpoint of the api.
+
+    prepare returns the arguments of the i-th request for the test client, finish
+    gets its response. Neither is included in the measured latency.
+    """
+
+    def __init__(self, endpoint: Text,
+                 prepare: Callable[[int], Dict[Text, Any]],
+                 finish: Optional[Callable[[Any], None]] = None) -> None:
+        self.endpoint = endpoint
+        self.prepare = prepare
+        self.finish = finish
+
+
+def wait_for_job(client: FlaskClient, job_id: Text) -> None:
+    while True:
+        job = client.get(f"/api/ocr_jobs/{job_id}").json["job"]
+        if job["status"] in {JOB_STATUS_DONE, JOB_STATUS_FAILED}:
+            return
+        time.sleep(0.01)
+
+
+def create_scenarios(client: FlaskClient, documents: List[Document]) -> List[Scenario]:
+    """One scenario per endpoint, spreading requests over the documents.
+
+    Scenarios that change images come last, so that they do not invalidate the
+    caches of the others while they are measured.
+    """
+    def doc(i: int) -> Document:
+        return documents[i % len(documents)]
+
+    def get(url: Callable[[Document], Text]) -> Callable[[int], Dict[Text, Any]]:
+        return lambda i: {"path": url(doc(i)), "method": "GET"}
+
+    def store_tables(i: int) -> Dict[Text, Any]:
+        tables = client.get(doc(i).url(f"tables/{doc(i).image_name}")).json["tables"]
+        return {"path": doc(i).url(f"tables/{doc(i).image_name}"), "method": "POST",
+                "json": tables}
+
+    def patch_tables(i: int) -> Dict[Text, Any]:
+        version = table_annotator.io.read_tables_version(doc(i).image_path)
+        edit = {"op": EDIT_SET_HUMAN_TEXT, "table": 0, "row": 0, "column": 1,
+                "human_text": f"Edit {i}"}
+        return {"path": doc(i).url(f"tables/{doc(i).image_name}"), "method": "PATCH",
+                "json": {"version": version, "edits": [edit]}}
+
+    def submit_job(response: Any) -> None:
+        wait_for_job(client, response.json["job"]["id"])
+
+    def job_id(i: int) -> Text:
+        response = client.post(doc(i).url(f"{doc(i).image_name}/ocr_jobs/0"))
+        return response.json["job"]["id"]
+
+    def get_job(i: int) -> Dict[Text, Any]:
+        job = job_id(i)
+        wait_for_job(client, job)
+        return {"path": f"/api/ocr_jobs/{job}", "method": "GET"}
+
+    return [
+        Scenario("api.get_all_status_folders", get(lambda d: "/api/")),
+        Scenario("api.get_all_projects", get(lambda d: f"/api/{d.bucket}")),
+        Scenario("api.get_project", get(lambda d: f"/api/{d.bucket}/{d.project}")),
+        Scenario("api.list_images", get(lambda d: d.url("images"))),
+        Scenario("api.get_image", get(lambda d: d.url(f"image/{d.image_name}"))),
+        Scenario("api.get_image_pyramid",
+                 get(lambda d: d.url(f"image/{d.image_name}/pyramid"))),
+        Scenario("api.get_image_tile",
+                 get(lambda d: d.url(f"image/{d.image_name}/tiles/0/0/0"))),
+        Scenario("api.get_document_state", get(lambda d: d.url(f"state/{d.image_name}"))),
+        Scenario("api.set_document_state",
+                 lambda i: {"path": doc(i).url(f"state/{doc(i).image_name}"),
+                            "method": "POST", "json": {"state": DOCUMENT_STATE_DONE}}),
+        Scenario("api.get_tables", get(lambda d: d.url(f"tables/{d.image_name}"))),
+        Scenario("api.store_tables", store_tables),
+        Scenario("api.patch_tables", patch_tables),
+        Scenario("api.predict_table_structure",
+                 get(lambda d: d.url(f"{d.image_name}/predict_table_structure/0"))),
+        Scenario("api.predict_table_contents",
+                 get(lambda d: d.url(f"{d.image_name}/predict_table_contents/0"
+                                     f"?overwrite=1"))),
+        Scenario("api.match_table_contents",
+                 get(lambda d: d.url(f"{d.image_name}/match_table_contents/0"))),
+        Scenario("api.apply_pre_annotated_table_content",
+                 get(lambda d: d.url(f"{d.image_name}/"
+                                     f"apply_pre_annotated_table_content/0"))),
+        Scenario("api.get_cell_image",
+                 get(lambda d: d.url(f"{d.image_name}/cell_image/0/1/1/0"))),
+        Scenario("api.get_cell_images",
+                 get(lambda d: d.url(f"{d.image_name}/cell_images/0/0"))),
+        Scenario("api.get_cache_stats", get(lambda d: "/api/cache_stats")),
+        Scenario("get_metrics", get(lambda d: "/metrics")),
+        Scenario("api.submit_table_ocr_job",
+                 lambda i: {"path": doc(i).url(f"{doc(i).image_name}/ocr_jobs/0"
+                                               f"?overwrite=1"),
+                            "method": "POST"}, submit_job),
+        Scenario("api.submit_workdir_ocr_job",
+                 lambda i: {"path": doc(i).url("ocr_jobs"), "method": "POST"},
+                 submit_job),
+        Scenario("api.submit_project_ocr_job",
+                 lambda i: {"path": f"/api/{doc(i).bucket}/{doc(i).project}/ocr_jobs",
+                            "method": "POST"}, submit_job),
+        Scenario("api.get_ocr_job", get_job),
+        # streams until the job is done, i.e. measures the ocr of a whole table
+        Scenario("api.stream_ocr_job",
+                 lambda i: {"path": f"/api/ocr_jobs/{job_id(i)}/events",
+                            "method": "GET"}),
+        Scenario("api.invert_image",
+                 lambda i: {"path": doc(i).url(f"image/invert/{doc(i).image_name}"),
+                            "method": "POST"}),
+        Scenario("api.rotate_image",
+                 lambda i: {"path": doc(i).url(f"image/rotate/{doc(i).image_name}"),
+                            "method": "POST"}),
+    ]
+
+
+def uncovered_endpoints(app: Flask, scenarios: List[Scenario]) -> List[Text]:
+    """Endpoints of the app that no scenario sends requests to."""
+    endpoints = {rule.endpoint for rule in app.url_map.iter_rules()}
+    return sorted(endpoints - IGNORED_ENDPOINTS - {s.endpoint for s in scenarios})
+
+
+def run_scenario(client: FlaskClient, scenario: Scenario, requests: int,
+                 warmup: int) -> Dict[Text, float]:
+    """Sends requests and returns their throughput and latency percentiles."""
+    latencies = []
+    errors = 0
+    for i in range(warmup + requests):
+        kwargs = scenario.prepare(i)
+        start = time.perf_counter()
+        response = client.open(**kwargs)
+        response.get_data()
+        seconds = time.perf_counter() - start
+        if response.status_code >= 400:
+            errors += 1
+        if scenario.finish is not None:
+            scenario.finish(response)
+        response.close()
+        if i >= warmup:
+            latencies.append(seconds)
+    return {"requestsPerSecond": len(latencies) / sum(latencies),
+            "p50Ms": float(np.percentile(latencies, 50)) * 1000,
+            "p95Ms": float(np.percentile(latencies, 95)) * 1000,
+            "errors": errors}
+
+
+def run_benchmark(data_path: Text, requests: int, warmup: int,
+                  delay_per_image: float = 0.0,
+                  endpoints: Optional[List[Text]] = None
+                  ) -> Dict[Text, Dict[Text, float]]:
+    """Measures every endpoint of the api on the documents below data_path."""
+    app = create_app(data_path=data_path)
+    image_paths = [os.path.join(workdir, image_name)
+                   for bucket in table_annotator.io.get_all_non_hidden_dirs(data_path)
+                   for project in table_annotator.io.get_all_non_hidden_dirs(bucket)
+                   for workdir in table_annotator.io.get_all_non_hidden_dirs(project)
+                   for image_name in table_annotator.io.list_images(workdir)]
+    documents = [Document(data_path, p) for p in sorted(image_paths)]
+    if len(documents) == 0:
+        raise ValueError(f"No documents found in {data_path}.")
+
+    results = {}
+    # the fake services are started after create_app, which configures the services
+    with FakeServices(delay_per_image), app.test_client() as client:
+        scenarios = create_scenarios(client, documents)
+        for endpoint in uncovered_endpoints(app, scenarios):
+            print(f"Warning: no benchmark for endpoint {endpoint}")
+        for scenario in scenarios:
+            if endpoints is None or scenario.endpoint in endpoints:
+                results[scenario.endpoint] = run_scenario(client, scenario, requests,
+                                                          warmup)
+    return results
+
+
+def compare(results: Dict[Text, Dict[Text, float]],
+            baseline: Dict[Text, Dict[Text, float]], tolerance: float) -> List[Text]:
+    """Prints the results next to a baseline and returns the regressed endpoints."""
+    regressions = []
+    print(f"{'endpoint':<40}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}"
+          f"{'p50 Δ':>9}{'p95 Δ':>9}")
+    for endpoint, result in results.items():
+        line = f"{endpoint:<40}{result['requestsPerSecond']:>9.1f}" \
+               f"{result['p50Ms']:>9.2f}{result['p95Ms']:>9.2f}"
+        if endpoint in baseline:
+            changes = [result[key] / baseline[endpoint][key] - 1
+                       for key in ["p50Ms", "p95Ms"]]
+            line += "".join(f"{change:>+9.0%}" for change in changes)
+            if any(change > tolerance for change in changes):
+                regressions.append(endpoint)
+                line += "  slower"
+        if result["errors"] > 0:
+            line += f"  {result['errors']} errors"
+        print(line)
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks every endpoint of the api "
+                                                 "with fake ocr and segmenting "
+                                                 "servers.")
+    parser.add_argument("-data_path", default=None,
+                        help="Data tree to run on. Without it, a synthetic corpus is "
+                             "generated in a temporary folder. Documents are modified, "
+                             "so do not point this at real data.")
+    parser.add_argument("-documents", default=5, type=int,
+                        help="Documents per workdir of the synthetic corpus.")
+    parser.add_argument("-rows", default=30, type=int)
+    parser.add_argument("-columns", default=6, type=int)
+    parser.add_argument("-requests", default=20, type=int,
+                        help="Measured requests per endpoint.")
+    parser.add_argument("-warmup", default=2, type=int,
+                        help="Requests per endpoint before measuring.")
+    parser.add_argument("-delay_per_image", default=0.0, type=float,
+                        help="Seconds the fake servers take per image.")
+    parser.add_argument("-endpoint", action="append", default=None,
+                        help="Only benchmark this endpoint, can be repeated.")
+    parser.add_argument("-baseline", default=None,
+                        help="Results of a previous run to compare against.")
+    parser.add_argument("-tolerance", default=0.2, type=float,
+                        help="Relative latency increase over the baseline that "
+                             "counts as a regression.")
+    parser.add_argument("-save", default=None, help="File to store the results in.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        data_path = args.data_path
+        if data_path is None:
+            data_path = temp_dir
+            generate_corpus(data_path, documents=args.documents, rows=args.rows,
+                            columns=args.columns)
+        benchmark_results = run_benchmark(data_path, args.requests, args.warmup,
+                                          args.delay_per_image, args.endpoint)
+
+    baseline_results = {}
+    if args.baseline is not None:
+        baseline_results = table_annotator.io.read_json(args.baseline)
+    regressed = compare(benchmark_results, baseline_results, args.tolerance)
+    if args.save is not None:
+        table_annotator.io.write_json(args.save, benchmark_results)
+    if len(regressed) > 0:
+        print(f"{len(regressed)} endpoints are slower than the baseline.")
+        sys.exit(1)
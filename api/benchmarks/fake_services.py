@@ -0,0 +1,85 @@
+"""Local stand-ins for the ocr and segmenting servers.
+
+They speak the same protocol as the real servers, json and binary, but answer
+without running a model, like ocr-server/fake_server.py. An optional delay per
+image simulates the time a model would take.
+"""
+import logging
+import threading
+import time
+from typing import List, Text, Tuple
+
+import numpy as np
+from flask import Flask, request
+from werkzeug.serving import make_server, BaseWSGIServer
+
+import table_annotator.services
+import table_annotator.transport
+
+
+def images_from_request(key: Text) -> List[np.ndarray]:
+    if request.mimetype == table_annotator.transport.IMAGES_MIMETYPE:
+        return table_annotator.transport.decode_images(request.get_data())
+    images = request.json[key]
+    if key == "table_image":
+        images = [images]
+    return [np.array(image, dtype=np.uint8) for image in images]
+
+
+def create_fake_ocr_app(delay_per_image: float = 0.0) -> Flask:
+    app = Flask(__name__)
+
+    @app.route('/ocr', methods=["POST"])
+    def ocr():
+        images = images_from_request("images")
+        time.sleep(delay_per_image * len(images))
+        return {"predictions": [f"text {i}" for i in range(len(images))]}
+
+    return app
+
+
+def create_fake_segmenting_app(delay_per_image: float = 0.0,
+                               row_height: int = 40) -> Flask:
+    app = Flask(__name__)
+
+    @app.route('/segment', methods=["POST"])
+    def segment():
+        image = images_from_request("table_image")[0]
+        time.sleep(delay_per_image)
+        return {"rows": list(range(row_height, image.shape[0], row_height))}
+
+    return app
+
+
+def start_server(app: Flask) -> Tuple[BaseWSGIServer, Text]:
+    """Serves the app on a free local port in a background thread."""
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+class FakeServices:
+    """Runs fake ocr and segmenting servers and points the service clients at them."""
+
+    def __init__(self, delay_per_image: float = 0.0) -> None:
+        self.servers = []
+        for name, app in [
+                (table_annotator.services.OCR_SERVICE,
+                 create_fake_ocr_app(delay_per_image)),
+                (table_annotator.services.SEGMENTING_SERVICE,
+                 create_fake_segmenting_app(delay_per_image))]:
+            server, url = start_server(app)
+            self.servers.append(server)
+            table_annotator.services.configure(name, urls=[url])
+
+    def shutdown(self) -> None:
+        for server in self.servers:
+            server.shutdown()
+            server.server_close()
+
+    def __enter__(self) -> "FakeServices":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.shutdown()
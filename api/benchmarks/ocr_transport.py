@@ -0,0 +1,62 @@
+import argparse
+import json
+import time
+from typing import Callable, List, Tuple
+
+import numpy as np
+
+import table_annotator.transport
+
+
+def measure(f: Callable[[], bytes], repetitions: int) -> Tuple[float, bytes]:
+    """Returns the fastest run time of f in seconds and its last result."""
+    best = float("inf")
+    result = b""
+    for _ in range(repetitions):
+        start = time.perf_counter()
+        result = f()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def json_round_trip(images: List[np.ndarray]) -> bytes:
+    payload = json.dumps({"images": [image.tolist() for image in images]}).encode()
+    [np.array(img, dtype="uint8") for img in json.loads(payload)["images"]]
+    return payload
+
+
+def binary_round_trip(images: List[np.ndarray]) -> bytes:
+    payload = table_annotator.transport.encode_images(images)
+    table_annotator.transport.decode_images(payload)
+    return payload
+
+
+def benchmark_ocr_transport(num_cells: int, cell_height: int, cell_width: int,
+                            repetitions: int) -> None:
+    """Compares encoding and decoding of ocr requests as json and in binary."""
+    rng = np.random.default_rng(0)
+    images = [rng.integers(0, 256, (cell_height, cell_width), dtype=np.uint8)
+              for _ in range(num_cells)]
+    raw_size = sum(image.size for image in images)
+
+    print(f"{num_cells} cells of {cell_width}x{cell_height}px, "
+          f"{raw_size / 1024 ** 2:.2f} MiB of pixels")
+    print(f"{'format':<8}{'payload MiB':>14}{'round trip ms':>16}")
+    for name, round_trip in [("json", json_round_trip),
+                             ("binary", binary_round_trip)]:
+        seconds, payload = measure(lambda: round_trip(images), repetitions)
+        print(f"{name:<8}{len(payload) / 1024 ** 2:>14.2f}{seconds * 1000:>16.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks the wire formats used "
+                                                 "for sending cell images to the ocr "
+                                                 "server.")
+    parser.add_argument("-num_cells", default=600, type=int,
+                        help="Number of cells, i.e. a 60x10 table by default.")
+    parser.add_argument("-cell_height", default=40, type=int)
+    parser.add_argument("-cell_width", default=250, type=int)
+    parser.add_argument("-repetitions", default=3, type=int)
+    args = parser.parse_args()
+    benchmark_ocr_transport(args.num_cells, args.cell_height, args.cell_width,
+                            args.repetitions)
@@ -0,0 +1,51 @@
+import argparse
+import json
+
+import numpy as np
+
+import table_annotator.segmentation
+import table_annotator.transport
+from benchmarks.ocr_transport import measure
+
+
+def benchmark_segmentation_transport(height: int, width: int, scale: float,
+                                     repetitions: int) -> None:
+    """Compares the request formats for sending a table image to the segmenter."""
+    rng = np.random.default_rng(0)
+    table_image = rng.integers(0, 256, (height, width), dtype=np.uint8)
+
+    def json_request() -> bytes:
+        payload = json.dumps({"table_image": table_image.tolist()}).encode()
+        np.array(json.loads(payload)["table_image"])
+        return payload
+
+    def binary_request() -> bytes:
+        payload = table_annotator.transport.encode_images([table_image])
+        table_annotator.transport.decode_images(payload)
+        return payload
+
+    def downscaled_binary_request() -> bytes:
+        image = table_annotator.segmentation.downscale(table_image, scale)
+        payload = table_annotator.transport.encode_images([image])
+        table_annotator.transport.decode_images(payload)
+        return payload
+
+    print(f"table image of {width}x{height}px")
+    print(f"{'format':<20}{'payload MiB':>14}{'round trip ms':>16}")
+    for name, round_trip in [("json", json_request),
+                             ("binary", binary_request),
+                             (f"binary scaled {scale}", downscaled_binary_request)]:
+        seconds, payload = measure(round_trip, repetitions)
+        print(f"{name:<20}{len(payload) / 1024 ** 2:>14.2f}{seconds * 1000:>16.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks the request formats "
+                                                 "used for table segmentation.")
+    parser.add_argument("-height", default=2000, type=int)
+    parser.add_argument("-width", default=1500, type=int)
+    parser.add_argument("-scale", default=0.5, type=float)
+    parser.add_argument("-repetitions", default=3, type=int)
+    args = parser.parse_args()
+    benchmark_segmentation_transport(args.height, args.width, args.scale,
+                                     args.repetitions)
@@ -0,0 +1,182 @@
+import argparse
+import csv
+import os
+from collections import defaultdict
+from typing import Text, List, Dict
+
+import cv2
+import numpy as np
+
+import table_annotator.io
+import table_annotator.pre_annotated
+from table_annotator.constants import KEY_ORDER, KEY_LAST_NAME, KEY_FIRST_NAME, \
+    KEY_DATE_OF_BIRTH, KEY_PRISONER_NUMBER, KEY_BIRTH_PLACE, \
+    KEY_PRISONER_NUMBER_ANNOTATOR, KEY_LAST_NAME_ANNOTATOR, KEY_FIRST_NAME_ANNOTATOR, \
+    KEY_DATE_OF_BIRTH_ANNOTATOR, KEY_BIRTH_PLACE_ANNOTATOR
+from table_annotator.types import Table, Rectangle, Point, Cell, \
+    DOCUMENT_STATE_TODO, DOCUMENT_STATE_DONE
+
+# column types of the first columns of every table, further columns are untyped
+COLUMN_TYPES = [KEY_PRISONER_NUMBER_ANNOTATOR, KEY_LAST_NAME_ANNOTATOR,
+                KEY_FIRST_NAME_ANNOTATOR, KEY_DATE_OF_BIRTH_ANNOTATOR,
+                KEY_BIRTH_PLACE_ANNOTATOR]
+LAST_NAMES = ["Müller", "Schmidt", "Schneider", "Fischer", "Weber", "Meyer", "Wagner",
+              "Becker", "Schulz", "Hoffmann", "Kowalski", "Nowak", "Novak", "Levi"]
+FIRST_NAMES = ["Anna", "Josef", "Maria", "Jan", "Franz", "Ewa", "Karl", "Stanislaw",
+               "Helena", "Piotr", "Johann", "Sara", "Moritz", "Irena"]
+PLACES = ["Berlin", "Krakau", "Prag", "Wien", "Lodz", "Warschau", "Lemberg", "Brünn"]
+PERSDATA_FILE_NAME = "persdata.csv"
+
+
+class Person:
+    """A row of a synthetic register, as it appears in tables and in persdata."""
+
+    def __init__(self, rng: np.random.Generator, number: int) -> None:
+        self.number = str(number)
+        self.last_name = str(rng.choice(LAST_NAMES))
+        self.first_name = str(rng.choice(FIRST_NAMES))
+        self.birth_place = str(rng.choice(PLACES))
+        self.year = int(rng.integers(1880, 1930))
+        self.month = int(rng.integers(1, 13))
+        self.day = int(rng.integers(1, 29))
+
+    def date_of_birth(self) -> Text:
+        return f"{self.year:04d}{self.month:02d}{self.day:02d}"
+
+    def texts(self, num_columns: int) -> List[Text]:
+        """Texts of the person's row in a table with num_columns columns."""
+        texts = [self.number, self.last_name, self.first_name,
+                 f"{self.day}.{self.month}.{self.year % 100:02d}", self.birth_place]
+        return (texts + ["x"] * num_columns)[:num_columns]
+
+
+def draw_page(width: int, height: int, table: Table, texts: List[List[Text]],
+              rng: np.random.Generator) -> np.ndarray:
+    """A scan-like grayish page with the grid and texts of the table drawn on it."""
+    page = np.full((height, width, 3), 235, dtype=np.uint8)
+    page += rng.integers(0, 20, (height, width, 1), dtype=np.uint8)
+    top_left, bottom_right = table.outline.topLeft, table.outline.bottomRight
+    xs = [top_left.x] + [top_left.x + c for c in table.columns] + [bottom_right.x]
+    ys = [top_left.y] + [top_left.y + r for r in table.rows] + [bottom_right.y]
+    for x in xs:
+        cv2.line(page, (x, top_left.y), (x, bottom_right.y), (40, 40, 40), 2)
+    for y in ys:
+        cv2.line(page, (top_left.x, y), (bottom_right.x, y), (40, 40, 40), 2)
+    for i, row_texts in enumerate(texts):
+        for j, text in enumerate(row_texts):
+            cv2.putText(page, text, (xs[j] + 8, ys[i + 1] - 10),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.8, (30, 30, 30), 2)
+    return page
+
+
+def create_table(width: int, height: int, rows: int, columns: int,
+                 texts: List[List[Text]], rng: np.random.Generator) -> Table:
+    """A table covering most of the page, with human text in every cell."""
+    margin = width // 20
+    outline = Rectangle(topLeft=Point(x=margin, y=margin * 2),
+                        bottomRight=Point(x=width - margin, y=height - margin))
+    row_height = (outline.height()) // rows
+    column_width = (outline.width()) // columns
+    return Table(
+        outline=outline,
+        rotationDegrees=float(rng.uniform(-1.5, 1.5)),
+        rows=[row_height * (i + 1) for i in range(rows - 1)],
+        columns=[column_width * (i + 1) for i in range(columns - 1)],
+        cells=[[Cell(human_text=text) for text in row_texts] for row_texts in texts],
+        structureLocked=True,
+        columnTypes=[[COLUMN_TYPES[i]] if i < len(COLUMN_TYPES) else []
+                     for i in range(columns)])
+
+
+def write_persdata(path: Text, persons: List[Person]) -> None:
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, [KEY_PRISONER_NUMBER, KEY_LAST_NAME, KEY_FIRST_NAME,
+                                    KEY_DATE_OF_BIRTH], delimiter="|")
+        writer.writeheader()
+        for person in persons:
+            writer.writerow({KEY_PRISONER_NUMBER: person.number,
+                             KEY_LAST_NAME: person.last_name.upper(),
+                             KEY_FIRST_NAME: person.first_name.upper(),
+                             KEY_DATE_OF_BIRTH: person.date_of_birth()})
+
+
+def write_pre_annotated(image_path: Text, persons: List[Person]) -> None:
+    csv_path = table_annotator.pre_annotated.pre_annotated_data_file_for_image(
+        image_path)
+    with open(csv_path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, [KEY_ORDER, KEY_PRISONER_NUMBER, KEY_LAST_NAME,
+                                    KEY_FIRST_NAME, KEY_DATE_OF_BIRTH, KEY_BIRTH_PLACE])
+        writer.writeheader()
+        for i, person in enumerate(persons):
+            writer.writerow({KEY_ORDER: i, KEY_PRISONER_NUMBER: person.number,
+                             KEY_LAST_NAME: person.last_name,
+                             KEY_FIRST_NAME: person.first_name,
+                             KEY_DATE_OF_BIRTH: person.date_of_birth(),
+                             KEY_BIRTH_PLACE: person.birth_place})
+
+
+def generate_corpus(data_path: Text, buckets: int = 1, projects: int = 1,
+                    workdirs: int = 2, documents: int = 5, rows: int = 30,
+                    columns: int = 6, width: int = 2480, height: int = 3508,
+                    seed: int = 0) -> List[Text]:
+    """Writes a data tree of synthetic documents and returns their image paths.
+
+    Every workdir holds documents with one table each, their table files, document
+    states and pre-annotated csv files. Every project gets a persdata.csv that
+    contains most of the persons in its tables.
+    """
+    rng = np.random.default_rng(seed)
+    image_paths = []
+    # the api looks for persdata below the data path by project name only, so
+    # projects of the same name in different buckets share it
+    persons_by_project: Dict[Text, List[Person]] = defaultdict(list)
+    number = 1
+    for b in range(buckets):
+        for p in range(projects):
+            project = f"project{p:02d}"
+            for w in range(workdirs):
+                workdir = os.path.join(data_path, f"bucket{b:02d}", project,
+                                       f"workdir{w:02d}")
+                os.makedirs(workdir, exist_ok=True)
+                for d in range(documents):
+                    image_path = os.path.join(workdir, f"document{d:04d}.jpg")
+                    persons = [Person(rng, number + i) for i in range(rows)]
+                    number += rows
+                    persons_by_project[project].extend(persons[:int(rows * 0.9)])
+                    texts = [person.texts(columns) for person in persons]
+                    table = create_table(width, height, rows, columns, texts, rng)
+                    table_annotator.io.write_image(
+                        image_path, draw_page(width, height, table, texts, rng))
+                    table_annotator.io.write_tables_for_image(image_path, [table])
+                    table_annotator.io.write_state_for_image(
+                        image_path,
+                        DOCUMENT_STATE_DONE if d % 2 == 0 else DOCUMENT_STATE_TODO)
+                    write_pre_annotated(image_path, persons)
+                    image_paths.append(image_path)
+    for project, persons in persons_by_project.items():
+        os.makedirs(os.path.join(data_path, project), exist_ok=True)
+        write_persdata(os.path.join(data_path, project, PERSDATA_FILE_NAME), persons)
+    return image_paths
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Writes a data tree of synthetic "
+                                                 "documents for benchmarking.")
+    parser.add_argument("data_path", help="Folder the data tree is written to.")
+    parser.add_argument("-buckets", default=1, type=int)
+    parser.add_argument("-projects", default=1, type=int)
+    parser.add_argument("-workdirs", default=2, type=int,
+                        help="Number of workdirs per project.")
+    parser.add_argument("-documents", default=5, type=int,
+                        help="Number of documents per workdir.")
+    parser.add_argument("-rows", default=30, type=int, help="Rows per table.")
+    parser.add_argument("-columns", default=6, type=int, help="Columns per table.")
+    parser.add_argument("-width", default=2480, type=int,
+                        help="Page width in pixels, A4 at 300dpi by default.")
+    parser.add_argument("-height", default=3508, type=int)
+    parser.add_argument("-seed", default=0, type=int)
+    args = parser.parse_args()
+    paths = generate_corpus(args.data_path, args.buckets, args.projects, args.workdirs,
+                            args.documents, args.rows, args.columns, args.width,
+                            args.height, args.seed)
+    print(f"Wrote {len(paths)} documents to {args.data_path}")
@@ -0,0 +1,45 @@
+import argparse
+
+import numpy as np
+
+import table_annotator.img
+from benchmarks.ocr_transport import measure
+from table_annotator.types import Rectangle, Point
+
+
+def benchmark_table_deskew(height: int, width: int, table_fraction: float,
+                           degrees: float, repetitions: int) -> None:
+    """Compares rotating the full page against rotating only the table region."""
+    rng = np.random.default_rng(0)
+    image = rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+    table_height, table_width = int(height * table_fraction), int(width * table_fraction)
+    top, left = (height - table_height) // 2, (width - table_width) // 2
+    rect = Rectangle(topLeft=Point(x=left, y=top),
+                     bottomRight=Point(x=left + table_width, y=top + table_height))
+
+    def full_page() -> np.ndarray:
+        return table_annotator.img.crop(table_annotator.img.rotate(image, degrees), rect)
+
+    def table_region() -> np.ndarray:
+        return table_annotator.img.rotate_and_crop(image, degrees, rect)
+
+    print(f"page of {width}x{height}px, table of {table_width}x{table_height}px, "
+          f"rotated by {degrees} degrees")
+    results = {}
+    for name, deskew in [("full page", full_page), ("table region", table_region)]:
+        seconds, results[name] = measure(deskew, repetitions)
+        print(f"{name:<14}{seconds * 1000:>10.1f} ms")
+    assert np.array_equal(results["full page"], results["table region"])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks extracting a rotated "
+                                                 "table from a page.")
+    parser.add_argument("-height", default=4960, type=int)
+    parser.add_argument("-width", default=3508, type=int)
+    parser.add_argument("-table_fraction", default=0.6, type=float)
+    parser.add_argument("-degrees", default=-1.5, type=float)
+    parser.add_argument("-repetitions", default=3, type=int)
+    args = parser.parse_args()
+    benchmark_table_deskew(args.height, args.width, args.table_fraction, args.degrees,
+                           args.repetitions)
@@ -0,0 +1,116 @@
+import argparse
+import glob
+import json
+import os
+from typing import Any, Dict, List, Text
+
+import table_annotator.cellgrid
+import table_annotator.io
+import table_annotator.serialization
+from benchmarks.ocr_transport import measure
+from table_annotator.types import Table
+
+
+def legacy_table_as_json(table: Table) -> Dict[Text, Any]:
+    """table_as_json as it was before stripping None values in a single pass."""
+    table_json = {k: v for k, v in table.dict().items() if v is not None}
+    table_json["cells"] = table_annotator.cellgrid.apply_to_cells(
+        lambda c: {k: v for k, v in c.items() if v is not None}, table_json["cells"])
+    return table_json
+
+
+def read_corpus(data_path: Text) -> List[List[Table]]:
+    """Reads the tables of all documents below data_path."""
+    documents = []
+    for file_path in sorted(glob.glob(os.path.join(data_path, "**", "*.json"),
+                                      recursive=True)):
+        if file_path.endswith(table_annotator.io.STATE_FILE_SUFFIX):
+            continue
+        try:
+            tables = table_annotator.io.read_tables(file_path)
+        except Exception:
+            continue
+        if len(tables) > 0:
+            documents.append(tables)
+    return documents
+
+
+def synthetic_corpus(num_documents: int, rows: int, columns: int) -> List[List[Table]]:
+    """Documents with one table of the given size each, with ocr and human text."""
+    table = table_annotator.io.read_json("test_data/01/0100_5312606_1.json")[0]
+    table["rows"] = [(i + 1) * 30 for i in range(rows - 1)]
+    table["columns"] = [(i + 1) * 80 for i in range(columns - 1)]
+    table["cells"] = [[{"ocr_text": f"Zelle {r} {c} Müller",
+                        "human_text": f"Zelle {r} {c} Müller" if c % 3 == 0 else None}
+                       for c in range(columns)]
+                      for r in range(rows)]
+    table["columnTypes"] = [["NAME"] for _ in range(columns)]
+    table["structureLocked"] = True
+    return [[Table(**table)] for _ in range(num_documents)]
+
+
+def benchmark_table_serialization(documents: List[List[Table]],
+                                  repetitions: int) -> None:
+    """Compares serializing and parsing the tables of a corpus across backends.
+
+    Reading is measured with validation and as trusted construction of the tables.
+    """
+    num_cells = sum(len(row) for tables in documents for t in tables for row in t.cells)
+    print(f"{len(documents)} documents with {num_cells} cells")
+    print(f"{'format':<22}{'MiB':>8}{'write docs/s':>15}{'read docs/s':>14}"
+          f"{'trusted read docs/s':>22}")
+
+    def legacy_write() -> List[bytes]:
+        return [json.dumps([legacy_table_as_json(t) for t in tables],
+                           ensure_ascii=False, indent=4).encode("utf-8")
+                for tables in documents]
+
+    variants = [("legacy json indented", legacy_write)]
+    for library in sorted(table_annotator.serialization.SERIALIZERS.keys()):
+        for compact in [False, True]:
+            def write(library=library, compact=compact) -> List[bytes]:
+                table_annotator.serialization.configure(library, compact)
+                return [table_annotator.serialization.dumps_for_file(
+                            [table_annotator.io.table_as_json(t) for t in tables])
+                        for tables in documents]
+            name = f"{library} {'compact' if compact else 'indented'}"
+            variants.append((name, write))
+
+    for name, write in variants:
+        write_seconds, payloads = measure(write, repetitions)
+        library = "json" if name.startswith("legacy") else name.split()[0]
+        table_annotator.serialization.configure(library)
+
+        def read() -> List[List[Table]]:
+            return [[Table(**t) for t in table_annotator.serialization.loads(p)]
+                    for p in payloads]
+
+        def trusted_read() -> List[List[Table]]:
+            return [[table_annotator.io.construct_table(t)
+                     for t in table_annotator.serialization.loads(p)]
+                    for p in payloads]
+
+        read_seconds, _ = measure(read, repetitions)
+        trusted_read_seconds, _ = measure(trusted_read, repetitions)
+        size = sum(len(p) for p in payloads) / 1024 ** 2
+        print(f"{name:<22}{size:>8.2f}{len(documents) / write_seconds:>15.0f}"
+              f"{len(documents) / read_seconds:>14.0f}"
+              f"{len(documents) / trusted_read_seconds:>22.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks writing and reading "
+                                                 "table files.")
+    parser.add_argument("-data_path", default=None,
+                        help="Folder with annotated documents. Without it, synthetic "
+                             "tables are used.")
+    parser.add_argument("-documents", default=200, type=int)
+    parser.add_argument("-rows", default=60, type=int)
+    parser.add_argument("-columns", default=10, type=int)
+    parser.add_argument("-repetitions", default=3, type=int)
+    args = parser.parse_args()
+    if args.data_path is not None:
+        corpus = read_corpus(args.data_path)
+    else:
+        corpus = synthetic_corpus(args.documents, args.rows, args.columns)
+    benchmark_table_serialization(corpus, args.repetitions)
@@ -4,6 +4,7 @@ from typing import Text, Optional
 import cv2
 import table_annotator.io
 import table_annotator.cellgrid
+import table_annotator.image_cache
 import table_annotator.lines
 
 
@@ -30,7 +31,6 @@ def extract_ocr_data(data_path: Text, target_path: Text,
 
     for image_path, tables in zip(image_paths, tables_for_images):
 
-        image = table_annotator.io.read_image(image_path)
         image_name = os.path.splitext(os.path.basename(image_path))[0]
 
         for t_i, t in enumerate(tables):
@@ -40,7 +40,8 @@ def extract_ocr_data(data_path: Text, target_path: Text,
             if len(needs_ocr) > 0:
                 continue
 
-            cell_image_grid = table_annotator.cellgrid.get_cell_image_grid(image, t, padding)
+            cell_image_grid = table_annotator.image_cache.get_cell_image_grid(
+                image_path, t, padding)
             for row_i in range(len(t.cells)):
                 for col_i in range(len(t.cells[row_i])):
                     # skip those columns that don't have the desired data type
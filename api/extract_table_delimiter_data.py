@@ -6,7 +6,7 @@ import cv2
 import numpy as np
 
 import table_annotator.io
-import table_annotator.img
+import table_annotator.image_cache
 
 
 def pixel_based_height(height: int) -> Callable[[int, int, List[int]], int]:
@@ -44,11 +44,11 @@ def extract_table_delimiter_data(data_path: Text,
 
     for image_path in image_paths:
         img_name = os.path.splitext(os.path.basename(image_path))[0]
-        image = table_annotator.io.read_image(image_path)
         tables = table_annotator.io.read_tables_for_image(image_path)
         for i, table in enumerate(tables):
             table_identifier = f"{img_name}_{i:02d}"
-            table_image = table_annotator.img.extract_table_image(image, table)
+            table_image = table_annotator.image_cache.extract_table_image(image_path,
+                                                                       table)
             tasks = []
             row_px_delimiters = [0] + table.rows + [table_image.shape[0]]
 
@@ -0,0 +1,133 @@
+import argparse
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Text, List, Set, Optional
+
+import table_annotator.io
+import table_annotator.ocr
+
+
+def find_workdirs(data_path: Text) -> List[Text]:
+    """Finds all folders below data_path, including itself, that contain images."""
+    workdirs = []
+    for root, dirs, files in os.walk(data_path):
+        dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+        if any(table_annotator.io.is_image_file(f) for f in files):
+            workdirs.append(root)
+    return workdirs
+
+
+def count_cells_needing_ocr(image_path: Text) -> int:
+    tables = table_annotator.io.read_tables_for_image(image_path)
+    return sum(1 for table in tables for row in table.cells for cell in row
+               if cell.ocr_text is None)
+
+
+class Checkpoint:
+    """Remembers the images that are done so that an interrupted run can resume.
+
+    Finished images are appended to a log file, one path per line, so that marking
+    an image as done costs the same however many images are done already.
+    """
+
+    def __init__(self, path: Text) -> None:
+        self.path = path
+        self.lock = threading.Lock()
+        content = ""
+        if os.path.isfile(path):
+            with open(path, encoding="utf-8") as f:
+                content = f.read()
+        # a last line without a line break was cut off by an interrupted run
+        lines = content.split("\n")
+        self.done: Set[Text] = {line for line in lines[:-1] if line}
+        self.file = open(path, "a", encoding="utf-8")
+        if lines[-1] != "":
+            self.file.write("\n")
+
+    def mark_done(self, image_path: Text) -> None:
+        with self.lock:
+            self.done.add(image_path)
+            self.file.write(f"{image_path}\n")
+            self.file.flush()
+            os.fsync(self.file.fileno())
+
+    def close(self) -> None:
+        self.file.close()
+
+
+def pre_ocr(data_path: Text, concurrency: int = 4,
+            checkpoint_path: Optional[Text] = None,
+            overwrite: bool = False, report_every: int = 10) -> None:
+    """OCRs all tables below data_path that lack ocr text, e.g. a bucket or project."""
+    if checkpoint_path is None:
+        checkpoint_path = os.path.join(data_path, ".pre_ocr_checkpoint.log")
+    checkpoint = Checkpoint(checkpoint_path)
+
+    image_paths = [os.path.join(workdir, image_name)
+                   for workdir in find_workdirs(data_path)
+                   for image_name in table_annotator.io.list_images(workdir)]
+    image_paths = [p for p in image_paths
+                   if os.path.relpath(p, data_path) not in checkpoint.done]
+    cells_per_image = {p: count_cells_needing_ocr(p) for p in image_paths}
+    todo = [p for p in image_paths if overwrite or cells_per_image[p] > 0]
+    print(f"{len(todo)} images with {sum(cells_per_image[p] for p in todo)} cells "
+          f"need ocr, {len(checkpoint.done)} images done in previous runs")
+
+    start = time.monotonic()
+    images_done = 0
+    cells_done = 0
+    failures = 0
+
+    def process(image_path: Text) -> int:
+        _, skipped = table_annotator.ocr.ocr_tables_for_image(image_path,
+                                                              overwrite=overwrite)
+        if skipped > 0:
+            raise RuntimeError(f"{skipped} tables changed during ocr, the image "
+                               f"is ocr-ed again in the next run")
+        checkpoint.mark_done(os.path.relpath(image_path, data_path))
+        return cells_per_image[image_path]
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = {executor.submit(process, image_path): image_path
+                   for image_path in todo}
+        for future in as_completed(futures):
+            try:
+                cells_done += future.result()
+                images_done += 1
+            except Exception as e:
+                failures += 1
+                print(f"Failed to ocr {futures[future]}: {e}")
+            if (images_done + failures) % report_every == 0:
+                elapsed = time.monotonic() - start
+                print(f"{images_done + failures}/{len(todo)} images, "
+                      f"{images_done / elapsed:.2f} images/s, "
+                      f"{cells_done / elapsed:.1f} cells/s")
+    checkpoint.close()
+
+    elapsed = time.monotonic() - start
+    print(f"Finished {images_done} images and {cells_done} cells in {elapsed:.1f}s, "
+          f"{failures} images failed")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Runs ocr on all tables of a bucket, '
+                                                 'project or workdir that have not '
+                                                 'been ocr-ed yet.')
+    parser.add_argument("data_path",
+                        help='Path to the folder whose tables you want to ocr. All '
+                             'folders containing images below it are processed.')
+    parser.add_argument("-concurrency", default=4, type=int,
+                        help="Number of images that are ocr-ed at the same time.")
+    parser.add_argument("-checkpoint", default=None,
+                        help="File for remembering finished images between runs. "
+                             "Defaults to .pre_ocr_checkpoint.log in data_path.")
+    parser.add_argument("-overwrite", action="store_true", default=False,
+                        help="Also ocr cells that already have ocr text.")
+    parser.add_argument("-report_every", default=10, type=int,
+                        help="Print throughput after every n images.")
+
+    args = parser.parse_args()
+    pre_ocr(args.data_path, args.concurrency, args.checkpoint, args.overwrite,
+            args.report_every)
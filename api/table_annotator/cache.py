@@ -0,0 +1,149 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import TypeVar, Generic, Callable, Optional, Hashable, Tuple, Dict, List
+
+K = TypeVar('K', bound=Hashable)
+V = TypeVar('V')
+
+
+class _InFlight(Generic[V]):
+    """A value that is currently being created by another thread."""
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.value: Optional[V] = None
+        self.error: Optional[BaseException] = None
+
+
+class LRUCache(Generic[K, V]):
+    """A least recently used cache bounded by the approximate memory of its values.
+
+    Entries are evicted once the summed size of all values exceeds max_bytes or when
+    they are older than ttl seconds. All operations are thread-safe.
+    """
+
+    def __init__(self, max_bytes: int, size_of: Callable[[V], int],
+                 ttl: Optional[float] = None) -> None:
+        self.max_bytes = max_bytes
+        self.size_of = size_of
+        self.ttl = ttl
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.coalesced = 0
+        self._lock = threading.RLock()
+        self._in_flight: Dict[K, _InFlight[V]] = {}
+        # maps keys to value, size and time of insertion
+        self._entries: OrderedDict[K, Tuple[V, int, float]] = OrderedDict()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def __contains__(self, key: K) -> bool:
+        return self.get(key, count=False) is not None
+
+    def _remove(self, key: K) -> None:
+        _, size, _ = self._entries.pop(key)
+        self.current_bytes -= size
+
+    def _is_expired(self, inserted_at: float) -> bool:
+        return self.ttl is not None and time.monotonic() - inserted_at > self.ttl
+
+    def get(self, key: K, count: bool = True) -> Optional[V]:
+        """Returns the cached value or None, marking the entry as recently used."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._is_expired(entry[2]):
+                self._remove(key)
+                self.evictions += 1
+                entry = None
+            if entry is None:
+                if count:
+                    self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            if count:
+                self.hits += 1
+            return entry[0]
+
+    def get_or_create(self, key: K, create: Callable[[], Optional[V]]) -> Optional[V]:
+        """Returns the cached value or creates it, creating each key only once.
+
+        Concurrent calls for a key that is not cached wait for the first caller to
+        create the value instead of creating it themselves. Values of None are
+        handed to the waiting callers but not cached.
+        """
+        with self._lock:
+            value = self.get(key)
+            if value is not None:
+                return value
+            in_flight = self._in_flight.get(key)
+            is_creator = in_flight is None
+            if is_creator:
+                in_flight = _InFlight()
+                self._in_flight[key] = in_flight
+            else:
+                self.coalesced += 1
+
+        if not is_creator:
+            in_flight.done.wait()
+            if in_flight.error is not None:
+                raise in_flight.error
+            return in_flight.value
+
+        try:
+            value = create()
+            in_flight.value = value
+            if value is not None:
+                self.put(key, value)
+            return value
+        except BaseException as e:
+            in_flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            in_flight.done.set()
+
+    def put(self, key: K, value: V) -> None:
+        """Stores a value and evicts the least recently used entries if necessary."""
+        size = self.size_of(value)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if size > self.max_bytes:
+                # would evict everything else without ever being served from the cache
+                return
+            self._entries[key] = (value, size, time.monotonic())
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self.evictions += 1
+
+    def invalidate(self, predicate: Callable[[K], bool]) -> int:
+        """Removes all entries whose key satisfies the predicate."""
+        with self._lock:
+            keys = [key for key in self._entries.keys() if predicate(key)]
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+
+    def keys(self) -> List[K]:
+        with self._lock:
+            return list(self._entries.keys())
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self.current_bytes,
+                    "maxBytes": self.max_bytes, "hits": self.hits,
+                    "misses": self.misses, "evictions": self.evictions,
+                    "coalesced": self.coalesced}
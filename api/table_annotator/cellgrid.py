@@ -48,6 +48,38 @@ def join_grid(cell_image_grid: CellGrid[np.ndarray]) -> np.ndarray:
     return np.concatenate(row_images, axis=0)
 
 
+def pack_grid(cell_image_grid: CellGrid[np.ndarray],
+              background: int = 255) -> Tuple[np.ndarray, CellGrid[Rectangle]]:
+    """Packs cell images of differing sizes into a single image.
+
+    Cells are laid out row by row. Returns the packed image and the position of
+    every cell inside of it.
+    """
+    rows_height = [max([cell.shape[0] for cell in row], default=0)
+                   for row in cell_image_grid]
+    rows_width = [sum([cell.shape[1] for cell in row]) for row in cell_image_grid]
+    example_cell = next((cell for row in cell_image_grid for cell in row), None)
+    extra_dims = example_cell.shape[2:] if example_cell is not None else ()
+    packed = np.full((sum(rows_height), max(rows_width, default=0)) + extra_dims,
+                     background, dtype=np.uint8)
+
+    positions = []
+    y = 0
+    for row, row_height in zip(cell_image_grid, rows_height):
+        x = 0
+        row_positions = []
+        for cell in row:
+            height, width = cell.shape[:2]
+            packed[y:y + height, x:x + width] = cell
+            row_positions.append(Rectangle(topLeft=Point(x=x, y=y),
+                                           bottomRight=Point(x=x + width,
+                                                             y=y + height)))
+            x += width
+        positions.append(row_positions)
+        y += row_height
+    return packed, positions
+
+
 def drop_rows(cell_grid: CellGrid[A], rows: List[int]) -> CellGrid[A]:
     """Extracts rows of the CellGrid and returns a new CellGrid."""
     grid_rows = set(range(len(cell_grid)))
@@ -97,6 +129,12 @@ def get_cell_rectangles(table: Table) -> CellGrid[Rectangle]:
 def get_cell_image_grid(image: np.ndarray, table: Table, padding: int = 0) -> CellGrid[np.ndarray]:
     """Extracts cells as separate images."""
     table_image = table_annotator.img.extract_table_image(image, table)
+    return crop_cell_image_grid(table_image, table, padding)
+
+
+def crop_cell_image_grid(table_image: np.ndarray, table: Table,
+                         padding: int = 0) -> CellGrid[np.ndarray]:
+    """Crops cells as separate images from the already extracted table image."""
     cell_image_grid = []
     for row in get_cell_rectangles(table):
         row_cells = []
@@ -1,8 +1,16 @@
+import functools
+
 import table_annotator.data_normalization.regex_conditions as rc
 import re
-from tqdm import tqdm
 import pandas as pd
-tqdm.pandas()
+
+
+@functools.cache
+def register_progress_apply() -> None:
+    """Adds progress_apply with a progress bar to pandas objects, once."""
+    from tqdm import tqdm
+    tqdm.pandas()
+
 
 # ---------------------------------------------------------------
 # small functions reused for different column processing
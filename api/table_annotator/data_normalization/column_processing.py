@@ -1210,6 +1210,7 @@ def standardize_nationality(df: pd.DataFrame,
     nat_col.replace('\.', '', inplace=True, regex=True)
 
     # find standardised values
+    af.register_progress_apply()
     matches = nat_col.progress_apply(
         lambda x: af.standardizer(
             nat_keys,
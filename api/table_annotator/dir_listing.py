@@ -0,0 +1,52 @@
+import os
+import threading
+import time
+from typing import Text, Dict, List, FrozenSet, Optional, Callable
+
+# a listing taken within this many nanoseconds of the directory's last change is not
+# reused, since file systems with coarse timestamps could change the directory again
+# without changing its mtime
+RACY_INTERVAL_NS = 2 * 10 ** 9
+
+
+class DirListing:
+    """The files of a directory and its images in sorted order."""
+
+    def __init__(self, mtime: int, files: FrozenSet[Text], images: List[Text]) -> None:
+        self.mtime = mtime
+        self.files = files
+        self.images = images
+        self.image_positions = {name: i for i, name in enumerate(images)}
+
+    def neighbour_image(self, image_name: Text, step: int) -> Optional[Text]:
+        """The image step positions after image_name, if both exist."""
+        position = self.image_positions.get(image_name)
+        if position is None or not 0 <= position + step < len(self.images):
+            return None
+        return self.images[position + step]
+
+
+_listings: Dict[Text, DirListing] = {}
+_listings_lock = threading.Lock()
+
+
+def get_listing(path: Text, is_image_file: Callable[[Text], bool]) -> DirListing:
+    """Lists a directory, reusing the previous listing while its mtime is unchanged."""
+    path = os.path.normpath(path)
+    mtime = os.stat(path).st_mtime_ns
+    with _listings_lock:
+        listing = _listings.get(path)
+    if listing is not None and listing.mtime == mtime:
+        return listing
+
+    files = frozenset(os.listdir(path))
+    listing = DirListing(mtime, files, sorted(f for f in files if is_image_file(f)))
+    if time.time_ns() - mtime > RACY_INTERVAL_NS:
+        with _listings_lock:
+            _listings[path] = listing
+    return listing
+
+
+def clear() -> None:
+    with _listings_lock:
+        _listings.clear()
@@ -0,0 +1,74 @@
+from typing import Text, List
+
+import table_annotator.io
+from table_annotator.types import Table, TableEdit, EDIT_SET_HUMAN_TEXT, \
+    EDIT_MOVE_ROW, EDIT_MOVE_COLUMN, EDIT_SET_COLUMN_TYPES
+
+
+class VersionConflict(Exception):
+    """The document changed since the version the edits were based on."""
+
+    def __init__(self, current_version: int) -> None:
+        super().__init__(f"The document is at version {current_version}.")
+        self.current_version = current_version
+
+
+def _check_index(index, length: int, name: Text) -> int:
+    if index is None or not 0 <= index < length:
+        raise ValueError(f"The {name} {index} does not exist.")
+    return index
+
+
+def _move_delimiter(delimiters: List[int], index, position, name: Text,
+                    extent: int) -> None:
+    """Moves a delimiter between its neighbours, the outline bounds the outer ones."""
+    index = _check_index(index, len(delimiters), name)
+    if position is None:
+        raise ValueError(f"Moving a {name} needs a position.")
+    lower = delimiters[index - 1] if index > 0 else 0
+    upper = delimiters[index + 1] if index + 1 < len(delimiters) else extent
+    if position <= lower or position >= upper:
+        raise ValueError(f"The {name} can not be moved past its neighbours.")
+    delimiters[index] = position
+
+
+def apply_edit(tables: List[Table], edit: TableEdit) -> None:
+    """Applies an edit to the tables in place, raising ValueError if it is invalid."""
+    table = tables[_check_index(edit.table, len(tables), "table")]
+    if edit.op == EDIT_SET_HUMAN_TEXT:
+        row = _check_index(edit.row, len(table.cells), "row")
+        column = _check_index(edit.column, len(table.cells[row]), "column")
+        table.cells[row][column].human_text = edit.human_text
+    elif edit.op == EDIT_MOVE_ROW:
+        _move_delimiter(table.rows, edit.index, edit.position, "row",
+                        table.outline.height())
+    elif edit.op == EDIT_MOVE_COLUMN:
+        _move_delimiter(table.columns, edit.index, edit.position, "column",
+                        table.outline.width())
+    elif edit.op == EDIT_SET_COLUMN_TYPES:
+        if table.columnTypes is None:
+            table.columnTypes = [[] for _ in range(len(table.columns) + 1)]
+        column = _check_index(edit.column, len(table.columnTypes), "column")
+        if edit.types is None:
+            raise ValueError("Setting column types needs types.")
+        table.columnTypes[column] = edit.types
+    else:
+        raise ValueError(f"Unknown edit {edit.op}.")
+
+
+def patch_tables_for_image(image_path: Text, version: int,
+                           edits: List[TableEdit]) -> int:
+    """Applies edits to the stored tables of an image, returning the new version.
+
+    The edits are applied only if the document is still at the given version,
+    otherwise VersionConflict is raised. Either all edits are applied or none.
+    """
+    tables_file = table_annotator.io.tables_file_for_image(image_path)
+    with table_annotator.io.lock_for_update(tables_file):
+        current_version = table_annotator.io.read_tables_version(image_path)
+        if version != current_version:
+            raise VersionConflict(current_version)
+        tables = table_annotator.io.read_tables_for_image(image_path)
+        for edit in edits:
+            apply_edit(tables, edit)
+        return table_annotator.io.write_tables_for_image(image_path, tables)
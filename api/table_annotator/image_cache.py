@@ -0,0 +1,83 @@
+"""Process-wide cache of decoded page images and the table images extracted from them.
+
+Entries are keyed by the image path and file version, table images additionally by
+the rotation and outline of the table, so edits to an image or to a table's geometry
+never return stale pixels. Cached arrays are shared between callers and therefore
+read-only; copy them before drawing on them.
+"""
+import os
+from typing import Text, Tuple, Dict, Union
+
+import numpy as np
+
+import table_annotator.cellgrid
+import table_annotator.img
+import table_annotator.io
+from table_annotator.cache import LRUCache
+from table_annotator.types import Table, CellGrid
+
+IMAGE_CACHE_MAX_BYTES = int(os.environ.get("IMAGE_CACHE_MAX_BYTES", 512 * 1024 ** 2))
+
+PAGE = "page"
+TABLE = "table"
+
+_cache: LRUCache[Tuple, np.ndarray] = LRUCache(IMAGE_CACHE_MAX_BYTES,
+                                               lambda image: image.nbytes)
+
+
+def configure(max_bytes: int) -> None:
+    """Replaces the cache with an empty one with the given memory budget."""
+    global _cache
+    _cache = LRUCache(max_bytes, lambda image: image.nbytes)
+
+
+def _read_only(image: np.ndarray) -> np.ndarray:
+    image.flags.writeable = False
+    return image
+
+
+def table_geometry(table: Table) -> Tuple[float, int, int, int, int]:
+    outline = table.outline
+    return (table.rotationDegrees, outline.topLeft.x, outline.topLeft.y,
+            outline.bottomRight.x, outline.bottomRight.y)
+
+
+def read_image(image_path: Text) -> np.ndarray:
+    """Reads an image from disc or from the cache."""
+    key = (PAGE, image_path, table_annotator.io.file_version(image_path))
+    return _cache.get_or_create(
+        key, lambda: _read_only(table_annotator.io.read_image(image_path)))
+
+
+def extract_table_image(image_path: Text, table: Table) -> np.ndarray:
+    """Extracts the image part relating to the given table or takes it from the cache."""
+    key = (TABLE, image_path, table_annotator.io.file_version(image_path),
+           table_geometry(table))
+
+    def create() -> np.ndarray:
+        image = read_image(image_path)
+        return _read_only(table_annotator.img.extract_table_image(image, table))
+
+    return _cache.get_or_create(key, create)
+
+
+def get_cell_image_grid(image_path: Text, table: Table,
+                        padding: int = 0) -> CellGrid[np.ndarray]:
+    """Extracts cells as separate images from the cached table image."""
+    return table_annotator.cellgrid.crop_cell_image_grid(
+        extract_table_image(image_path, table), table, padding)
+
+
+def invalidate(image_path: Text) -> int:
+    """Drops the page and all table images of an image, e.g. after rewriting it."""
+    return _cache.invalidate(lambda key: key[1] == image_path)
+
+
+def stats() -> Dict[Text, Union[int, float]]:
+    """Cache statistics including the share of lookups that were served from it."""
+    cache_stats: Dict[Text, Union[int, float]] = dict(_cache.stats())
+    lookups = cache_stats["hits"] + cache_stats["misses"]
+    cache_stats["hitRate"] = cache_stats["hits"] / lookups if lookups > 0 else 0.0
+    cache_stats["pages"] = sum(1 for key in _cache.keys() if key[0] == PAGE)
+    cache_stats["tables"] = cache_stats["entries"] - cache_stats["pages"]
+    return cache_stats
@@ -0,0 +1,158 @@
+import os
+import struct
+from typing import Text, Tuple, Optional, Dict, List, BinaryIO
+
+import table_annotator.io
+import table_annotator.img
+from table_annotator.types import ImageMetadata
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+# start of frame markers carrying the image dimensions, excluding DHT, JPG and DAC
+JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7,
+                    0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+JPEG_STANDALONE_MARKERS = {0x01, 0xD8} | set(range(0xD0, 0xD8))
+JPEG_START_OF_SCAN = 0xDA
+EXIF_ORIENTATION_TAG = 0x0112
+# orientations that rotate the image by 90 degrees and thus swap width and height
+EXIF_TRANSPOSING_ORIENTATIONS = {5, 6, 7, 8}
+
+
+def manifest_path(workdir: Text) -> Text:
+    """Path of the image manifest of a workdir, stored next to the workdir."""
+    workdir = os.path.normpath(workdir)
+    parent, name = os.path.split(workdir)
+    return os.path.join(parent, f".{name}.image_manifest.json")
+
+
+def _exif_orientation(exif: bytes) -> Optional[int]:
+    """Reads the orientation tag from the TIFF structure of an APP1 exif segment."""
+    if not exif.startswith(b"Exif\x00\x00"):
+        return None
+    tiff = exif[6:]
+    if tiff[:2] == b"II":
+        endian = "<"
+    elif tiff[:2] == b"MM":
+        endian = ">"
+    else:
+        return None
+    try:
+        (ifd_offset,) = struct.unpack(f"{endian}I", tiff[4:8])
+        (num_entries,) = struct.unpack(f"{endian}H", tiff[ifd_offset:ifd_offset + 2])
+        for i in range(num_entries):
+            entry_start = ifd_offset + 2 + i * 12
+            tag, _, _, value = struct.unpack(f"{endian}HHIH",
+                                             tiff[entry_start:entry_start + 10])
+            if tag == EXIF_ORIENTATION_TAG:
+                return value
+    except struct.error:
+        return None
+    return None
+
+
+def _read_jpeg_dimensions(f: BinaryIO) -> Optional[Tuple[int, int]]:
+    """Walks the jpeg segments up to the frame header without decoding pixels."""
+    orientation = None
+    while True:
+        byte = f.read(1)
+        if byte != b"\xff":
+            return None
+        marker = f.read(1)
+        # markers may be preceded by any number of fill bytes
+        while marker == b"\xff":
+            marker = f.read(1)
+        if not marker:
+            return None
+        marker = marker[0]
+        if marker in JPEG_STANDALONE_MARKERS:
+            continue
+        if marker == JPEG_START_OF_SCAN:
+            return None
+        length_bytes = f.read(2)
+        if len(length_bytes) != 2:
+            return None
+        (length,) = struct.unpack(">H", length_bytes)
+        if marker in JPEG_SOF_MARKERS:
+            frame_header = f.read(5)
+            if len(frame_header) != 5:
+                return None
+            _, height, width = struct.unpack(">BHH", frame_header)
+            if orientation in EXIF_TRANSPOSING_ORIENTATIONS:
+                width, height = height, width
+            return width, height
+        elif marker == 0xE1 and orientation is None:
+            orientation = _exif_orientation(f.read(length - 2))
+        else:
+            f.seek(length - 2, os.SEEK_CUR)
+
+
+def read_image_dimensions(image_path: Text) -> Tuple[int, int]:
+    """Returns width and height of an image reading only its header if possible.
+
+    The dimensions match those of the decoded image, i.e. exif rotations are taken
+    into account. Falls back to decoding the image for unknown formats.
+    """
+    with open(image_path, "rb") as f:
+        head = f.read(len(PNG_SIGNATURE))
+        dimensions = None
+        if head[:2] == b"\xff\xd8":
+            f.seek(2)
+            dimensions = _read_jpeg_dimensions(f)
+        elif head == PNG_SIGNATURE:
+            ihdr = f.read(16)
+            if len(ihdr) == 16 and ihdr[4:8] == b"IHDR":
+                dimensions = struct.unpack(">II", ihdr[8:16])
+    if dimensions is not None:
+        return dimensions
+    image = table_annotator.io.read_image(image_path)
+    return table_annotator.img.get_dimensions(image)
+
+
+def _read_manifest(path: Text) -> Dict[Text, ImageMetadata]:
+    if not os.path.isfile(path):
+        return {}
+    try:
+        return {name: ImageMetadata(**metadata)
+                for name, metadata in table_annotator.io.read_json(path).items()}
+    except (ValueError, TypeError, AttributeError):
+        # broken or outdated manifests are simply rebuilt
+        return {}
+
+
+def get_images_metadata(workdir: Text,
+                        image_names: List[Text]) -> Dict[Text, ImageMetadata]:
+    """Returns the metadata of the given images in the workdir.
+
+    Metadata is persisted in a manifest and only probed again for images whose file
+    size or modification time changed.
+    """
+    path = manifest_path(workdir)
+    manifest = _read_manifest(path)
+    result = {}
+    changed = False
+    for image_name in image_names:
+        image_path = os.path.join(workdir, image_name)
+        stat = os.stat(image_path)
+        metadata = manifest.get(image_name)
+        if metadata is None or metadata.fileSize != stat.st_size \
+                or metadata.fileMtime != stat.st_mtime_ns:
+            width, height = read_image_dimensions(image_path)
+            metadata = ImageMetadata(width=width, height=height,
+                                     fileSize=stat.st_size,
+                                     fileMtime=stat.st_mtime_ns)
+            changed = True
+        result[image_name] = metadata
+
+    removed = [name for name in manifest.keys() - result.keys()
+               if not os.path.isfile(os.path.join(workdir, name))]
+    if changed or len(removed) > 0:
+        with table_annotator.io.lock_for_update(path):
+            # merge with what other writers stored in the meantime
+            updated_manifest = _read_manifest(path)
+            updated_manifest.update(result)
+            updated_manifest = {name: metadata
+                                for name, metadata in updated_manifest.items()
+                                if os.path.isfile(os.path.join(workdir, name))}
+            table_annotator.io.write_json(
+                path, {name: metadata.dict()
+                       for name, metadata in sorted(updated_manifest.items())})
+    return result
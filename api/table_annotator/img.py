@@ -1,6 +1,6 @@
+import itertools
 from typing import Tuple
 import numpy as np
-from scipy import ndimage
 
 from table_annotator.types import Rectangle, Point, Table
 
@@ -22,11 +22,41 @@ def crop(image: np.ndarray, rect: Rectangle, padding: int = 0) -> np.ndarray:
 
 def rotate(image: np.ndarray, degrees: float) -> np.ndarray:
     """Rotates an image by given degrees."""
+    from scipy import ndimage
     return ndimage.rotate(image, degrees, reshape=False, order=0)
 
 
+def rotate_and_crop(image: np.ndarray, degrees: float, rect: Rectangle) -> np.ndarray:
+    """Same as crop(rotate(image, degrees), rect), but only computes pixels in rect.
+
+    Replicates the affine transform of ndimage.rotate with the output shifted to the
+    top left corner of the cropped region, so the result is pixel-identical.
+    """
+    if degrees == 0:
+        return crop(image, rect).copy()
+    from scipy import ndimage, special
+    top, left = max(rect.topLeft.y, 0), max(rect.topLeft.x, 0)
+    bottom = min(rect.bottomRight.y, image.shape[0])
+    right = min(rect.bottomRight.x, image.shape[1])
+    output_shape = (max(bottom - top, 0), max(right - left, 0))
+
+    c, s = special.cosdg(degrees), special.sindg(degrees)
+    rotation = np.array([[c, s], [-s, c]])
+    center = (np.asarray(image.shape[:2]) - 1) / 2
+    offset = center - rotation @ center + rotation @ np.array([top, left])
+
+    output = np.zeros(output_shape + image.shape[2:], dtype=image.dtype)
+    if output.size == 0:
+        return output
+    for channel in itertools.product(*[range(n) for n in image.shape[2:]]):
+        index = (Ellipsis,) + channel
+        ndimage.affine_transform(image[index], rotation, offset, output_shape,
+                                 output[index], order=0)
+    return output
+
+
 def extract_table_image(image: np.ndarray, table: Table) -> np.ndarray:
     """Extracts the image part relating to the given table."""
-    image_rotated_for_table = rotate(image, - table.rotationDegrees)
     offset = Point(x=BORDER_OFFSET, y=BORDER_OFFSET)
-    return crop(image_rotated_for_table, table.outline.translate(offset))
+    return rotate_and_crop(image, - table.rotationDegrees,
+                           table.outline.translate(offset))
@@ -1,50 +1,145 @@
 import functools
 from collections import defaultdict
-from typing import Text, Any, List, Dict, Optional
-import json
+from typing import Text, Any, List, Dict, Optional, Tuple, Type, TypeVar, \
+    FrozenSet
 import csv
 import os
+import uuid
 from filelock import FileLock
 
-import cv2
 import numpy as np
-from table_annotator.types import Table, DocumentState, DOCUMENT_STATE_TODO
-import table_annotator.cellgrid
+from pydantic import BaseModel
+from table_annotator.types import Table, DocumentState, DOCUMENT_STATE_TODO, Point, \
+    Rectangle, Cell, VirtualValue, DataMatch
+import table_annotator.dir_listing
+import table_annotator.metrics
+import table_annotator.serialization
+import table_annotator.state_index
 
+STATE_FILE_SUFFIX = ".state.json"
+TABLES_VERSION_FILE_SUFFIX = ".version.json"
+ALLOWED_IMAGE_EXTENSIONS = {".jpeg", ".jpg"}
 
+
+def lock_for_update(file_path: Text) -> FileLock:
+    """Lock to hold while reading, modifying and writing back a file.
+
+    Single reads and writes need no lock since writes replace files atomically.
+    """
+    return FileLock(f"{file_path}.lock")
+
+
+def write_atomically(file_path: Text, data: bytes) -> None:
+    """Writes data to a temporary file and renames it to file_path.
+
+    Readers see either the previous or the new content, never a partial file.
+    """
+    directory, file_name = os.path.split(file_path)
+    temp_path = os.path.join(directory, f".{file_name}.{uuid.uuid4().hex}.tmp")
+    try:
+        fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+        with os.fdopen(fd, "wb") as out:
+            out.write(data)
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(temp_path, file_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+@table_annotator.metrics.IO_DURATION.time(operation="read_json")
 def read_json(file_path: Text) -> Any:
-    with FileLock(f"{file_path}.lock"):
-        with open(file_path, encoding="utf-8", mode="r") as f:
-            return json.load(f)
+    with open(file_path, mode="rb") as f:
+        return table_annotator.serialization.loads(f.read())
 
 
+@table_annotator.metrics.IO_DURATION.time(operation="write_json")
 def write_json(file_path: Text, obj: Any) -> None:
-    with FileLock(f"{file_path}.lock"):
-        with open(file_path, "w", encoding="utf-8") as out:
-            json.dump(obj, out, ensure_ascii=False, indent=4)
+    write_atomically(file_path, table_annotator.serialization.dumps_for_file(obj))
+
 
+def read_tables(file_path: Text, validate: bool = False) -> List[Table]:
+    """Reads tables from disc.
 
-def read_tables(file_path: Text) -> List[Table]:
-    """Reads tables from disc."""
+    Table files are only written from validated tables, so by default they are
+    loaded without validating them again. Files that lack required fields are
+    still validated to fail early.
+    """
     tables_serialized = read_json(file_path)
-    return [Table(**t) for t in tables_serialized]
+    if validate:
+        return [Table(**t) for t in tables_serialized]
+    return [construct_table(t) for t in tables_serialized]
+
 
+def tables_file_for_image(image_path: Text) -> Text:
+    return os.path.splitext(image_path)[0] + ".json"
 
-def read_tables_for_image(image_path: Text) -> List[Table]:
-    json_file_path = os.path.splitext(image_path)[0] + ".json"
+
+def read_tables_for_image(image_path: Text, validate: bool = False) -> List[Table]:
+    json_file_path = tables_file_for_image(image_path)
     if not os.path.isfile(json_file_path):
         return []
     else:
-        return read_tables(json_file_path)
+        return read_tables(json_file_path, validate)
+
 
+def write_tables_for_image(image_path: Text, tables: List[Table]) -> int:
+    """Writes the tables of an image and returns the new version of the document.
 
-def write_tables_for_image(image_path: Text, tables: List[Table]) -> None:
-    json_file_path = os.path.splitext(image_path)[0] + ".json"
+    Concurrent writers should hold lock_for_update on the tables file, otherwise
+    they might assign the same version twice.
+    """
+    json_file_path = tables_file_for_image(image_path)
     write_json(json_file_path, [table_as_json(t) for t in tables])
+    # written after the tables, so that readers that read the version before the
+    # tables never pair a version with older tables
+    version = read_tables_version(image_path) + 1
+    write_json(tables_version_file_for_image(image_path), {
+        "version": version,
+        "tablesFileVersion": list(file_version(json_file_path)),
+        "fingerprints": [t.fingerprint() for t in tables]
+    })
+    return version
+
+
+def tables_version_file_for_image(image_path: Text) -> Text:
+    return os.path.splitext(image_path)[0] + TABLES_VERSION_FILE_SUFFIX
+
+
+def read_tables_version(image_path: Text) -> int:
+    """Number of times the tables of an image have been written, 0 if never."""
+    version_file_path = tables_version_file_for_image(image_path)
+    if not os.path.isfile(version_file_path):
+        return 0
+    return read_json(version_file_path)["version"]
+
+
+def read_table_fingerprints(image_path: Text) -> List[Text]:
+    """Fingerprints of the tables of an image, in the order of the tables.
+
+    They are taken from the version file if it describes the current tables file
+    and computed from the tables otherwise.
+    """
+    version_file_path = tables_version_file_for_image(image_path)
+    try:
+        tables_file_version = list(file_version(tables_file_for_image(image_path)))
+    except FileNotFoundError:
+        return []
+    if os.path.isfile(version_file_path):
+        version_info = read_json(version_file_path)
+        if version_info.get("tablesFileVersion") == tables_file_version:
+            return version_info["fingerprints"]
+    return [t.fingerprint() for t in read_tables_for_image(image_path)]
+
+
+def state_file_for_image(image_path: Text) -> Text:
+    return os.path.splitext(image_path)[0] + STATE_FILE_SUFFIX
 
 
 def read_state_for_image(image_path: Text) -> DocumentState:
-    state_file_path = os.path.splitext(image_path)[0] + ".state.json"
+    state_file_path = state_file_for_image(image_path)
     if not os.path.isfile(state_file_path):
         return DocumentState(state=DOCUMENT_STATE_TODO)
     else:
@@ -53,55 +148,128 @@ def read_state_for_image(image_path: Text) -> DocumentState:
 
 
 def write_state_for_image(image_path: Text, state: Text) -> None:
-    state_file_path = os.path.splitext(image_path)[0] + ".state.json"
-    write_json(state_file_path, {"state": state})
+    state_file_path = state_file_for_image(image_path)
+    document_state = DocumentState(state=state)
+    # replacing the state file changes the mtime of the workdir, the index writes it
+    # under its lock to tell that apart from other changes
+    table_annotator.state_index.update_state_index(
+        image_path, document_state,
+        lambda: write_json(state_file_path, document_state.dict()))
 
 
+@table_annotator.metrics.IO_DURATION.time(operation="read_image")
 def read_image(image_path: Text) -> np.ndarray:
     """Reads an image from disc."""
-    with FileLock(f"{image_path}.lock"):
-        return cv2.imread(image_path)
+    import cv2
+    return cv2.imread(image_path)
 
 
+@table_annotator.metrics.IO_DURATION.time(operation="write_image")
 def write_image(file_path: Text, image: np.ndarray) -> None:
     """Writes image to disc."""
-    with FileLock(f"{file_path}.lock"):
-        cv2.imwrite(file_path, image)
+    import cv2
+    success, encoded = cv2.imencode(os.path.splitext(file_path)[1], image)
+    if not success:
+        raise cv2.error(f"Could not encode image for {file_path}.")
+    write_atomically(file_path, encoded.tobytes())
+
+
+def file_version(file_path: Text) -> Tuple[int, int]:
+    """Identifies the current content of a file by its modification time and size."""
+    stat = os.stat(file_path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def is_image_file(file_name: Text) -> bool:
+    return os.path.splitext(file_name)[1] in ALLOWED_IMAGE_EXTENSIONS
 
 
 def list_images(path: Text) -> List[Text]:
     """Lists all jpg files in a folder."""
-    files = os.listdir(path)
-    allowed_extensions = {".jpeg", ".jpg"}
-    return sorted([f for f in files if os.path.splitext(f)[1] in allowed_extensions])
+    return list(table_annotator.dir_listing.get_listing(path, is_image_file).images)
+
+
+def list_files(path: Text) -> FrozenSet[Text]:
+    """All file names in a folder."""
+    return table_annotator.dir_listing.get_listing(path, is_image_file).files
+
+
+def _neighbour_image(image_path: Text, step: int) -> Optional[Text]:
+    folder = os.path.dirname(image_path)
+    listing = table_annotator.dir_listing.get_listing(folder, is_image_file)
+    neighbour = listing.neighbour_image(os.path.basename(image_path), step)
+    return os.path.join(folder, neighbour) if neighbour is not None else None
 
 
 def get_previous_image(image_path: Text) -> Optional[Text]:
     """Finds the previous image in the folder if it exists."""
-    folder = os.path.dirname(image_path)
-    images = list_images(folder)
-    index_of_image = images.index(os.path.basename(image_path))
-    if index_of_image == -1 or index_of_image == 0:
-        return None
-    else:
-        return os.path.join(folder, images[index_of_image - 1])
+    return _neighbour_image(image_path, -1)
+
+
+def get_next_image(image_path: Text) -> Optional[Text]:
+    """Finds the next image in the folder if it exists."""
+    return _neighbour_image(image_path, 1)
 
 
 def table_as_json(table: Table) -> Dict[Text, Any]:
-    table_json = {
-        k: v for k, v in table.dict().items()
-        if v is not None
-    }
-    table_json["cells"] = table_annotator.cellgrid.apply_to_cells(
-        lambda c: {k: v for k, v in c.items() if v is not None}, table_json["cells"]
-    )
-    return table_json
+    """Turns a table into json, leaving out unset values of the table and its cells."""
+    fields = table.dict(exclude={"cells"})
+    cells = [[{k: v for k, v in cell.__dict__.items() if v is not None}
+              for cell in row]
+             for row in table.cells]
+    return {k: cells if k == "cells" else fields[k] for k in table.__fields__
+            if k == "cells" or fields[k] is not None}
+
+
+REQUIRED_TABLE_FIELDS = {name for name, field in Table.__fields__.items()
+                         if field.required}
+M = TypeVar('M', bound=BaseModel)
+
+
+def construct(model_class: Type[M], values: Dict[Text, Any]) -> M:
+    """Like model_class.construct, but faster for models whose defaults are None.
+
+    The values are used as is, nested models have to be constructed beforehand.
+    Unknown keys are dropped, as validation would.
+    """
+    fields = model_class.__fields__
+    values = {key: value for key, value in values.items() if key in fields}
+    model = model_class.__new__(model_class)
+    object.__setattr__(model, "__dict__", {**dict.fromkeys(fields), **values})
+    object.__setattr__(model, "__fields_set__", set(values))
+    return model
+
+
+def construct_point(point_json: Dict[Text, Any]) -> Point:
+    return construct(Point, point_json)
+
+
+def construct_table(table_json: Dict[Text, Any]) -> Table:
+    """Builds a table from trusted json, skipping validation of it and its parts."""
+    if not REQUIRED_TABLE_FIELDS.issubset(table_json.keys()):
+        return Table(**table_json)
+    values = dict(table_json)
+    outline = table_json["outline"]
+    values["outline"] = construct(Rectangle, {
+        "topLeft": construct_point(outline["topLeft"]),
+        "bottomRight": construct_point(outline["bottomRight"])})
+    values["rotationDegrees"] = float(table_json["rotationDegrees"])
+    values["cells"] = [[construct(Cell, cell) for cell in row]
+                       for row in table_json["cells"]]
+    if table_json.get("virtualValues") is not None:
+        values["virtualValues"] = [construct(VirtualValue, v)
+                                   for v in table_json["virtualValues"]]
+    if table_json.get("matches") is not None:
+        values["matches"] = [construct(DataMatch, m) if m is not None else None
+                             for m in table_json["matches"]]
+    return construct(Table, values)
 
 
 def get_all_non_hidden_dirs(path: str, return_base_names: bool = False) -> list[str]:
     dirs = [os.path.join(path, project_name)
                      for project_name in os.listdir(path)]
-    dirs = [d for d in dirs if os.path.isdir(d) and not d.startswith('.')]
+    dirs = [d for d in dirs
+            if os.path.isdir(d) and not os.path.basename(d).startswith('.')]
     if return_base_names:
         return [os.path.basename(d) for d in dirs]
     else:
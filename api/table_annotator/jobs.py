@@ -0,0 +1,89 @@
+import threading
+import traceback
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Text, Callable, Optional, List
+
+from table_annotator.types import Job, JOB_STATUS_QUEUED, JOB_STATUS_RUNNING, \
+    JOB_STATUS_DONE, JOB_STATUS_FAILED
+
+
+class JobProgress:
+    """Handed to running jobs for reporting how many of their items are processed."""
+
+    def __init__(self, manager: "JobManager", job_id: Text) -> None:
+        self.manager = manager
+        self.job_id = job_id
+
+    def set_total(self, total: int) -> None:
+        self.manager._update(self.job_id, total=total)
+
+    def item_done(self) -> None:
+        with self.manager._lock:
+            self.manager._jobs[self.job_id].done += 1
+
+    def item_failed(self, error: Text) -> None:
+        with self.manager._lock:
+            job = self.manager._jobs[self.job_id]
+            job.failed += 1
+            job.error = error
+
+
+class JobManager:
+    """Runs long jobs in a bounded pool of background threads.
+
+    Only the most recent finished jobs are remembered.
+    """
+
+    def __init__(self, max_workers: int, max_finished_jobs: int = 1000) -> None:
+        self.max_finished_jobs = max_finished_jobs
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix="job")
+        self._lock = threading.Lock()
+        self._jobs: OrderedDict[Text, Job] = OrderedDict()
+
+    def _update(self, job_id: Text, **fields) -> None:
+        with self._lock:
+            job = self._jobs[job_id]
+            for name, value in fields.items():
+                setattr(job, name, value)
+
+    def _forget_old_jobs(self) -> None:
+        finished = [job_id for job_id, job in self._jobs.items()
+                    if job.status in {JOB_STATUS_DONE, JOB_STATUS_FAILED}]
+        for job_id in finished[:max(len(finished) - self.max_finished_jobs, 0)]:
+            del self._jobs[job_id]
+
+    def _run(self, job_id: Text, work: Callable[[JobProgress], None]) -> None:
+        self._update(job_id, status=JOB_STATUS_RUNNING)
+        try:
+            work(JobProgress(self, job_id))
+            self._update(job_id, status=JOB_STATUS_DONE)
+        except Exception:
+            self._update(job_id, status=JOB_STATUS_FAILED,
+                         error=traceback.format_exc())
+        with self._lock:
+            self._forget_old_jobs()
+
+    def submit(self, description: Text, work: Callable[[JobProgress], None]) -> Job:
+        """Queues the work and returns the job tracking it."""
+        job = Job(id=uuid.uuid4().hex, description=description,
+                  status=JOB_STATUS_QUEUED, total=None, done=0, failed=0, error=None)
+        with self._lock:
+            self._jobs[job.id] = job
+            job = job.copy()
+        self._executor.submit(self._run, job.id, work)
+        return job
+
+    def get(self, job_id: Text) -> Optional[Job]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job.copy() if job is not None else None
+
+    def list(self) -> List[Job]:
+        with self._lock:
+            return [job.copy() for job in self._jobs.values()]
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
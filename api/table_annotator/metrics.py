@@ -0,0 +1,223 @@
+"""Counters and histograms of this process, rendered in the Prometheus text format.
+
+Every process keeps its own metrics, so with several workers each of them has to
+be scraped, or the collector sees a different worker on every scrape.
+"""
+import functools
+import math
+import threading
+import time
+from typing import Text, Tuple, Dict, List, Callable, Sequence, TypeVar, Any
+
+F = TypeVar('F', bound=Callable[..., Any])
+
+DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                    10.0, 30.0, 60.0, 120.0)
+SIZE_BUCKETS = tuple(1024 * 4 ** i for i in range(11))
+
+
+def _escape(value: Text) -> Text:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[Text], values: Sequence[Text]) -> Text:
+    if len(names) == 0:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(str(value))}"'
+                     for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> Text:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    """A value that only goes up, e.g. the number of requests."""
+
+    type = "counter"
+
+    def __init__(self, name: Text, documentation: Text,
+                 label_names: Sequence[Text] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[Text, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels: Text) -> None:
+        key = tuple(str(labels[name]) for name in self.label_names)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: Text) -> float:
+        key = tuple(str(labels[name]) for name in self.label_names)
+        with self._lock:
+            return self._values.get(key, 0)
+
+    def samples(self) -> List[Text]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.label_names, key)} "
+                f"{_format_value(value)}" for key, value in values]
+
+
+class Histogram:
+    """Counts observations, e.g. durations, in buckets of increasing size."""
+
+    type = "histogram"
+
+    def __init__(self, name: Text, documentation: Text,
+                 label_names: Sequence[Text] = (),
+                 buckets: Sequence[float] = DURATION_BUCKETS) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._lock = threading.Lock()
+        # bucket counts, sum and count per label values
+        self._values: Dict[Tuple[Text, ...], Tuple[List[int], float, int]] = {}
+
+    def observe(self, value: float, **labels: Text) -> None:
+        key = tuple(str(labels[name]) for name in self.label_names)
+        with self._lock:
+            counts, total, count = self._values.get(
+                key, ([0] * len(self.buckets), 0.0, 0))
+            for i, upper_bound in enumerate(self.buckets):
+                if value <= upper_bound:
+                    counts[i] += 1
+                    break
+            self._values[key] = (counts, total + value, count + 1)
+
+    def count(self, **labels: Text) -> int:
+        key = tuple(str(labels[name]) for name in self.label_names)
+        with self._lock:
+            return self._values.get(key, ([], 0.0, 0))[2]
+
+    def samples(self) -> List[Text]:
+        with self._lock:
+            values = sorted((key, (list(counts), total, count))
+                            for key, (counts, total, count) in self._values.items())
+        lines = []
+        bucket_label_names = self.label_names + ("le",)
+        for key, (counts, total, count) in values:
+            cumulative = 0
+            for upper_bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(bucket_label_names,
+                                        key + (_format_value(upper_bound),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+    def time(self, **labels: Text) -> Callable[[F], F]:
+        """Decorator that observes the duration of every call in seconds."""
+        def decorator(f: F) -> F:
+            @functools.wraps(f)
+            def timed(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return f(*args, **kwargs)
+                finally:
+                    self.observe(time.perf_counter() - start, **labels)
+            return timed  # type: ignore
+        return decorator
+
+
+class Collected:
+    """Values that are read from elsewhere whenever the metrics are rendered."""
+
+    def __init__(self, name: Text, documentation: Text, type: Text,
+                 label_names: Sequence[Text],
+                 collect: Callable[[], Dict[Tuple[Text, ...], float]]) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.type = type
+        self.label_names = tuple(label_names)
+        self.collect = collect
+
+    def samples(self) -> List[Text]:
+        return [f"{self.name}{_format_labels(self.label_names, key)} "
+                f"{_format_value(value)}"
+                for key, value in sorted(self.collect().items())]
+
+
+_registry: Dict[Text, Any] = {}
+_registry_lock = threading.Lock()
+
+
+def register(metric: Any) -> Any:
+    """Adds a metric to those rendered, replacing a previous one of the same name."""
+    with _registry_lock:
+        _registry[metric.name] = metric
+    return metric
+
+
+def render() -> Text:
+    """All registered metrics in the Prometheus text exposition format."""
+    with _registry_lock:
+        metrics = sorted(_registry.values(), key=lambda m: m.name)
+    lines = []
+    for metric in metrics:
+        lines.append(f"# HELP {metric.name} {_escape(metric.documentation)}")
+        lines.append(f"# TYPE {metric.name} {metric.type}")
+        lines.extend(metric.samples())
+    return "\n".join(lines) + "\n"
+
+
+CACHE_STATS_METRICS = [("hits", "counter", "Lookups served from the cache."),
+                       ("misses", "counter", "Lookups not served from the cache."),
+                       ("evictions", "counter", "Entries removed to stay in budget."),
+                       ("coalesced", "counter",
+                        "Lookups that waited for a value being created."),
+                       ("entries", "gauge", "Entries in the cache."),
+                       ("bytes", "gauge", "Approximate size of the cached values."),
+                       ("maxBytes", "gauge", "Memory budget of the cache.")]
+_caches: Dict[Text, Callable[[], Dict[Text, Any]]] = {}
+
+
+def register_cache(name: Text, stats: Callable[[], Dict[Text, Any]]) -> None:
+    """Exposes the statistics of a cache, as returned by LRUCache.stats."""
+    with _registry_lock:
+        _caches[name] = stats
+
+    def collect(stat: Text) -> Dict[Tuple[Text, ...], float]:
+        with _registry_lock:
+            caches = list(_caches.items())
+        return {(cache_name,): cache_stats()[stat] for cache_name, cache_stats in caches}
+
+    for stat, metric_type, documentation in CACHE_STATS_METRICS:
+        metric_name = "".join(f"_{c.lower()}" if c.isupper() else c for c in stat)
+        suffix = "_total" if metric_type == "counter" else ""
+        register(Collected(f"table_annotator_cache_{metric_name}{suffix}",
+                           documentation, metric_type, ["cache"],
+                           functools.partial(collect, stat)))
+
+
+IO_DURATION = register(Histogram(
+    "table_annotator_io_duration_seconds",
+    "Duration of reading and writing files.", ["operation"]))
+UPSTREAM_DURATION = register(Histogram(
+    "table_annotator_upstream_request_duration_seconds",
+    "Round trip time of requests to the ocr and segmenting services.", ["service"]))
+UPSTREAM_REQUEST_SIZE = register(Histogram(
+    "table_annotator_upstream_request_bytes",
+    "Size of request bodies sent to the ocr and segmenting services.", ["service"],
+    SIZE_BUCKETS))
+UPSTREAM_RESPONSE_SIZE = register(Histogram(
+    "table_annotator_upstream_response_bytes",
+    "Size of response bodies received from the ocr and segmenting services.",
+    ["service"], SIZE_BUCKETS))
+UPSTREAM_ERRORS = register(Counter(
+    "table_annotator_upstream_errors_total",
+    "Requests to the ocr and segmenting services that failed.", ["service"]))
+REQUEST_DURATION = register(Histogram(
+    "table_annotator_request_duration_seconds",
+    "Time to handle a request to the api, by route.", ["endpoint", "method"]))
+REQUESTS = register(Counter(
+    "table_annotator_requests_total",
+    "Requests to the api, by route and status.", ["endpoint", "method", "status"]))
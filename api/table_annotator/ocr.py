@@ -1,15 +1,35 @@
-from typing import Text, List
-import cv2
-import requests
+from typing import Text, List, Optional, Tuple
+import os
 import numpy as np
 import table_annotator.img
 import table_annotator.cellgrid
 import table_annotator.io
+import table_annotator.image_cache
+import table_annotator.column_types
+import table_annotator.services
+import table_annotator.transport
 
 from table_annotator.types import Table, CellGrid, Cell
 
+# "json" keeps compatibility with ocr servers that do not understand binary requests
+OCR_IMAGE_TRANSPORT = os.environ.get("OCR_IMAGE_TRANSPORT", "binary")
 
-def table_ocr(image: np.ndarray, table: Table,
+
+def request_ocr(images: List[np.ndarray],
+                transport: Text = OCR_IMAGE_TRANSPORT) -> List[Text]:
+    """Sends grayscale images to the ocr server and returns the predicted texts."""
+    client = table_annotator.services.get_client(table_annotator.services.OCR_SERVICE)
+    if transport == "json":
+        r = client.post('/ocr', json={"images": [image.tolist() for image in images]})
+    else:
+        r = client.post(
+            '/ocr',
+            data=table_annotator.transport.encode_images(images),
+            headers={"Content-Type": table_annotator.transport.IMAGES_MIMETYPE})
+    return r.json()["predictions"]
+
+
+def table_ocr(image_path: Text, table: Table,
               overwrite: bool = False) -> CellGrid[Cell]:
 
     cell_list, _ = table_annotator.cellgrid.cell_grid_to_list(table.cells)
@@ -20,7 +40,8 @@ def table_ocr(image: np.ndarray, table: Table,
     if len(needs_ocr) == 0:
         return table.cells
 
-    cell_image_grid = table_annotator.cellgrid.get_cell_image_grid(image, table)
+    import cv2
+    cell_image_grid = table_annotator.image_cache.get_cell_image_grid(image_path, table)
 
     cell_images_list, mapping = \
         table_annotator.cellgrid.cell_grid_to_list(cell_image_grid)
@@ -28,12 +49,7 @@ def table_ocr(image: np.ndarray, table: Table,
     cell_images_list = [cv2.cvtColor(cell_image, cv2.COLOR_BGR2GRAY)
                         for cell_image in cell_images_list]
     cell_images_list_todo = [cell_images_list[i] for i in needs_ocr]
-    images_serialized = [image.tolist()
-                         for image in cell_images_list_todo]
-    r = requests.post('http://localhost:5001/ocr',
-                      json={"images": images_serialized})
-
-    predictions: List[Text] = r.json()["predictions"]
+    predictions = request_ocr(cell_images_list_todo)
 
     reversed_mapping = {v: k for k, v in mapping.items()}
 
@@ -44,3 +60,66 @@ def table_ocr(image: np.ndarray, table: Table,
         cells_copy[i][j].ocr_text = prediction
 
     return cells_copy
+
+
+def table_needs_ocr(table: Table) -> bool:
+    return any(cell.ocr_text is None for row in table.cells for cell in row)
+
+
+def table_has_ocr(table: Table) -> bool:
+    return any(cell.ocr_text is not None for row in table.cells for cell in row)
+
+
+def same_structure(table: Table, other: Table) -> bool:
+    """Whether both tables have the same position, rows, columns and cell borders."""
+    return table.fingerprint() == other.fingerprint()
+
+
+def ocr_tables_for_image(image_path: Text, table_ids: Optional[List[int]] = None,
+                         overwrite: bool = False) -> Tuple[int, int]:
+    """Runs ocr on the tables of an image and stores the predictions.
+
+    Like predict_table_contents, column types are guessed for tables that had no
+    ocr before. Predictions are only applied to tables whose structure did not
+    change while the ocr was running. Returns the number of updated tables and the
+    number of tables skipped because their structure changed.
+    """
+    tables = table_annotator.io.read_tables_for_image(image_path)
+    if table_ids is None:
+        table_ids = list(range(len(tables)))
+    todo = [i for i in table_ids
+            if 0 <= i < len(tables) and (overwrite or table_needs_ocr(tables[i]))]
+    if len(todo) == 0:
+        return 0, 0
+
+    predictions = {}
+    for table_id in todo:
+        table = tables[table_id]
+        if table_has_ocr(table):
+            column_types = table.columnTypes
+        else:
+            column_types = table_annotator.column_types.guess_column_types(
+                image_path, tables, table_id)
+        predictions[table_id] = (table_ocr(image_path, table, overwrite), column_types)
+
+    tables_file = table_annotator.io.tables_file_for_image(image_path)
+    with table_annotator.io.lock_for_update(tables_file):
+        # the document might have been edited in the meantime
+        current_tables = table_annotator.io.read_tables_for_image(image_path)
+        updated = 0
+        for table_id, (cells, column_types) in predictions.items():
+            original = tables[table_id]
+            if table_id >= len(current_tables) \
+                    or not same_structure(original, current_tables[table_id]):
+                continue
+            current = current_tables[table_id]
+            for i, row in enumerate(cells):
+                for j, cell in enumerate(row):
+                    if cell.ocr_text != original.cells[i][j].ocr_text:
+                        current.cells[i][j].ocr_text = cell.ocr_text
+            if current.columnTypes == original.columnTypes:
+                current.columnTypes = column_types
+            updated += 1
+        if updated > 0:
+            table_annotator.io.write_tables_for_image(image_path, current_tables)
+    return updated, len(predictions) - updated
@@ -0,0 +1,55 @@
+"""Opt-in profiling of single api requests with cProfile.
+
+A request is profiled when it carries the PROFILE_HEADER or is picked at the
+configured sampling rate. Its profile is written in the pstats format, which can
+be inspected with `python -m pstats` or turned into a flame graph with tools like
+snakeviz or flameprof.
+"""
+import cProfile
+import os
+import random
+import re
+import time
+from typing import Text, Optional
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_FILE_HEADER = "X-Profile-File"
+PROFILE_SUFFIX = ".prof"
+
+
+def should_profile(header_value: Optional[Text], sample_rate: float) -> bool:
+    """Whether a request is profiled, by its PROFILE_HEADER or by chance."""
+    if header_value is not None and header_value.strip().lower() not in {"", "0",
+                                                                         "false"}:
+        return True
+    return sample_rate > 0 and random.random() < sample_rate
+
+
+def start() -> Optional[cProfile.Profile]:
+    """Starts profiling the current thread, returns None if another profiler runs."""
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        return None
+    return profiler
+
+
+def profile_file_name(endpoint: Text, document: Optional[Text]) -> Text:
+    """File name of a profile, tagged with the route and document it belongs to."""
+    parts = [time.strftime("%Y%m%d-%H%M%S"), f"{time.time_ns() % 10 ** 9:09d}",
+             endpoint]
+    if document is not None:
+        parts.append(document)
+    name = "-".join(re.sub(r"[^\w.]+", "_", part) for part in parts)
+    return f"{name}-{os.getpid()}{PROFILE_SUFFIX}"
+
+
+def stop_and_write(profiler: cProfile.Profile, profile_dir: Text, endpoint: Text,
+                   document: Optional[Text]) -> Text:
+    """Stops the profiler and writes its stats to profile_dir, returns the path."""
+    profiler.disable()
+    os.makedirs(profile_dir, exist_ok=True)
+    profile_path = os.path.join(profile_dir, profile_file_name(endpoint, document))
+    profiler.dump_stats(profile_path)
+    return profile_path
@@ -0,0 +1,121 @@
+"""Downscaled levels of document images, cut into tiles and cached on disc.
+
+Level 0 is the image in full resolution, every further level halves width and
+height until the image fits into a single tile. The tiles of a level are created
+when the level is first used and stored next to the workdir, in
+.<workdir>.pyramids/<document>/<version>, where the version changes whenever the
+image is rewritten. Tiles can always be created again, so they are written without
+the atomic writes and fsyncs of annotation files.
+"""
+import os
+import shutil
+from typing import Text, List, Tuple, Dict, Any, Optional
+
+import table_annotator.image_cache
+import table_annotator.image_metadata
+import table_annotator.io
+
+PYRAMID_TILE_SIZE = int(os.environ.get("PYRAMID_TILE_SIZE", 512))
+METADATA_FILE = "pyramid.json"
+# written into a level folder once all its tiles are
+LEVEL_COMPLETE_FILE = "complete"
+
+
+def pyramid_dir(image_path: Text) -> Text:
+    """Folder holding all versions of the pyramid of an image."""
+    workdir, image_name = os.path.split(os.path.normpath(image_path))
+    parent, workdir_name = os.path.split(workdir)
+    return os.path.join(parent, f".{workdir_name}.pyramids",
+                        os.path.splitext(image_name)[0])
+
+
+def level_sizes(width: int, height: int, tile_size: int) -> List[Tuple[int, int]]:
+    """Width and height of each level, starting with the full resolution."""
+    sizes = [(width, height)]
+    while max(sizes[-1]) > tile_size:
+        w, h = sizes[-1]
+        sizes.append(((w + 1) // 2, (h + 1) // 2))
+    return sizes
+
+
+def _describe(image_path: Text, tile_size: int) -> Dict[Text, Any]:
+    width, height = table_annotator.image_metadata.read_image_dimensions(image_path)
+    levels = []
+    for level, (level_width, level_height) in enumerate(
+            level_sizes(width, height, tile_size)):
+        levels.append({"level": level, "width": level_width, "height": level_height,
+                       "columns": -(-level_width // tile_size),
+                       "rows": -(-level_height // tile_size)})
+    return {"width": width, "height": height, "tileSize": tile_size, "levels": levels}
+
+
+def _create_level(image_path: Text, level_dir: Text, level: int,
+                  metadata: Dict[Text, Any]) -> None:
+    import cv2
+    tile_size = metadata["tileSize"]
+    level_image = table_annotator.image_cache.read_image(image_path)
+    # every level is downscaled from the one above, like a mipmap
+    for level_metadata in metadata["levels"][1:level + 1]:
+        level_image = cv2.resize(level_image,
+                                 (level_metadata["width"], level_metadata["height"]),
+                                 interpolation=cv2.INTER_AREA)
+    os.makedirs(level_dir, exist_ok=True)
+    level_metadata = metadata["levels"][level]
+    for row in range(level_metadata["rows"]):
+        for column in range(level_metadata["columns"]):
+            tile = level_image[row * tile_size:(row + 1) * tile_size,
+                               column * tile_size:(column + 1) * tile_size]
+            tile_path = os.path.join(level_dir, f"{column}_{row}.jpg")
+            if not cv2.imwrite(tile_path, tile):
+                raise cv2.error(f"Could not write tile {tile_path}.")
+    with open(os.path.join(level_dir, LEVEL_COMPLETE_FILE), "w"):
+        pass
+
+
+def get_pyramid(image_path: Text,
+                tile_size: int = PYRAMID_TILE_SIZE) -> Tuple[Text, Dict[Text, Any]]:
+    """Returns the folder and the description of the pyramid, creating it if needed.
+
+    Only the description is created here, tiles are created by get_tile.
+    """
+    image_pyramid_dir = pyramid_dir(image_path)
+    mtime, size = table_annotator.io.file_version(image_path)
+    version = f"{mtime}-{size}-{tile_size}"
+    version_dir = os.path.join(image_pyramid_dir, version)
+    metadata_path = os.path.join(version_dir, METADATA_FILE)
+    if os.path.isfile(metadata_path):
+        return version_dir, table_annotator.io.read_json(metadata_path)
+
+    os.makedirs(os.path.dirname(image_pyramid_dir), exist_ok=True)
+    with table_annotator.io.lock_for_update(image_pyramid_dir):
+        if os.path.isfile(metadata_path):
+            return version_dir, table_annotator.io.read_json(metadata_path)
+        metadata = _describe(image_path, tile_size)
+        os.makedirs(version_dir, exist_ok=True)
+        table_annotator.io.write_json(metadata_path, metadata)
+        for other_version in os.listdir(image_pyramid_dir):
+            if other_version != version:
+                shutil.rmtree(os.path.join(image_pyramid_dir, other_version),
+                              ignore_errors=True)
+    return version_dir, metadata
+
+
+def get_tile(image_path: Text, level: int, column: int, row: int,
+             tile_size: int = PYRAMID_TILE_SIZE) -> Optional[Text]:
+    """Path of a tile of the image's pyramid or None if it does not exist.
+
+    Creates all tiles of the tile's level if they do not exist yet.
+    """
+    version_dir, metadata = get_pyramid(image_path, tile_size)
+    if not 0 <= level < len(metadata["levels"]):
+        return None
+    level_metadata = metadata["levels"][level]
+    if not (0 <= column < level_metadata["columns"]
+            and 0 <= row < level_metadata["rows"]):
+        return None
+    level_dir = os.path.join(version_dir, str(level))
+    if not os.path.isfile(os.path.join(level_dir, LEVEL_COMPLETE_FILE)):
+        with table_annotator.io.lock_for_update(level_dir):
+            if not os.path.isfile(os.path.join(level_dir, LEVEL_COMPLETE_FILE)):
+                _create_level(image_path, level_dir, level, metadata)
+    return os.path.join(level_dir, f"{column}_{row}.jpg")
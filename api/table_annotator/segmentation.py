@@ -0,0 +1,45 @@
+import os
+from typing import List, Text
+
+import numpy as np
+
+import table_annotator.services
+import table_annotator.transport
+
+# "json" keeps compatibility with segmenting servers that do not understand binary
+SEGMENTATION_IMAGE_TRANSPORT = os.environ.get("SEGMENTATION_IMAGE_TRANSPORT", "binary")
+# factor by which table images are downscaled before being sent for segmentation
+SEGMENTATION_IMAGE_SCALE = float(os.environ.get("SEGMENTATION_IMAGE_SCALE", 1.0))
+
+
+def downscale(image: np.ndarray, scale: float) -> np.ndarray:
+    """Shrinks an image by the given factor, keeping at least one pixel per axis."""
+    import cv2
+    height = max(int(round(image.shape[0] * scale)), 1)
+    width = max(int(round(image.shape[1] * scale)), 1)
+    return cv2.resize(image, (width, height), interpolation=cv2.INTER_AREA)
+
+
+def predict_rows(table_image_bw: np.ndarray,
+                 scale: float = SEGMENTATION_IMAGE_SCALE,
+                 transport: Text = SEGMENTATION_IMAGE_TRANSPORT) -> List[int]:
+    """Predicts the row delimiters of a grayscale table image.
+
+    With a scale below 1 a smaller image is sent and the predicted rows are mapped
+    back to the coordinates of the original table image.
+    """
+    image = table_image_bw if scale >= 1.0 else downscale(table_image_bw, scale)
+    client = table_annotator.services.get_client(
+        table_annotator.services.SEGMENTING_SERVICE)
+    if transport == "json":
+        r = client.post('/segment', json={"table_image": image.tolist()})
+    else:
+        r = client.post(
+            '/segment',
+            data=table_annotator.transport.encode_images([image]),
+            headers={"Content-Type": table_annotator.transport.IMAGES_MIMETYPE})
+    rows = r.json()["rows"]
+    if image is table_image_bw:
+        return rows
+    y_scale = table_image_bw.shape[0] / image.shape[0]
+    return [min(int(round(row * y_scale)), table_image_bw.shape[0]) for row in rows]
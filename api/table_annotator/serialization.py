@@ -0,0 +1,99 @@
+"""JSON encoding for files on disc and api responses.
+
+The json module is used unless JSON_LIBRARY=orjson selects orjson, which is faster
+but an optional dependency. Both write the same format: files are indented by 4
+spaces unless JSON_COMPACT=1, api responses are always compact.
+"""
+import json
+import os
+import re
+from typing import Any, Callable, Dict, Optional, Text, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# orjson only indents by 2 spaces, so its indentation is doubled for files
+_INDENTATION = re.compile(rb"^( +)", re.MULTILINE)
+
+
+class JsonSerializer:
+    name = "json"
+
+    def dumps(self, obj: Any, indent: bool = False, sort_keys: bool = False,
+              default: Optional[Callable[[Any], Any]] = None) -> bytes:
+        if indent:
+            text = json.dumps(obj, ensure_ascii=False, indent=4, sort_keys=sort_keys,
+                              default=default)
+        else:
+            text = json.dumps(obj, ensure_ascii=False, separators=(",", ":"),
+                              sort_keys=sort_keys, default=default)
+        return text.encode("utf-8")
+
+    def loads(self, data: Union[bytes, Text]) -> Any:
+        return json.loads(data)
+
+
+class OrjsonSerializer:
+    name = "orjson"
+
+    def dumps(self, obj: Any, indent: bool = False, sort_keys: bool = False,
+              default: Optional[Callable[[Any], Any]] = None) -> bytes:
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        data = orjson.dumps(obj, default=default, option=option)
+        if indent:
+            data = _INDENTATION.sub(lambda match: match.group(1) * 2, data)
+        return data
+
+    def loads(self, data: Union[bytes, Text]) -> Any:
+        return orjson.loads(data)
+
+
+SERIALIZERS: Dict[Text, Union[JsonSerializer, OrjsonSerializer]] = \
+    {"json": JsonSerializer()}
+if orjson is not None:
+    SERIALIZERS["orjson"] = OrjsonSerializer()
+
+JSON_LIBRARY = os.environ.get("JSON_LIBRARY", "json")
+JSON_COMPACT = os.environ.get("JSON_COMPACT", "0") == "1"
+
+_serializer = SERIALIZERS["json"]
+_compact = JSON_COMPACT
+
+
+def configure(library: Optional[Text] = None, compact: Optional[bool] = None) -> None:
+    """Selects the json library and whether files are written without indentation."""
+    global _serializer, _compact
+    if library is not None:
+        if library not in SERIALIZERS:
+            raise ValueError(f"Json library {library} is not available.")
+        _serializer = SERIALIZERS[library]
+    if compact is not None:
+        _compact = compact
+
+
+configure(JSON_LIBRARY)
+
+
+def library() -> Text:
+    return _serializer.name
+
+
+def dumps(obj: Any, indent: bool = False, sort_keys: bool = False,
+          default: Optional[Callable[[Any], Any]] = None) -> bytes:
+    """Encodes obj as utf-8 json."""
+    return _serializer.dumps(obj, indent, sort_keys, default)
+
+
+def dumps_for_file(obj: Any) -> bytes:
+    """Encodes obj for writing to disc, indented unless configured to be compact."""
+    return _serializer.dumps(obj, indent=not _compact)
+
+
+def loads(data: Union[bytes, Text]) -> Any:
+    return _serializer.loads(data)
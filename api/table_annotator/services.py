@@ -0,0 +1,126 @@
+import itertools
+import os
+import threading
+import time
+from typing import Text, List, Dict, Optional, Any
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import table_annotator.metrics
+
+OCR_SERVICE = "ocr"
+SEGMENTING_SERVICE = "segmenting"
+
+BALANCING_ROUND_ROBIN = "round_robin"
+BALANCING_LEAST_OUTSTANDING = "least_outstanding"
+
+# defaults per service, each can be overridden through the environment, e.g. via
+# OCR_SERVER_URLS=http://ocr-1:5001,http://ocr-2:5001 or OCR_SERVER_TIMEOUT=300
+DEFAULT_URLS = {OCR_SERVICE: "http://localhost:5001",
+                SEGMENTING_SERVICE: "http://localhost:5002"}
+DEFAULT_TIMEOUTS = {OCR_SERVICE: 300.0, SEGMENTING_SERVICE: 120.0}
+CONNECT_TIMEOUT = 5.0
+POOL_SIZE = 16
+
+
+class ServiceClient:
+    """Sends requests to the replicas of a service over pooled keep-alive sessions.
+
+    Requests are spread across replicas either in turn or by sending each request
+    to the replica with the fewest requests in progress. Replicas that refuse the
+    connection are skipped in favor of the next one.
+    """
+
+    def __init__(self, name: Text, urls: List[Text], timeout: float,
+                 balancing: Text = BALANCING_LEAST_OUTSTANDING,
+                 pool_size: int = POOL_SIZE) -> None:
+        if len(urls) == 0:
+            raise ValueError(f"No urls configured for service {name}.")
+        if balancing not in {BALANCING_ROUND_ROBIN, BALANCING_LEAST_OUTSTANDING}:
+            raise ValueError(f"Unknown balancing strategy {balancing}.")
+        self.name = name
+        self.urls = [url.rstrip("/") for url in urls]
+        self.timeout = timeout
+        self.balancing = balancing
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=len(self.urls), pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._lock = threading.Lock()
+        self._turn = itertools.count()
+        self.outstanding = [0] * len(self.urls)
+
+    def _replica_order(self) -> List[int]:
+        """Replicas in the order in which they should be tried for a request."""
+        with self._lock:
+            start = next(self._turn) % len(self.urls)
+            order = [(start + i) % len(self.urls) for i in range(len(self.urls))]
+            if self.balancing == BALANCING_LEAST_OUTSTANDING:
+                order = sorted(order, key=lambda i: self.outstanding[i])
+            return order
+
+    def _observe(self, seconds: float, response: requests.Response) -> None:
+        metrics = table_annotator.metrics
+        metrics.UPSTREAM_DURATION.observe(seconds, service=self.name)
+        body = response.request.body if response.request is not None else None
+        metrics.UPSTREAM_REQUEST_SIZE.observe(len(body) if body else 0,
+                                              service=self.name)
+        metrics.UPSTREAM_RESPONSE_SIZE.observe(len(response.content),
+                                               service=self.name)
+
+    def post(self, path: Text, **kwargs: Any) -> requests.Response:
+        """Posts to the path on one of the replicas and returns the response."""
+        kwargs.setdefault("timeout", (CONNECT_TIMEOUT, self.timeout))
+        order = self._replica_order()
+        for attempt, replica in enumerate(order):
+            with self._lock:
+                self.outstanding[replica] += 1
+            start = time.perf_counter()
+            try:
+                response = self.session.post(f"{self.urls[replica]}{path}", **kwargs)
+                response.raise_for_status()
+                self._observe(time.perf_counter() - start, response)
+                return response
+            except requests.ConnectionError:
+                table_annotator.metrics.UPSTREAM_ERRORS.inc(service=self.name)
+                if attempt == len(order) - 1:
+                    raise
+            except requests.RequestException:
+                table_annotator.metrics.UPSTREAM_ERRORS.inc(service=self.name)
+                raise
+            finally:
+                with self._lock:
+                    self.outstanding[replica] -= 1
+
+
+_clients: Dict[Text, ServiceClient] = {}
+_clients_lock = threading.Lock()
+
+
+def configure(name: Text, urls: Optional[List[Text]] = None,
+              timeout: Optional[float] = None,
+              balancing: Optional[Text] = None) -> ServiceClient:
+    """Sets up the client for a service, falling back to environment and defaults."""
+    env_prefix = f"{name.upper()}_SERVER"
+    if urls is None:
+        urls = os.environ.get(f"{env_prefix}_URLS", DEFAULT_URLS[name]).split(",")
+    if timeout is None:
+        timeout = float(os.environ.get(f"{env_prefix}_TIMEOUT",
+                                       DEFAULT_TIMEOUTS[name]))
+    if balancing is None:
+        balancing = os.environ.get("SERVICE_BALANCING", BALANCING_LEAST_OUTSTANDING)
+    client = ServiceClient(name, [url.strip() for url in urls if url.strip()],
+                           timeout, balancing)
+    with _clients_lock:
+        _clients[name] = client
+    return client
+
+
+def get_client(name: Text) -> ServiceClient:
+    """Returns the client of a service, configuring it on first use."""
+    with _clients_lock:
+        client = _clients.get(name)
+    if client is None:
+        client = configure(name)
+    return client
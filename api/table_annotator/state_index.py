@@ -0,0 +1,172 @@
+import os
+import threading
+import time
+from collections import Counter
+from typing import Text, Dict, Tuple, Optional, Callable
+
+import table_annotator.dir_listing
+import table_annotator.io
+from table_annotator.types import StateIndex, StateIndexEntry, DocumentState, \
+    DOCUMENT_STATE_TODO
+
+# in-memory copies of the indices keyed by workdir, valid as long as neither the
+# workdir nor the index file changed on disc
+_loaded_indices: Dict[Text, Tuple[int, int, StateIndex]] = {}
+_loaded_indices_lock = threading.Lock()
+
+
+def state_index_path(workdir: Text) -> Text:
+    """Path of the index file of a workdir.
+
+    The index lives next to the workdir rather than inside it, so that writing the
+    index does not alter the workdir that it describes.
+    """
+    workdir = os.path.normpath(workdir)
+    parent, name = os.path.split(workdir)
+    return os.path.join(parent, f".{name}.state_index.json")
+
+
+def _mtime(path: Text) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def _summarize(directory_mtime: int,
+               entries: Dict[Text, StateIndexEntry]) -> StateIndex:
+    """Builds an index with aggregated counters from the given entries."""
+    image_names = sorted(entries.keys())
+    state_counts = Counter(entries[name].state for name in image_names)
+    first_todo_image = next((name for name in image_names
+                             if entries[name].state == DOCUMENT_STATE_TODO), None)
+    return StateIndex(directoryMtime=directory_mtime,
+                      entries={name: entries[name] for name in image_names},
+                      stateCounts=dict(state_counts),
+                      firstTodoImage=first_todo_image)
+
+
+def _scan(workdir: Text, directory_mtime: int,
+          previous: Optional[StateIndex]) -> StateIndex:
+    """Scans the workdir and only parses state files that changed since previous."""
+    image_names = []
+    state_file_mtimes = {}
+    with os.scandir(workdir) as it:
+        for entry in it:
+            if entry.name.endswith(table_annotator.io.STATE_FILE_SUFFIX):
+                state_file_mtimes[entry.name] = entry.stat().st_mtime_ns
+            elif table_annotator.io.is_image_file(entry.name):
+                image_names.append(entry.name)
+
+    previous_entries = previous.entries if previous is not None else {}
+    entries = {}
+    for image_name in image_names:
+        state_file_name = os.path.basename(
+            table_annotator.io.state_file_for_image(image_name))
+        state_file_mtime = state_file_mtimes.get(state_file_name)
+        previous_entry = previous_entries.get(image_name)
+        if state_file_mtime is None:
+            entries[image_name] = StateIndexEntry(state=DOCUMENT_STATE_TODO,
+                                                  stateFileMtime=None)
+        elif previous_entry is not None \
+                and previous_entry.stateFileMtime == state_file_mtime:
+            entries[image_name] = previous_entry
+        else:
+            state = table_annotator.io.read_state_for_image(
+                os.path.join(workdir, image_name))
+            entries[image_name] = StateIndexEntry(state=state.state,
+                                                  stateFileMtime=state_file_mtime)
+    return _summarize(directory_mtime, entries)
+
+
+def _read_index_file(index_path: Text) -> Optional[StateIndex]:
+    if not os.path.isfile(index_path):
+        return None
+    try:
+        return StateIndex(**table_annotator.io.read_json(index_path))
+    except ValueError:
+        # broken or outdated index files are simply rebuilt
+        return None
+
+
+def _remember(workdir: Text, index_path: Text, index: StateIndex) -> None:
+    with _loaded_indices_lock:
+        _loaded_indices[workdir] = (index.directoryMtime, _mtime(index_path), index)
+
+
+def read_state_index(workdir: Text) -> StateIndex:
+    """Returns the up-to-date state index of a workdir, rebuilding it if needed."""
+    workdir = os.path.normpath(workdir)
+    index_path = state_index_path(workdir)
+    directory_mtime = os.stat(workdir).st_mtime_ns
+
+    with _loaded_indices_lock:
+        loaded = _loaded_indices.get(workdir)
+    if loaded is not None and loaded[0] == directory_mtime \
+            and loaded[1] == _mtime(index_path):
+        return loaded[2]
+
+    index = _read_index_file(index_path)
+    if index is None or index.directoryMtime != directory_mtime:
+        with table_annotator.io.lock_for_update(index_path):
+            index = _read_index_file(index_path)
+            if index is None or index.directoryMtime != directory_mtime:
+                index = _scan(workdir, directory_mtime, index)
+                table_annotator.io.write_json(index_path, index.dict())
+
+    _remember(workdir, index_path, index)
+    return index
+
+
+def update_state_index(image_path: Text, state: DocumentState,
+                       write_state_file: Callable[[], None]) -> None:
+    """Writes a document state with write_state_file and records it in the index.
+
+    Writing the state file changes the mtime of the workdir. If the index still
+    describes the workdir as it was right before the write, it is updated in place
+    instead of rescanning the workdir. Like dir_listing, this is not trusted while
+    the workdir changed within the racy interval, as a change in the same mtime tick
+    would go unnoticed.
+    """
+    workdir = os.path.normpath(os.path.dirname(image_path))
+    image_name = os.path.basename(image_path)
+    index_path = state_index_path(workdir)
+
+    with table_annotator.io.lock_for_update(index_path):
+        directory_mtime_before_write = os.stat(workdir).st_mtime_ns
+        write_state_file()
+        directory_mtime = os.stat(workdir).st_mtime_ns
+        index = _read_index_file(index_path)
+        racy = time.time_ns() - directory_mtime_before_write \
+            <= table_annotator.dir_listing.RACY_INTERVAL_NS
+        if index is None or racy or index.directoryMtime not in {
+                directory_mtime, directory_mtime_before_write}:
+            # the workdir changed in other ways as well, rescanning picks up
+            # the new state together with everything else
+            index = _scan(workdir, directory_mtime, index)
+        else:
+            entries = dict(index.entries)
+            state_file_mtime = _mtime(
+                table_annotator.io.state_file_for_image(image_path))
+            entries[image_name] = StateIndexEntry(state=state.state,
+                                                  stateFileMtime=state_file_mtime)
+            index = _summarize(directory_mtime, entries)
+        table_annotator.io.write_json(index_path, index.dict())
+
+    _remember(workdir, index_path, index)
+
+
+def get_workdir_summary(workdir: Text) -> Dict:
+    """Aggregated document counts of a workdir as served by the project overview."""
+    index = read_state_index(workdir)
+    num_documents = len(index.entries)
+    num_documents_todo = index.stateCounts.get(DOCUMENT_STATE_TODO, 0)
+    first_todo_doc = os.path.splitext(index.firstTodoImage)[0] \
+        if index.firstTodoImage is not None else None
+    return {
+        "name": os.path.basename(os.path.normpath(workdir)),
+        "numDocuments": num_documents,
+        "numDocumentsDone": num_documents - num_documents_todo,
+        "numDocumentsTodo": num_documents_todo,
+        "firstTodoDoc": first_todo_doc
+    }
@@ -0,0 +1,50 @@
+"""Binary wire format for sending uint8 images to the ocr and segmenting servers.
+
+Images are sent as raw buffers preceded by their shape:
+
+    magic (4 bytes) | number of images (uint32)
+    for each image: height (uint32) | width (uint32) | height * width pixel bytes
+
+All integers are little endian. The servers keep accepting json requests, so both
+sides can be updated independently.
+"""
+import struct
+from typing import List
+
+import numpy as np
+
+IMAGES_MIMETYPE = "application/x-table-annotator-images"
+MAGIC = b"TAI1"
+_COUNT = struct.Struct("<I")
+_SHAPE = struct.Struct("<II")
+
+
+def encode_images(images: List[np.ndarray]) -> bytes:
+    """Serializes 2d uint8 images into the binary wire format."""
+    parts = [MAGIC, _COUNT.pack(len(images))]
+    for image in images:
+        if image.ndim != 2:
+            raise ValueError(f"Expected 2d images, got shape {image.shape}.")
+        parts.append(_SHAPE.pack(*image.shape))
+        parts.append(np.ascontiguousarray(image, dtype=np.uint8).tobytes())
+    return b"".join(parts)
+
+
+def decode_images(data: bytes) -> List[np.ndarray]:
+    """Deserializes images from the binary wire format without copying pixels."""
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError("Data is not in the binary image format.")
+    offset = len(MAGIC)
+    (count,) = _COUNT.unpack_from(data, offset)
+    offset += _COUNT.size
+    images = []
+    for _ in range(count):
+        height, width = _SHAPE.unpack_from(data, offset)
+        offset += _SHAPE.size
+        if offset + height * width > len(data):
+            raise ValueError("Data ends before the announced image size.")
+        image = np.frombuffer(data, dtype=np.uint8, count=height * width,
+                              offset=offset)
+        images.append(image.reshape(height, width))
+        offset += height * width
+    return images
@@ -1,4 +1,6 @@
-from typing import List, Text, Optional, TypeVar
+import hashlib
+import json
+from typing import List, Text, Optional, TypeVar, Dict
 from pydantic import BaseModel
 
 T = TypeVar('T')
@@ -69,11 +71,50 @@ class Table(BaseModel):
     virtualValues: Optional[List[VirtualValue]]
     matches: Optional[List[Optional[DataMatch]]]
 
+    def fingerprint(self) -> Text:
+        """Identifies the geometry of the table, i.e. everything but its contents.
+
+        Unlike hash() it is the same in every process and across restarts.
+        """
+        outline = self.outline
+        geometry = [outline.topLeft.x, outline.topLeft.y,
+                    outline.bottomRight.x, outline.bottomRight.y,
+                    float(self.rotationDegrees), self.rows, self.columns,
+                    [[[cell.top, cell.right, cell.bottom, cell.left] for cell in row]
+                     for row in self.cells]]
+        encoded = json.dumps(geometry, separators=(",", ":")).encode("utf-8")
+        return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+
     def __hash__(self) -> int:
-        cells = tuple([cell for row in self.cells for cell in row])
-        return hash((self.outline, self.rotationDegrees,
-                     tuple(self.rows), tuple(self.columns),
-                     tuple(cells)))
+        return int(self.fingerprint()[:16], 16)
+
+
+EDIT_SET_HUMAN_TEXT = "set_human_text"
+EDIT_MOVE_ROW = "move_row"
+EDIT_MOVE_COLUMN = "move_column"
+EDIT_SET_COLUMN_TYPES = "set_column_types"
+
+
+class TableEdit(BaseModel):
+    """A change to a single table of a document.
+
+    Which of the optional fields are needed depends on the op: set_human_text uses
+    row, column and human_text, move_row and move_column use the index of the
+    delimiter and its new position, set_column_types uses column and types.
+    """
+    op: Text
+    table: int
+    row: Optional[int]
+    column: Optional[int]
+    index: Optional[int]
+    position: Optional[int]
+    human_text: Optional[Text]
+    types: Optional[List[Text]]
+
+
+class TablesPatch(BaseModel):
+    version: int
+    edits: List[TableEdit]
 
 
 DOCUMENT_STATE_TODO = "TODO"
@@ -86,3 +127,38 @@ DOCUMENT_STATE_HANDWRITTEN_LIST = "HANDWRITTEN_LIST"
 class DocumentState(BaseModel):
     state: Text
 
+
+class StateIndexEntry(BaseModel):
+    state: Text
+    stateFileMtime: Optional[int]
+
+
+class StateIndex(BaseModel):
+    """The document states of all images in a workdir."""
+    directoryMtime: int
+    entries: Dict[Text, StateIndexEntry]
+    stateCounts: Dict[Text, int]
+    firstTodoImage: Optional[Text]
+
+
+class ImageMetadata(BaseModel):
+    width: int
+    height: int
+    fileSize: int
+    fileMtime: int
+
+
+JOB_STATUS_QUEUED = "QUEUED"
+JOB_STATUS_RUNNING = "RUNNING"
+JOB_STATUS_DONE = "DONE"
+JOB_STATUS_FAILED = "FAILED"
+
+
+class Job(BaseModel):
+    id: Text
+    description: Text
+    status: Text
+    total: Optional[int]
+    done: int
+    failed: int
+    error: Optional[Text]
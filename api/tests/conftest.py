@@ -1,5 +1,10 @@
+import os
+import shutil
+
 import pytest
 from api import create_app
+import table_annotator.io
+from table_annotator.types import Table
 
 
 @pytest.fixture(scope='module')
@@ -11,3 +16,28 @@ def test_client():
         # Establish an application context
         with flask_app.app_context():
             yield testing_client  # this is where the testing happens!
+
+
+@pytest.fixture
+def data_path(tmp_path) -> str:
+    """A data tree with one workdir containing an image with an annotated table."""
+    workdir = tmp_path / "bucket" / "project" / "workdir"
+    os.makedirs(workdir)
+    image_path = str(workdir / "doc.jpg")
+    shutil.copy("test_data/01/0100_5312606_1.jpg", image_path)
+    tables = table_annotator.io.read_json("test_data/01/0100_5312606_1.json")
+    for table in tables:
+        table["cells"] = [[{} for _ in range(len(table["columns"]) + 1)]
+                          for _ in range(len(table["rows"]) + 1)]
+        table["structureLocked"] = True
+        table["columnTypes"] = [[] for _ in range(len(table["columns"]) + 1)]
+    table_annotator.io.write_tables_for_image(image_path,
+                                              [Table(**t) for t in tables])
+    return str(tmp_path)
+
+
+@pytest.fixture
+def client(data_path):
+    flask_app = create_app(data_path=data_path)
+    with flask_app.test_client() as testing_client:
+        yield testing_client
@@ -1,3 +1,7 @@
+import os
+import shutil
+
+import pytest
 
 
 def test_list_images(test_client):
@@ -10,3 +14,89 @@ def test_get_image(test_client):
     response = test_client.get("/01/image/0100_5312606_1.jpg")
     assert response.status_code == 200
     assert len(response.data) > 10000
+
+
+def test_get_cell_images(client):
+    response = client.get("/api/bucket/project/workdir/doc.jpg/cell_images/0/123")
+    assert response.status_code == 200
+    sprite = response.json
+    assert sprite["sprite"].startswith("data:image/jpeg;base64,")
+    assert len(sprite["cells"]) == 16
+    assert all(len(row) == 3 for row in sprite["cells"])
+    assert sprite["cells"][0][0] == {"x": 0, "y": 0, "width": 110, "height": 23}
+    assert response.cache_control.no_cache
+
+    cached = client.get("/api/bucket/project/workdir/doc.jpg/cell_images/0/123",
+                        headers={"If-None-Match": response.headers["ETag"]})
+    assert cached.status_code == 304
+
+    missing = client.get("/api/bucket/project/workdir/doc.jpg/cell_images/1/456")
+    assert missing.status_code == 404
+
+
+@pytest.mark.parametrize("url", ["/api/bucket/project/workdir/tables/doc.jpg",
+                                 "/api/bucket/project/workdir/state/doc.jpg",
+                                 "/api/bucket/project/workdir/images"])
+def test_conditional_get(client, url: str) -> None:
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.cache_control.no_cache
+    etag = response.headers["ETag"]
+
+    cached = client.get(url, headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.data == b""
+
+
+def test_etags_change_with_content(client) -> None:
+    tables_url = "/api/bucket/project/workdir/tables/doc.jpg"
+    state_url = "/api/bucket/project/workdir/state/doc.jpg"
+    images_url = "/api/bucket/project/workdir/images"
+    etags = {url: client.get(url).headers["ETag"]
+             for url in [tables_url, state_url, images_url]}
+
+    tables = client.get(tables_url).json
+    client.patch(tables_url, json={"version": tables["version"], "edits": [
+        {"op": "set_human_text", "table": 0, "row": 0, "column": 0, "human_text": "a"}
+    ]})
+    client.post(state_url, json={"state": "DONE"})
+    client.post("/api/bucket/project/workdir/image/rotate/doc.jpg")
+
+    for url, etag in etags.items():
+        response = client.get(url, headers={"If-None-Match": etag})
+        assert response.status_code == 200, url
+        assert response.headers["ETag"] != etag
+    assert client.get(state_url).json["state"] == "DONE"
+
+
+def test_state_etag_changes_with_same_size_rewrite(client, data_path) -> None:
+    state_url = "/api/bucket/project/workdir/state/doc.jpg"
+    client.post(state_url, json={"state": "TODO"})
+    etag = client.get(state_url).headers["ETag"]
+
+    # a coarse file system timestamp keeps the mtime of the rewritten file
+    state_file = os.path.join(data_path, "bucket", "project", "workdir",
+                              "doc.state.json")
+    mtime = os.stat(state_file).st_mtime_ns
+    client.post(state_url, json={"state": "DONE"})
+    os.utime(state_file, ns=(mtime, mtime))
+
+    response = client.get(state_url, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json["state"] == "DONE"
+
+
+def test_images_etag_within_racy_interval(client, data_path) -> None:
+    workdir = os.path.join(data_path, "bucket", "project", "workdir")
+    images_url = "/api/bucket/project/workdir/images"
+    etag = client.get(images_url).headers["ETag"]
+
+    # a coarse file system timestamp keeps the mtime although an image was added
+    mtime = os.stat(workdir).st_mtime_ns
+    shutil.copy(os.path.join(workdir, "doc.jpg"), os.path.join(workdir, "doc2.jpg"))
+    os.utime(workdir, ns=(mtime, mtime))
+
+    response = client.get(images_url, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert len(response.json["images"]) == 2
+    assert response.headers["ETag"] != etag
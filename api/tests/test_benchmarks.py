@@ -0,0 +1,23 @@
+from benchmarks.api_endpoints import run_benchmark, create_scenarios, \
+    uncovered_endpoints
+from benchmarks.synthetic_corpus import generate_corpus
+from api import create_app
+
+
+def test_every_endpoint_has_a_benchmark() -> None:
+    app = create_app(data_path="test_data")
+    with app.test_client() as client:
+        assert uncovered_endpoints(app, create_scenarios(client, [])) == []
+
+
+def test_benchmark_runs_without_errors(tmp_path) -> None:
+    image_paths = generate_corpus(str(tmp_path), workdirs=1, documents=2, rows=4,
+                                  width=600, height=800)
+    assert len(image_paths) == 2
+    assert (tmp_path / "project00" / "persdata.csv").is_file()
+
+    results = run_benchmark(str(tmp_path), requests=1, warmup=0)
+
+    assert {endpoint: result["errors"] for endpoint, result in results.items()
+            if result["errors"] > 0} == {}
+    assert results["api.match_table_contents"]["p50Ms"] > 0
@@ -0,0 +1,114 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from table_annotator.cache import LRUCache
+
+IMAGE_URL = "/api/bucket/project/workdir/doc.jpg/cell_image/0/{row}/{col}/123"
+
+
+def test_lru_eviction_by_size() -> None:
+    cache = LRUCache(max_bytes=10, size_of=len)
+    cache.put("a", "aaaa")
+    cache.put("b", "bbbb")
+    assert cache.get("a") == "aaaa"
+    cache.put("c", "cccc")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "aaaa"
+    assert cache.get("c") == "cccc"
+    assert cache.stats() == {"entries": 2, "bytes": 8, "maxBytes": 10, "hits": 3,
+                             "misses": 1, "evictions": 1, "coalesced": 0}
+
+
+def test_oversized_values_are_not_cached() -> None:
+    cache = LRUCache(max_bytes=3, size_of=len)
+    cache.put("a", "aaaa")
+    assert len(cache) == 0
+
+
+def test_ttl_expiry() -> None:
+    cache = LRUCache(max_bytes=10, size_of=len, ttl=0.01)
+    cache.put("a", "a")
+    time.sleep(0.02)
+    assert cache.get("a") is None
+    assert cache.current_bytes == 0
+
+
+def test_invalidate() -> None:
+    cache = LRUCache(max_bytes=10, size_of=len)
+    cache.put(("x.jpg", 1), "a")
+    cache.put(("x.jpg", 2), "b")
+    cache.put(("y.jpg", 1), "c")
+    assert cache.invalidate(lambda key: key[0] == "x.jpg") == 2
+    assert len(cache) == 1
+
+
+def test_get_or_create_coalesces_concurrent_creations() -> None:
+    cache = LRUCache(max_bytes=10, size_of=len)
+    release = threading.Event()
+    creations = []
+
+    def create() -> str:
+        creations.append(1)
+        release.wait()
+        return "value"
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        futures = [executor.submit(cache.get_or_create, "key", create)
+                   for _ in range(8)]
+        while cache.coalesced + len(creations) < 8:
+            time.sleep(0.001)
+        release.set()
+        results = [f.result() for f in futures]
+
+    assert results == ["value"] * 8
+    assert len(creations) == 1
+    assert cache.get("key") == "value"
+
+
+def test_get_or_create_does_not_cache_none() -> None:
+    cache = LRUCache(max_bytes=10, size_of=len)
+    assert cache.get_or_create("key", lambda: None) is None
+    assert len(cache) == 0
+
+
+def test_cell_image_changes_after_inverting(client) -> None:
+    before = client.get(IMAGE_URL.format(row=0, col=0))
+    assert before.status_code == 200
+    assert client.get(IMAGE_URL.format(row=0, col=1)).data != before.data
+
+    response = client.post("/api/bucket/project/workdir/image/invert/doc.jpg")
+    assert response.status_code == 200
+
+    after = client.get(IMAGE_URL.format(row=0, col=0))
+    assert after.status_code == 200
+    assert after.data != before.data
+
+
+def test_cell_image_conditional_get(client) -> None:
+    response = client.get(IMAGE_URL.format(row=1, col=1))
+    assert response.status_code == 200
+    assert response.mimetype == "image/jpeg"
+    assert response.cache_control.no_cache
+    etag = response.headers["ETag"]
+
+    cached = client.get(IMAGE_URL.format(row=1, col=1),
+                        headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.data == b""
+    assert cached.headers["ETag"] == etag
+
+    other_cell = client.get(IMAGE_URL.format(row=1, col=2),
+                            headers={"If-None-Match": etag})
+    assert other_cell.status_code == 200
+
+
+def test_cell_image_revalidates_after_inverting(client) -> None:
+    url = IMAGE_URL.format(row=1, col=1)
+    etag = client.get(url).headers["ETag"]
+    client.post("/api/bucket/project/workdir/image/invert/doc.jpg")
+
+    response = client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
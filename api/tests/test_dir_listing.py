@@ -0,0 +1,51 @@
+import os
+
+import table_annotator.dir_listing
+import table_annotator.io
+
+
+def make_images(folder, names) -> None:
+    for name in names:
+        (folder / name).write_bytes(b"")
+
+
+def age(folder, seconds: int = 60) -> None:
+    mtime = os.stat(folder).st_mtime_ns - seconds * 10 ** 9
+    os.utime(folder, ns=(mtime, mtime))
+
+
+def test_listing_is_reused_until_the_directory_changes(tmp_path) -> None:
+    make_images(tmp_path, ["b.jpg", "a.jpg", "a.json"])
+    age(tmp_path)
+
+    listing = table_annotator.dir_listing.get_listing(
+        str(tmp_path), table_annotator.io.is_image_file)
+    assert listing.images == ["a.jpg", "b.jpg"]
+    assert listing.files == {"a.jpg", "b.jpg", "a.json"}
+    assert table_annotator.dir_listing.get_listing(
+        str(tmp_path), table_annotator.io.is_image_file) is listing
+
+    make_images(tmp_path, ["c.jpg"])
+    assert table_annotator.io.list_images(str(tmp_path)) == ["a.jpg", "b.jpg", "c.jpg"]
+
+
+def test_recently_changed_directories_are_listed_again(tmp_path) -> None:
+    make_images(tmp_path, ["a.jpg"])
+
+    listing = table_annotator.dir_listing.get_listing(
+        str(tmp_path), table_annotator.io.is_image_file)
+
+    assert table_annotator.dir_listing.get_listing(
+        str(tmp_path), table_annotator.io.is_image_file) is not listing
+
+
+def test_previous_and_next_image(tmp_path) -> None:
+    make_images(tmp_path, ["a.jpg", "b.jpg", "c.jpg"])
+    age(tmp_path)
+    a, b, c = [str(tmp_path / name) for name in ["a.jpg", "b.jpg", "c.jpg"]]
+
+    assert table_annotator.io.get_previous_image(a) is None
+    assert table_annotator.io.get_previous_image(b) == a
+    assert table_annotator.io.get_next_image(b) == c
+    assert table_annotator.io.get_next_image(c) is None
+    assert table_annotator.io.get_next_image(str(tmp_path / "x.jpg")) is None
@@ -0,0 +1,69 @@
+TABLES_URL = "/api/bucket/project/workdir/tables/doc.jpg"
+
+
+def test_patch_applies_edits_and_increments_version(client) -> None:
+    version = client.get(TABLES_URL).json["version"]
+    response = client.patch(TABLES_URL, json={"version": version, "edits": [
+        {"op": "set_human_text", "table": 0, "row": 1, "column": 2,
+         "human_text": "Müller"},
+        {"op": "set_column_types", "table": 0, "column": 0, "types": ["NAME"]}
+    ]})
+    assert response.status_code == 200
+    assert response.json["version"] == version + 1
+
+    tables = client.get(TABLES_URL).json
+    assert tables["version"] == version + 1
+    assert tables["tables"][0]["cells"][1][2] == {"human_text": "Müller"}
+    assert tables["tables"][0]["columnTypes"][0] == ["NAME"]
+
+
+def test_patch_moves_delimiters(client) -> None:
+    tables = client.get(TABLES_URL).json
+    rows = tables["tables"][0]["rows"]
+    response = client.patch(TABLES_URL, json={"version": tables["version"], "edits": [
+        {"op": "move_row", "table": 0, "index": 1, "position": rows[1] + 1}
+    ]})
+    assert response.status_code == 200
+    assert client.get(TABLES_URL).json["tables"][0]["rows"][1] == rows[1] + 1
+
+    past_neighbour = client.patch(TABLES_URL, json={
+        "version": response.json["version"],
+        "edits": [{"op": "move_row", "table": 0, "index": 1, "position": rows[2]}]})
+    assert past_neighbour.status_code == 400
+
+    outline = tables["tables"][0]["outline"]
+    width = outline["bottomRight"]["x"] - outline["topLeft"]["x"]
+    columns = tables["tables"][0]["columns"]
+    past_outline = client.patch(TABLES_URL, json={
+        "version": response.json["version"],
+        "edits": [{"op": "move_column", "table": 0, "index": len(columns) - 1,
+                   "position": width}]})
+    assert past_outline.status_code == 400
+
+
+def test_patch_with_outdated_version_conflicts(client) -> None:
+    tables = client.get(TABLES_URL).json
+    stored = client.post(TABLES_URL, json=tables["tables"])
+    assert stored.json["version"] == tables["version"] + 1
+
+    response = client.patch(TABLES_URL, json={"version": tables["version"], "edits": [
+        {"op": "set_human_text", "table": 0, "row": 0, "column": 0, "human_text": "a"}
+    ]})
+    assert response.status_code == 409
+    assert response.json["version"] == tables["version"] + 1
+    assert client.get(TABLES_URL).json["tables"][0]["cells"][0][0] == {}
+
+
+def test_invalid_edits_change_nothing(client) -> None:
+    version = client.get(TABLES_URL).json["version"]
+    response = client.patch(TABLES_URL, json={"version": version, "edits": [
+        {"op": "set_human_text", "table": 0, "row": 0, "column": 0, "human_text": "a"},
+        {"op": "set_human_text", "table": 0, "row": 100, "column": 0, "human_text": "b"}
+    ]})
+    assert response.status_code == 400
+    tables = client.get(TABLES_URL).json
+    assert tables["version"] == version
+    assert tables["tables"][0]["cells"][0][0] == {}
+
+    assert client.patch(TABLES_URL, json={"edits": []}).status_code == 400
+    assert client.patch(TABLES_URL, json=[]).status_code == 400
@@ -0,0 +1,79 @@
+import os
+import subprocess
+import sys
+
+import table_annotator.io
+from table_annotator.types import Table
+
+TABLES_FILE = "test_data/01/0100_5312606_1.json"
+TABLES_URL = "/api/bucket/project/workdir/tables/doc.jpg"
+CELL_IMAGE_URL = "/api/bucket/project/workdir/doc.jpg/cell_image/0/1/1/123"
+
+
+def make_table() -> Table:
+    table = table_annotator.io.read_json(TABLES_FILE)[0]
+    table["cells"] = [[{"top": 1}, {}, {}] for _ in range(len(table["rows"]) + 1)]
+    table["structureLocked"] = True
+    return Table(**table)
+
+
+def test_fingerprint_ignores_contents_but_not_geometry() -> None:
+    table = make_table()
+    fingerprint = table.fingerprint()
+
+    table.cells[0][1].human_text = "Müller"
+    table.columnTypes = [["NAME"], [], []]
+    assert table.fingerprint() == fingerprint
+    assert hash(table) == hash(make_table())
+
+    table.cells[0][1].left = 2
+    assert table.fingerprint() != fingerprint
+    moved = make_table()
+    moved.rows[0] += 1
+    assert moved.fingerprint() != fingerprint
+
+
+def test_fingerprint_is_the_same_in_other_processes() -> None:
+    script = ("from tests.test_fingerprint import make_table; "
+              "print(make_table().fingerprint())")
+    fingerprints = set()
+    for seed in ["1", "2"]:
+        output = subprocess.run([sys.executable, "-c", script], check=True,
+                                capture_output=True, text=True,
+                                env={**os.environ, "PYTHONHASHSEED": seed})
+        fingerprints.add(output.stdout.strip())
+    assert fingerprints == {make_table().fingerprint()}
+
+
+def test_read_table_fingerprints(tmp_path) -> None:
+    image_path = str(tmp_path / "doc.jpg")
+    table = make_table()
+    table_annotator.io.write_tables_for_image(image_path, [table])
+    assert table_annotator.io.read_table_fingerprints(image_path) == \
+        [table.fingerprint()]
+
+    # files written by other tools are fingerprinted from their tables
+    table.rows[0] += 1
+    table_annotator.io.write_json(str(tmp_path / "doc.json"),
+                                  [table_annotator.io.table_as_json(table)])
+    assert table_annotator.io.read_table_fingerprints(image_path) == \
+        [table.fingerprint()]
+
+
+def test_cell_images_only_change_with_geometry(client) -> None:
+    etag = client.get(CELL_IMAGE_URL).headers["ETag"]
+    tables = client.get(TABLES_URL).json
+    assert len(tables["fingerprints"]) == 1
+
+    response = client.patch(TABLES_URL, json={"version": tables["version"], "edits": [
+        {"op": "set_human_text", "table": 0, "row": 1, "column": 1, "human_text": "a"}
+    ]})
+    assert client.get(CELL_IMAGE_URL, headers={"If-None-Match": etag}).status_code \
+        == 304
+
+    rows = tables["tables"][0]["rows"]
+    client.patch(TABLES_URL, json={"version": response.json["version"], "edits": [
+        {"op": "move_row", "table": 0, "index": 0, "position": rows[0] + 2}
+    ]})
+    assert client.get(CELL_IMAGE_URL, headers={"If-None-Match": etag}).status_code \
+        == 200
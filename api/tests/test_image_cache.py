@@ -0,0 +1,56 @@
+import os
+
+import numpy as np
+import pytest
+
+import table_annotator.image_cache
+import table_annotator.img
+import table_annotator.io
+
+IMAGE_URL = "/api/bucket/project/workdir/doc.jpg/cell_image/0/0/0/123"
+
+
+@pytest.fixture
+def image_path(data_path) -> str:
+    table_annotator.image_cache.configure(256 * 1024 ** 2)
+    return os.path.join(data_path, "bucket", "project", "workdir", "doc.jpg")
+
+
+def test_table_image_is_extracted_once(image_path) -> None:
+    table = table_annotator.io.read_tables_for_image(image_path)[0]
+
+    first = table_annotator.image_cache.extract_table_image(image_path, table)
+    second = table_annotator.image_cache.extract_table_image(image_path, table)
+
+    assert first is second
+    assert not first.flags.writeable
+    expected = table_annotator.img.extract_table_image(
+        table_annotator.io.read_image(image_path), table)
+    assert np.array_equal(first, expected)
+    stats = table_annotator.image_cache.stats()
+    assert stats["pages"] == 1 and stats["tables"] == 1
+    assert stats["hitRate"] == 1 / 3
+
+
+def test_table_geometry_and_file_version_are_part_of_the_key(image_path) -> None:
+    table = table_annotator.io.read_tables_for_image(image_path)[0]
+    before = table_annotator.image_cache.extract_table_image(image_path, table)
+
+    table.rotationDegrees = 1.5
+    rotated = table_annotator.image_cache.extract_table_image(image_path, table)
+    assert not np.array_equal(before, rotated)
+
+    image = table_annotator.io.read_image(image_path)
+    table_annotator.io.write_image(image_path, np.invert(image))
+    os.utime(image_path, ns=(1, 1))
+    inverted = table_annotator.image_cache.extract_table_image(image_path, table)
+    assert not np.array_equal(rotated, inverted)
+
+
+def test_endpoints_share_the_cache(client, image_path) -> None:
+    assert client.get(IMAGE_URL).status_code == 200
+    response = client.get("/api/cache_stats")
+    assert response.status_code == 200
+    images = response.json["images"]
+    assert images["pages"] == 1 and images["tables"] == 1
+    assert response.json["cellImages"]["entries"] == 1
@@ -0,0 +1,48 @@
+import os
+import shutil
+from typing import Text
+
+import pytest
+
+import table_annotator.image_metadata
+import table_annotator.img
+import table_annotator.io
+from api import create_app
+
+
+@pytest.mark.parametrize("img_path", ["test_data/01/0100_5312606_1.jpg",
+                                      "test_data/01/bluegreen.png"])
+def test_read_image_dimensions(img_path: Text) -> None:
+    image = table_annotator.io.read_image(img_path)
+    assert table_annotator.image_metadata.read_image_dimensions(img_path) == \
+           table_annotator.img.get_dimensions(image)
+
+
+def test_manifest_is_refreshed_on_change(tmp_path) -> None:
+    workdir = str(tmp_path / "workdir")
+    os.makedirs(workdir)
+    image_path = os.path.join(workdir, "a.jpg")
+    shutil.copy("test_data/01/0100_5312606_1.jpg", image_path)
+
+    metadata = table_annotator.image_metadata.get_images_metadata(workdir, ["a.jpg"])
+    assert (metadata["a.jpg"].width, metadata["a.jpg"].height) == (1264, 880)
+    assert os.path.isfile(table_annotator.image_metadata.manifest_path(workdir))
+
+    image = table_annotator.io.read_image(image_path)
+    table_annotator.io.write_image(image_path, image[:100, :50])
+    metadata = table_annotator.image_metadata.get_images_metadata(workdir, ["a.jpg"])
+    assert (metadata["a.jpg"].width, metadata["a.jpg"].height) == (50, 100)
+
+
+def test_list_images(tmp_path) -> None:
+    workdir = tmp_path / "bucket" / "project" / "workdir"
+    os.makedirs(workdir)
+    shutil.copy("test_data/01/0100_5312606_1.jpg", workdir / "a.jpg")
+    (workdir / "a.csv").write_text("")
+    shutil.copy("test_data/01/0100_5312606_1.jpg", workdir / "b.jpg")
+
+    app = create_app(data_path=str(tmp_path))
+    with app.test_client() as client:
+        images = client.get("/api/bucket/project/workdir/images").json["images"]
+    assert [(i["name"], i["width"], i["height"], i["hasPreAnnotatedData"])
+            for i in images] == [("a.jpg", 1264, 880, True), ("b.jpg", 1264, 880, False)]
@@ -3,6 +3,7 @@ import pytest
 import numpy as np
 
 import table_annotator.img
+import table_annotator.cellgrid
 import table_annotator.io
 from table_annotator.types import Point, Rectangle
 
@@ -40,6 +41,24 @@ def test_get_image_rectangle_borders() -> None:
     assert oversized_part.shape == (100, 200, 3)
 
 
+@pytest.mark.parametrize("degrees, top_left, bottom_right",
+                         [(0, (10, 20), (300, 400)),
+                          (-1.37, (10, 20), (300, 400)),
+                          (2.5, (-15, -5), (1300, 900)),
+                          (7.9, (600, 1200), (700, 1500)),
+                          (-0.5, (50, 900), (60, 10))])
+def test_rotate_and_crop_matches_full_rotation(degrees, top_left, bottom_right) -> None:
+    image = table_annotator.io.read_image("test_data/01/0100_5312606_1.jpg")
+    rect = Rectangle(topLeft=Point(x=top_left[0], y=top_left[1]),
+                     bottomRight=Point(x=bottom_right[0], y=bottom_right[1]))
+
+    expected = table_annotator.img.crop(table_annotator.img.rotate(image, degrees), rect)
+    actual = table_annotator.img.rotate_and_crop(image, degrees, rect)
+
+    assert actual.shape == expected.shape
+    assert np.array_equal(actual, expected)
+
+
 def test_extract_table() -> None:
     img_path = "test_data/01/0100_5312606_1.jpg"
     table_json_path = "test_data/01/0100_5312606_1.json"
@@ -178,3 +197,15 @@ def test_cell_grid_to_list() -> None:
 
     assert rebuild_cell_grid == cell_grid
 
+
+def test_pack_grid() -> None:
+    cell_image_grid = [[np.zeros((10, 5, 3)), np.ones((12, 7, 3))],
+                       [np.full((4, 20, 3), 2)]]
+
+    packed, positions = table_annotator.cellgrid.pack_grid(cell_image_grid)
+
+    assert packed.shape == (16, 20, 3)
+    for row, row_positions in zip(cell_image_grid, positions):
+        for cell, position in zip(row, row_positions):
+            assert np.all(table_annotator.img.crop(packed, position) == cell)
+    assert positions[1][0].topLeft == Point(x=0, y=12)
@@ -1,4 +1,11 @@
+import os
+
+import numpy as np
+import pytest
+from pydantic import ValidationError
+
 import table_annotator.io
+from table_annotator.types import Table, Point, Cell
 
 
 def test_read_tables() -> None:
@@ -7,3 +14,60 @@ def test_read_tables() -> None:
     assert len(tables) == 1
     assert len(tables[0].columns) == 2
 
+
+def test_write_json_replaces_file_atomically(tmp_path) -> None:
+    file_path = str(tmp_path / "doc.json")
+    table_annotator.io.write_json(file_path, {"a": 1})
+    table_annotator.io.write_json(file_path, {"a": 2})
+
+    assert table_annotator.io.read_json(file_path) == {"a": 2}
+    assert os.listdir(tmp_path) == ["doc.json"]
+
+
+def test_failed_write_keeps_previous_content(tmp_path) -> None:
+    file_path = str(tmp_path / "doc.json")
+    table_annotator.io.write_json(file_path, {"a": 1})
+
+    with pytest.raises(TypeError):
+        table_annotator.io.write_json(file_path, {"a": object()})
+
+    assert table_annotator.io.read_json(file_path) == {"a": 1}
+    assert os.listdir(tmp_path) == ["doc.json"]
+
+
+def test_write_image(tmp_path) -> None:
+    file_path = str(tmp_path / "image.png")
+    image = np.arange(60, dtype=np.uint8).reshape(4, 5, 3)
+
+    table_annotator.io.write_image(file_path, image)
+
+    assert np.array_equal(table_annotator.io.read_image(file_path), image)
+    assert os.listdir(tmp_path) == ["image.png"]
+
+
+def test_construct_table_matches_validated_table() -> None:
+    table_json = table_annotator.io.read_json("test_data/01/0100_5312606_1.json")[0]
+    table_json["structureLocked"] = True
+    table_json["rotationDegrees"] = 1
+    table_json["cells"] = [[{"top": 3, "ocr_text": "a"}, {"legacy": 1}],
+                           [{"human_text": "b"}, {}]]
+    table_json["matches"] = [None, {"score": 0.5, "data": {"name": "a"}}]
+    table_json["legacy"] = 1
+
+    table = table_annotator.io.construct_table(table_json)
+
+    assert table == Table(**table_json)
+    assert table_annotator.io.table_as_json(table)["cells"][0][1] == {}
+    assert table.cells[0][1].dict() == {key: None for key in Cell.__fields__}
+    assert isinstance(table.rotationDegrees, float)
+    assert table.cells[0][1].ocr_text is None
+    assert table.outline.translate(Point(x=1, y=1)).topLeft.x == \
+        table_json["outline"]["topLeft"]["x"] + 1
+
+
+def test_construct_table_validates_incomplete_tables() -> None:
+    table_json = table_annotator.io.read_json("test_data/01/0100_5312606_1.json")[0]
+    table_json.pop("structureLocked", None)
+
+    with pytest.raises(ValidationError):
+        table_annotator.io.construct_table(table_json)
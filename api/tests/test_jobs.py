@@ -0,0 +1,88 @@
+import time
+
+import table_annotator.ocr
+from table_annotator.jobs import JobManager, JobProgress
+from table_annotator.types import JOB_STATUS_DONE, JOB_STATUS_FAILED, Job
+
+
+def wait_for(get_job, timeout: float = 10.0) -> Job:
+    start = time.monotonic()
+    while time.monotonic() - start < timeout:
+        job = get_job()
+        if job["status"] in {JOB_STATUS_DONE, JOB_STATUS_FAILED}:
+            return job
+        time.sleep(0.01)
+    raise TimeoutError()
+
+
+def test_job_progress() -> None:
+    manager = JobManager(max_workers=1)
+
+    def work(progress: JobProgress) -> None:
+        progress.set_total(3)
+        progress.item_done()
+        progress.item_failed("broken")
+        progress.item_done()
+
+    job = manager.submit("test", work)
+    job = wait_for(lambda: manager.get(job.id).dict())
+    assert job["status"] == JOB_STATUS_DONE
+    assert (job["total"], job["done"], job["failed"]) == (3, 2, 1)
+    assert job["error"] == "broken"
+
+
+def test_failing_job() -> None:
+    manager = JobManager(max_workers=1)
+
+    def work(progress: JobProgress) -> None:
+        raise RuntimeError("out of coffee")
+
+    job = manager.submit("test", work)
+    job = wait_for(lambda: manager.get(job.id).dict())
+    assert job["status"] == JOB_STATUS_FAILED
+    assert "out of coffee" in job["error"]
+
+
+def test_finished_jobs_are_forgotten() -> None:
+    manager = JobManager(max_workers=1, max_finished_jobs=2)
+    jobs = [manager.submit("test", lambda progress: None) for _ in range(4)]
+    manager.shutdown()
+    assert manager.get(jobs[0].id) is None
+    assert [job.id for job in manager.list()] == [job.id for job in jobs[2:]]
+
+
+def test_workdir_ocr_job(client, monkeypatch) -> None:
+    monkeypatch.setattr(table_annotator.ocr, "request_ocr",
+                        lambda images: [f"text {i}" for i in range(len(images))])
+
+    response = client.post("/api/bucket/project/workdir/ocr_jobs")
+    assert response.status_code == 202
+    job_id = response.json["job"]["id"]
+
+    job = wait_for(lambda: client.get(f"/api/ocr_jobs/{job_id}").json["job"])
+    assert job["status"] == JOB_STATUS_DONE
+    assert (job["total"], job["done"], job["failed"]) == (1, 1, 0)
+
+    tables = client.get("/api/bucket/project/workdir/tables/doc.jpg").json["tables"]
+    assert tables[0]["cells"][0][0]["ocr_text"] == "text 0"
+    assert tables[0]["cells"][-1][-1]["ocr_text"] == "text 47"
+
+
+def test_unknown_job(client) -> None:
+    assert client.get("/api/ocr_jobs/nope").status_code == 404
+
+
+def test_table_ocr_job_keeps_ocr_unless_overwritten(client, monkeypatch) -> None:
+    predictions = iter(["first", "second"])
+    monkeypatch.setattr(table_annotator.ocr, "request_ocr",
+                        lambda images: [next(predictions)] * len(images))
+    tables_url = "/api/bucket/project/workdir/tables/doc.jpg"
+    job_url = "/api/bucket/project/workdir/doc.jpg/ocr_jobs/0"
+
+    for query in ["", "?overwrite=0", "?overwrite=false", "?overwrite=true"]:
+        job_id = client.post(job_url + query).json["job"]["id"]
+        wait_for(lambda: client.get(f"/api/ocr_jobs/{job_id}").json["job"])
+
+        tables = client.get(tables_url).json["tables"]
+        expected = "second" if query == "?overwrite=true" else "first"
+        assert tables[0]["cells"][0][0]["ocr_text"] == expected, query
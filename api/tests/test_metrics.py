@@ -0,0 +1,45 @@
+from table_annotator.metrics import Counter, Histogram, render
+
+IMAGE_URL = "/api/bucket/project/workdir/doc.jpg/cell_image/0/0/0/123"
+
+
+def test_histogram_samples() -> None:
+    histogram = Histogram("duration_seconds", "Duration.", ["route"], [0.1, 1])
+    histogram.observe(0.05, route="a")
+    histogram.observe(0.5, route="a")
+    histogram.observe(5, route="a")
+
+    assert histogram.samples() == [
+        'duration_seconds_bucket{route="a",le="0.1"} 1',
+        'duration_seconds_bucket{route="a",le="1"} 2',
+        'duration_seconds_bucket{route="a",le="+Inf"} 3',
+        'duration_seconds_sum{route="a"} 5.55',
+        'duration_seconds_count{route="a"} 3']
+
+
+def test_counter_escapes_labels() -> None:
+    counter = Counter("requests_total", "Requests.", ["path"])
+    counter.inc(path='a"b\\c')
+    counter.inc(2, path='a"b\\c')
+
+    assert counter.samples() == ['requests_total{path="a\\"b\\\\c"} 3']
+
+
+def test_metrics_endpoint(client) -> None:
+    assert client.get(IMAGE_URL).status_code == 200
+    assert client.get(IMAGE_URL).status_code == 200
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.mimetype == "text/plain"
+    lines = response.data.decode("utf-8").splitlines()
+    assert "# TYPE table_annotator_request_duration_seconds histogram" in lines
+    assert any(line.startswith('table_annotator_requests_total{endpoint='
+                               '"api.get_cell_image",method="GET",status="200"}')
+               for line in lines)
+    assert 'table_annotator_cache_hits_total{cache="cell_images"} 1' in lines
+    assert 'table_annotator_cache_max_bytes{cache="images"} ' \
+           f'{256 * 1024 ** 2 * 2}' in lines
+    assert any(line.startswith('table_annotator_io_duration_seconds_count'
+                               '{operation="read_image"}') for line in lines)
+    assert render().startswith("# HELP")
@@ -0,0 +1,31 @@
+import os
+
+import pre_ocr
+import table_annotator.io
+import table_annotator.ocr
+
+
+def test_images_with_changed_tables_are_not_checkpointed(data_path,
+                                                         monkeypatch) -> None:
+    image_path = os.path.join(data_path, "bucket", "project", "workdir", "doc.jpg")
+    checkpoint_path = os.path.join(data_path, "checkpoint.log")
+
+    def request_ocr_while_table_moves(images):
+        tables = table_annotator.io.read_tables_for_image(image_path)
+        tables[0].rows[0] += 1
+        table_annotator.io.write_tables_for_image(image_path, tables)
+        return ["text"] * len(images)
+
+    monkeypatch.setattr(table_annotator.ocr, "request_ocr",
+                        request_ocr_while_table_moves)
+    pre_ocr.pre_ocr(data_path, checkpoint_path=checkpoint_path)
+    with open(checkpoint_path, encoding="utf-8") as f:
+        assert f.read() == ""
+
+    monkeypatch.setattr(table_annotator.ocr, "request_ocr",
+                        lambda images: ["text"] * len(images))
+    pre_ocr.pre_ocr(data_path, checkpoint_path=checkpoint_path)
+    with open(checkpoint_path, encoding="utf-8") as f:
+        assert f.read() == os.path.join("bucket", "project", "workdir", "doc.jpg") + "\n"
+    tables = table_annotator.io.read_tables_for_image(image_path)
+    assert tables[0].cells[0][0].ocr_text == "text"
@@ -0,0 +1,66 @@
+import os
+import pstats
+import sys
+
+import pytest
+
+from api import PROFILE_DIR, PROFILE_SAMPLE_RATE
+from table_annotator.profiling import should_profile, PROFILE_HEADER, \
+    PROFILE_FILE_HEADER
+
+TABLES_URL = "/api/bucket/project/workdir/tables/doc.jpg"
+
+
+def test_should_profile() -> None:
+    assert should_profile("1", 0.0)
+    assert not should_profile(None, 0.0)
+    assert not should_profile("0", 0.0)
+    assert should_profile(None, 1.0)
+
+
+def test_profiling_disabled_by_default(client) -> None:
+    response = client.get(TABLES_URL, headers={PROFILE_HEADER: "1"})
+    assert response.status_code == 200
+    assert PROFILE_FILE_HEADER not in response.headers
+
+
+def test_profile_requested_by_header(client, tmp_path) -> None:
+    profile_dir = tmp_path / "profiles"
+    client.application.config[PROFILE_DIR] = str(profile_dir)
+
+    assert PROFILE_FILE_HEADER not in client.get(TABLES_URL).headers
+    response = client.get(TABLES_URL, headers={PROFILE_HEADER: "1"})
+    assert response.status_code == 200
+
+    profile_name = response.headers[PROFILE_FILE_HEADER]
+    assert os.listdir(profile_dir) == [profile_name]
+    assert "api.get_tables" in profile_name and "doc.jpg" in profile_name
+    stats = pstats.Stats(str(profile_dir / profile_name))
+    assert any(function == "read_tables_for_image"
+               for _, _, function in stats.stats)
+    # the profile covers the metrics hooks instead of being counted by them
+    assert any(function == "observe_request" for _, _, function in stats.stats)
+
+
+def test_profile_sampled(client, tmp_path) -> None:
+    client.application.config[PROFILE_DIR] = str(tmp_path)
+    client.application.config[PROFILE_SAMPLE_RATE] = 1.0
+
+    response = client.get(TABLES_URL)
+    assert response.status_code == 200
+    assert os.path.isfile(tmp_path / response.headers[PROFILE_FILE_HEADER])
+
+
+def test_profiler_stops_when_view_raises(client, tmp_path) -> None:
+    def fail():
+        raise RuntimeError("view failed")
+
+    profile_dir = tmp_path / "profiles"
+    client.application.add_url_rule("/fail", "fail", fail)
+    client.application.config[PROFILE_DIR] = str(profile_dir)
+    client.application.config["PROPAGATE_EXCEPTIONS"] = True
+
+    with pytest.raises(RuntimeError):
+        client.get("/fail", headers={PROFILE_HEADER: "1"})
+    assert sys.getprofile() is None
+    assert len(os.listdir(profile_dir)) == 1
@@ -0,0 +1,77 @@
+import os
+
+import cv2
+import numpy as np
+
+import table_annotator.io
+import table_annotator.pyramid
+
+IMAGE_URL = "/api/bucket/project/workdir/image/doc.jpg"
+
+
+def test_level_sizes() -> None:
+    assert table_annotator.pyramid.level_sizes(1264, 880, 512) == \
+        [(1264, 880), (632, 440), (316, 220)]
+    assert table_annotator.pyramid.level_sizes(300, 200, 512) == [(300, 200)]
+    assert table_annotator.pyramid.level_sizes(1025, 10, 256) == \
+        [(1025, 10), (513, 5), (257, 3), (129, 2)]
+
+
+def test_tiles_cover_the_levels(data_path) -> None:
+    image_path = os.path.join(data_path, "bucket", "project", "workdir", "doc.jpg")
+    image = table_annotator.io.read_image(image_path)
+
+    _, pyramid = table_annotator.pyramid.get_pyramid(image_path, tile_size=256)
+
+    assert [(level["columns"], level["rows"]) for level in pyramid["levels"]] == \
+        [(5, 4), (3, 2), (2, 1), (1, 1)]
+    last_tile = table_annotator.io.read_image(
+        table_annotator.pyramid.get_tile(image_path, 0, 4, 3, tile_size=256))
+    assert last_tile.shape == (880 - 3 * 256, 1264 - 4 * 256, 3)
+    top_left = table_annotator.io.read_image(
+        table_annotator.pyramid.get_tile(image_path, 1, 0, 0, tile_size=256))
+    expected = cv2.resize(image, (632, 440), interpolation=cv2.INTER_AREA)[:256, :256]
+    assert np.abs(top_left.astype(int) - expected).mean() < 3
+    assert table_annotator.pyramid.get_tile(image_path, 4, 0, 0, tile_size=256) \
+        is None
+    assert table_annotator.pyramid.get_tile(image_path, 2, 2, 0, tile_size=256) \
+        is None
+    # the workdir itself is left untouched
+    assert sorted(os.listdir(os.path.dirname(image_path))) == \
+        ["doc.jpg", "doc.json", "doc.version.json"]
+
+
+def test_tile_routes(client) -> None:
+    response = client.get(f"{IMAGE_URL}/pyramid")
+    assert response.status_code == 200
+    levels = response.json["pyramid"]["levels"]
+    assert levels[-1]["columns"] == levels[-1]["rows"] == 1
+
+    tile = client.get(f"{IMAGE_URL}/tiles/{len(levels) - 1}/0/0")
+    assert tile.status_code == 200
+    assert tile.mimetype == "image/jpeg"
+    assert client.get(f"{IMAGE_URL}/tiles/{len(levels)}/0/0").status_code == 404
+
+    client.post("/api/bucket/project/workdir/image/rotate/doc.jpg")
+    rotated = client.get(f"{IMAGE_URL}/pyramid").json["pyramid"]
+    assert (rotated["width"], rotated["height"]) == \
+        (response.json["pyramid"]["height"], response.json["pyramid"]["width"])
+    rotated_tile = client.get(f"{IMAGE_URL}/tiles/{len(levels) - 1}/0/0",
+                              headers={"If-None-Match": tile.headers["ETag"]})
+    assert rotated_tile.status_code == 200
+
+
+def test_levels_are_created_on_demand(data_path) -> None:
+    image_path = os.path.join(data_path, "bucket", "project", "workdir", "doc.jpg")
+    version_dir, _ = table_annotator.pyramid.get_pyramid(image_path, tile_size=256)
+    assert os.listdir(version_dir) == [table_annotator.pyramid.METADATA_FILE]
+
+    table_annotator.pyramid.get_tile(image_path, 2, 0, 0, tile_size=256)
+    assert os.path.isdir(os.path.join(version_dir, "2"))
+    assert not os.path.exists(os.path.join(version_dir, "0"))
+
+
+def test_pyramids_are_not_listed_as_workdirs(client) -> None:
+    client.get(f"{IMAGE_URL}/tiles/0/0/0")
+    work_packages = client.get("/api/bucket/project").json["project"]["workPackages"]
+    assert [package["name"] for package in work_packages] == ["workdir"]
@@ -0,0 +1,49 @@
+import numpy as np
+
+import table_annotator.segmentation
+import table_annotator.services
+import table_annotator.transport
+
+
+class FakeResponse:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def json(self):
+        return {"rows": self.rows}
+
+
+class FakeClient:
+    def __init__(self, post):
+        self.post = post
+
+
+def test_predict_rows_rescales_downscaled_predictions(monkeypatch) -> None:
+    sent = {}
+
+    def fake_post(path, data=None, headers=None, json=None):
+        image = table_annotator.transport.decode_images(data)[0]
+        sent["shape"] = image.shape
+        # rows at a quarter and at the bottom of the received image
+        return FakeResponse([image.shape[0] // 4, image.shape[0]])
+
+    monkeypatch.setattr(table_annotator.services, "get_client",
+                        lambda name: FakeClient(fake_post))
+    table_image = np.zeros((400, 300), dtype=np.uint8)
+
+    rows = table_annotator.segmentation.predict_rows(table_image, scale=0.5)
+
+    assert sent["shape"] == (200, 150)
+    assert rows == [100, 400]
+
+
+def test_predict_rows_json_transport(monkeypatch) -> None:
+    def fake_post(path, data=None, headers=None, json=None):
+        assert len(json["table_image"]) == 10
+        return FakeResponse([3, 7])
+
+    monkeypatch.setattr(table_annotator.services, "get_client",
+                        lambda name: FakeClient(fake_post))
+    rows = table_annotator.segmentation.predict_rows(np.zeros((10, 4), dtype=np.uint8),
+                                                     scale=1.0, transport="json")
+    assert rows == [3, 7]
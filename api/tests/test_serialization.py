@@ -0,0 +1,69 @@
+import pytest
+
+import table_annotator.io
+import table_annotator.serialization
+from table_annotator.types import Table
+
+LIBRARIES = sorted(table_annotator.serialization.SERIALIZERS.keys())
+
+
+@pytest.fixture
+def table() -> Table:
+    table = table_annotator.io.read_json("test_data/01/0100_5312606_1.json")[0]
+    table["cells"] = [[{"top": 2, "ocr_text": "Müller"}, {}, {"human_text": None}]]
+    table["structureLocked"] = False
+    table["virtualValues"] = [{"label": "a", "value": None}]
+    return Table(**table)
+
+
+def test_table_as_json_leaves_out_unset_values(table: Table) -> None:
+    table_json = table_annotator.io.table_as_json(table)
+
+    assert list(table_json.keys()) == ["outline", "rotationDegrees", "columns",
+                                       "rows", "cells", "structureLocked",
+                                       "virtualValues"]
+    assert table_json["cells"] == [[{"top": 2, "ocr_text": "Müller"}, {}, {}]]
+    assert table_json["virtualValues"] == [{"label": "a", "value": None}]
+
+
+@pytest.mark.parametrize("library", LIBRARIES)
+@pytest.mark.parametrize("compact", [False, True])
+def test_tables_round_trip(tmp_path, table: Table, library: str,
+                           compact: bool) -> None:
+    table_annotator.serialization.configure(library, compact)
+    try:
+        image_path = str(tmp_path / "doc.jpg")
+        table_annotator.io.write_tables_for_image(image_path, [table])
+        with open(tmp_path / "doc.json", encoding="utf-8") as f:
+            content = f.read()
+    finally:
+        table_annotator.serialization.configure(
+            table_annotator.serialization.JSON_LIBRARY,
+            table_annotator.serialization.JSON_COMPACT)
+
+    assert ("\n" not in content) == compact
+    assert "Müller" in content
+    assert table_annotator.io.read_tables_for_image(image_path) == [table]
+
+
+def test_unknown_library() -> None:
+    with pytest.raises(ValueError):
+        table_annotator.serialization.configure("simplejson")
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_libraries_write_the_same_format(table: Table, compact: bool) -> None:
+    tables_json = [table_annotator.io.table_as_json(table)]
+    outputs = []
+    for library in LIBRARIES:
+        table_annotator.serialization.configure(library, compact)
+        try:
+            outputs.append(table_annotator.serialization.dumps_for_file(tables_json))
+        finally:
+            table_annotator.serialization.configure(
+                table_annotator.serialization.JSON_LIBRARY,
+                table_annotator.serialization.JSON_COMPACT)
+
+    assert len(set(outputs)) == 1
+    if not compact:
+        assert outputs[0].startswith(b'[\n    {\n        "outline": {')
@@ -0,0 +1,71 @@
+import threading
+
+import pytest
+import requests
+
+from table_annotator.services import ServiceClient, BALANCING_ROUND_ROBIN, \
+    BALANCING_LEAST_OUTSTANDING
+
+
+class FakeResponse:
+    request = None
+    content = b"{}"
+
+    def raise_for_status(self):
+        pass
+
+
+def test_round_robin(monkeypatch) -> None:
+    client = ServiceClient("ocr", ["http://a", "http://b/"], 1.0,
+                           BALANCING_ROUND_ROBIN)
+    called = []
+    monkeypatch.setattr(client.session, "post",
+                        lambda url, **kwargs: called.append(url) or FakeResponse())
+    for _ in range(4):
+        client.post("/ocr")
+    assert called == ["http://a/ocr", "http://b/ocr"] * 2
+
+
+def test_least_outstanding(monkeypatch) -> None:
+    client = ServiceClient("ocr", ["http://a", "http://b"], 1.0,
+                           BALANCING_LEAST_OUTSTANDING)
+    release = threading.Event()
+    called = []
+
+    def post(url, **kwargs):
+        called.append(url)
+        if url == "http://a/slow":
+            release.wait()
+        return FakeResponse()
+
+    monkeypatch.setattr(client.session, "post", post)
+    slow_request = threading.Thread(target=client.post, args=("/slow",))
+    slow_request.start()
+    while client.outstanding[0] == 0:
+        pass
+    # replica a is still busy, so every request goes to b regardless of the turn
+    client.post("/fast")
+    client.post("/fast")
+    release.set()
+    slow_request.join()
+    assert called == ["http://a/slow", "http://b/fast", "http://b/fast"]
+    assert client.outstanding == [0, 0]
+
+
+def test_failover_to_next_replica(monkeypatch) -> None:
+    client = ServiceClient("ocr", ["http://down", "http://up"], 1.0,
+                           BALANCING_ROUND_ROBIN)
+
+    def post(url, **kwargs):
+        if url.startswith("http://down"):
+            raise requests.ConnectionError()
+        return FakeResponse()
+
+    monkeypatch.setattr(client.session, "post", post)
+    client.post("/ocr")
+    client.post("/ocr")
+
+    monkeypatch.setattr(client.session, "post",
+                        lambda url, **kwargs: post("http://down"))
+    with pytest.raises(requests.ConnectionError):
+        client.post("/ocr")
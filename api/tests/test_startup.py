@@ -0,0 +1,54 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+# heavy dependencies that are only loaded when the routes that need them are used
+LAZY_MODULES = ["cv2", "scipy", "pandas", "PIL", "Levenshtein", "tqdm"]
+# startup time depends too much on the machine and its load to be checked by default,
+# it is only checked against a budget in seconds given by this variable, e.g. 0.8
+IMPORT_TIME_BUDGET_VARIABLE = "STARTUP_TIME_BUDGET_SECONDS"
+RSS_BUDGET_MIB = 90
+
+# peak memory is read from /proc, as ru_maxrss also counts the forking pytest process
+STARTUP_SCRIPT = """
+import json, os, sys, time
+start = time.perf_counter()
+import api
+api.create_app(data_path="test_data")
+seconds = time.perf_counter() - start
+rss = None
+if os.path.isfile("/proc/self/status"):
+    with open("/proc/self/status") as f:
+        rss = next(int(line.split()[1]) / 1024 for line in f
+                   if line.startswith("VmHWM:"))
+print(json.dumps({"seconds": seconds, "rssMiB": rss,
+                  "modules": sorted(m for m in %r if m in sys.modules)}))
+""" % LAZY_MODULES
+
+
+@pytest.fixture(scope="module")
+def startup():
+    """Measures importing the api and creating the app in a fresh interpreter."""
+    output = subprocess.run([sys.executable, "-c", STARTUP_SCRIPT], check=True,
+                            capture_output=True, text=True).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def test_heavy_modules_are_not_imported(startup) -> None:
+    assert startup["modules"] == []
+
+
+def test_import_time_budget(startup) -> None:
+    budget = os.environ.get(IMPORT_TIME_BUDGET_VARIABLE)
+    if budget is None:
+        pytest.skip(f"Set {IMPORT_TIME_BUDGET_VARIABLE} to check the startup time.")
+    assert startup["seconds"] < float(budget)
+
+
+def test_memory_budget(startup) -> None:
+    if startup["rssMiB"] is None:
+        pytest.skip("Peak memory is only measured on Linux.")
+    assert startup["rssMiB"] < RSS_BUDGET_MIB
@@ -0,0 +1,110 @@
+import os
+from typing import Text
+
+import table_annotator.io
+import table_annotator.state_index
+from api import create_app
+from table_annotator.types import DOCUMENT_STATE_DONE, DOCUMENT_STATE_TODO, \
+    DocumentState
+
+
+def create_workdir(root: Text, num_images: int) -> Text:
+    workdir = os.path.join(root, "bucket", "project", "workdir")
+    os.makedirs(workdir)
+    for i in range(num_images):
+        with open(os.path.join(workdir, f"{i:03d}.jpg"), "wb") as f:
+            f.write(b"")
+    return workdir
+
+
+def test_summary_of_new_workdir(tmp_path) -> None:
+    workdir = create_workdir(str(tmp_path), 3)
+    summary = table_annotator.state_index.get_workdir_summary(workdir)
+    assert summary == {"name": "workdir", "numDocuments": 3, "numDocumentsDone": 0,
+                       "numDocumentsTodo": 3, "firstTodoDoc": "000"}
+
+
+def test_write_state_updates_index(tmp_path) -> None:
+    workdir = create_workdir(str(tmp_path), 3)
+    table_annotator.state_index.read_state_index(workdir)
+    table_annotator.io.write_state_for_image(os.path.join(workdir, "000.jpg"),
+                                             DOCUMENT_STATE_DONE)
+    table_annotator.io.write_state_for_image(os.path.join(workdir, "001.jpg"),
+                                             DOCUMENT_STATE_DONE)
+    table_annotator.io.write_state_for_image(os.path.join(workdir, "001.jpg"),
+                                             DOCUMENT_STATE_TODO)
+
+    index = table_annotator.state_index.read_state_index(workdir)
+    assert index.stateCounts == {DOCUMENT_STATE_DONE: 1, DOCUMENT_STATE_TODO: 2}
+    assert index.firstTodoImage == "001.jpg"
+    assert os.path.isfile(table_annotator.state_index.state_index_path(workdir))
+
+
+def test_index_picks_up_external_changes(tmp_path) -> None:
+    workdir = create_workdir(str(tmp_path), 2)
+    table_annotator.state_index.read_state_index(workdir)
+
+    table_annotator.io.write_json(os.path.join(workdir, "001.state.json"),
+                                  {"state": DOCUMENT_STATE_DONE})
+    with open(os.path.join(workdir, "002.jpg"), "wb") as f:
+        f.write(b"")
+
+    summary = table_annotator.state_index.get_workdir_summary(workdir)
+    assert summary["numDocuments"] == 3
+    assert summary["numDocumentsDone"] == 1
+    assert summary["firstTodoDoc"] == "000"
+
+
+def test_project_overview(tmp_path) -> None:
+    workdir = create_workdir(str(tmp_path), 2)
+    table_annotator.io.write_state_for_image(os.path.join(workdir, "000.jpg"),
+                                             DOCUMENT_STATE_DONE)
+    app = create_app(data_path=str(tmp_path))
+    with app.test_client() as client:
+        project = client.get("/api/bucket/project").json["project"]
+        assert project["workPackages"] == [
+            {"name": "workdir", "numDocuments": 2, "numDocumentsDone": 1,
+             "numDocumentsTodo": 1, "firstTodoDoc": "001"}
+        ]
+        projects = client.get("/api/bucket").json["projects"]
+        assert projects == [{"name": "project", "numDocuments": 2,
+                             "numDocumentsDone": 1, "numDocumentsTodo": 1}]
+
+
+def test_write_state_does_not_rescan(tmp_path, monkeypatch) -> None:
+    workdir = create_workdir(str(tmp_path), 3)
+    # the workdir last changed well before the racy interval
+    os.utime(workdir, ns=(10 ** 18, 10 ** 18))
+    table_annotator.state_index.read_state_index(workdir)
+    scans = []
+    scan = table_annotator.state_index._scan
+    monkeypatch.setattr(table_annotator.state_index, "_scan",
+                        lambda *args: scans.append(args) or scan(*args))
+
+    table_annotator.io.write_state_for_image(os.path.join(workdir, "001.jpg"),
+                                             DOCUMENT_STATE_DONE)
+    index = table_annotator.state_index.read_state_index(workdir)
+
+    assert scans == []
+    assert index.stateCounts == {DOCUMENT_STATE_DONE: 1, DOCUMENT_STATE_TODO: 2}
+    assert index.directoryMtime == os.stat(workdir).st_mtime_ns
+
+
+def test_write_state_rescans_racy_workdir(tmp_path) -> None:
+    workdir = create_workdir(str(tmp_path), 2)
+    table_annotator.state_index.read_state_index(workdir)
+
+    def add_image_and_write_state() -> None:
+        # an image added in the same mtime tick as the state file
+        with open(os.path.join(workdir, "002.jpg"), "wb") as f:
+            f.write(b"")
+        table_annotator.io.write_json(os.path.join(workdir, "000.state.json"),
+                                      {"state": DOCUMENT_STATE_DONE})
+
+    table_annotator.state_index.update_state_index(
+        os.path.join(workdir, "000.jpg"), DocumentState(state=DOCUMENT_STATE_DONE),
+        add_image_and_write_state)
+
+    index = table_annotator.state_index.read_state_index(workdir)
+    assert sorted(index.entries) == ["000.jpg", "001.jpg", "002.jpg"]
+    assert index.stateCounts == {DOCUMENT_STATE_DONE: 1, DOCUMENT_STATE_TODO: 2}
@@ -0,0 +1,25 @@
+import numpy as np
+import pytest
+
+import table_annotator.transport
+
+
+def test_round_trip() -> None:
+    images = [np.random.randint(0, 256, (h, w), dtype=np.uint8)
+              for h, w in [(30, 120), (1, 1), (0, 5), (45, 3)]]
+    data = table_annotator.transport.encode_images(images)
+    decoded = table_annotator.transport.decode_images(data)
+    assert len(decoded) == len(images)
+    for image, decoded_image in zip(images, decoded):
+        assert np.array_equal(image, decoded_image)
+
+
+def test_rejects_color_images() -> None:
+    with pytest.raises(ValueError):
+        table_annotator.transport.encode_images([np.zeros((2, 2, 3), dtype=np.uint8)])
+
+
+def test_rejects_truncated_data() -> None:
+    data = table_annotator.transport.encode_images([np.zeros((10, 10), dtype=np.uint8)])
+    with pytest.raises(ValueError):
+        table_annotator.transport.decode_images(data[:-1])
@@ -0,0 +1,46 @@
+"""Decoding of the binary image format sent by the table annotator api.
+
+Mirrors table_annotator/transport.py in the api:
+
+    magic (4 bytes) | number of images (uint32)
+    for each image: height (uint32) | width (uint32) | height * width pixel bytes
+
+All integers are little endian.
+"""
+import struct
+from typing import List
+
+import numpy as np
+from flask import Request
+
+IMAGES_MIMETYPE = "application/x-table-annotator-images"
+MAGIC = b"TAI1"
+_COUNT = struct.Struct("<I")
+_SHAPE = struct.Struct("<II")
+
+
+def decode_images(data: bytes) -> List[np.ndarray]:
+    """Deserializes images from the binary wire format without copying pixels."""
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError("Data is not in the binary image format.")
+    offset = len(MAGIC)
+    (count,) = _COUNT.unpack_from(data, offset)
+    offset += _COUNT.size
+    images = []
+    for _ in range(count):
+        height, width = _SHAPE.unpack_from(data, offset)
+        offset += _SHAPE.size
+        if offset + height * width > len(data):
+            raise ValueError("Data ends before the announced image size.")
+        image = np.frombuffer(data, dtype=np.uint8, count=height * width,
+                              offset=offset)
+        images.append(image.reshape(height, width))
+        offset += height * width
+    return images
+
+
+def images_from_request(request: Request) -> List[np.ndarray]:
+    """Reads the images of an ocr request in either binary or json format."""
+    if request.mimetype == IMAGES_MIMETYPE:
+        return decode_images(request.get_data())
+    return [np.array(img, dtype="uint8") for img in request.json["images"]]
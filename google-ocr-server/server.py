@@ -7,6 +7,8 @@ import numpy as np
 import PIL.Image
 from google.cloud import vision
 
+from google_ocr_server.transport import images_from_request
+
 
 def array_to_bytes_image(image: np.ndarray) -> io.BytesIO:
     """Detects text in the file."""
@@ -28,7 +30,7 @@ def create_app(script_info: Optional[ScriptInfo] = None):
     @app.route('/ocr', methods=["POST"])
     def ocr():
         vision_client = vision.ImageAnnotatorClient()
-        images = [np.array(img, dtype="uint8") for img in request.json["images"]]
+        images = images_from_request(request)
         images_as_bytes_io = [array_to_bytes_image(image)
                               for image in images]
         responses = [
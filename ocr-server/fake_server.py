@@ -2,9 +2,9 @@ from typing import Optional
 from flask import Flask, request
 from flask.cli import ScriptInfo
 from flask_cors import CORS
-import numpy as np
 
 from ocr_server.lines import find_lines
+from ocr_server.transport import images_from_request
 
 
 def create_app(script_info: Optional[ScriptInfo] = None):
@@ -13,7 +13,7 @@ def create_app(script_info: Optional[ScriptInfo] = None):
 
     @app.route('/ocr', methods=["POST"])
     def ocr():
-        images = [np.array(img, dtype="uint8") for img in request.json["images"]]
+        images = images_from_request(request)
 
         images_text_lines = [find_lines(image) for image in images]
         num_text_lines = [len(text_lines) for text_lines in images_text_lines]
@@ -2,7 +2,6 @@ from typing import Optional
 import logging
 import multiprocessing as mp
 import PIL.Image
-import numpy as np
 from flask import Flask, request
 from flask.cli import ScriptInfo
 from flask_cors import CORS
@@ -12,6 +11,7 @@ from ocr.predict import predict_images
 from ocr.config import OCRConfig
 
 from ocr_server.lines import find_line, find_lines
+from ocr_server.transport import images_from_request
 
 logger = logging.getLogger(__name__)
 
@@ -26,7 +26,7 @@ def create_app(script_info: Optional[ScriptInfo] = None):
 
     @app.route('/ocr', methods=["POST"])
     def ocr():
-        images = [np.array(img, dtype="uint8") for img in request.json["images"]]
+        images = images_from_request(request)
 
         images_text_lines = [find_lines(image) if image.shape[0] > 40
                              else [find_line(image)]
@@ -0,0 +1,19 @@
+import struct
+
+import numpy as np
+
+from ocr_server.transport import decode_images, MAGIC
+
+
+def test_decode_images():
+    first = np.arange(6, dtype=np.uint8).reshape(2, 3)
+    second = np.full((4, 1), 255, dtype=np.uint8)
+    data = MAGIC + struct.pack("<I", 2) \
+        + struct.pack("<II", 2, 3) + first.tobytes() \
+        + struct.pack("<II", 4, 1) + second.tobytes()
+
+    images = decode_images(data)
+
+    assert len(images) == 2
+    assert np.array_equal(images[0], first)
+    assert np.array_equal(images[1], second)
@@ -6,6 +6,7 @@ import numpy as np
 import table_segmenter.model
 import table_segmenter.preprocessing
 import table_segmenter.segment_table
+import segmenting_server.transport
 
 
 def create_app(script_info: Optional[ScriptInfo] = None):
@@ -15,7 +16,12 @@ def create_app(script_info: Optional[ScriptInfo] = None):
     model = table_segmenter.model.load_model("models/latest")
     @app.route('/segment', methods=["POST"])
     def segment():
-        table_image = np.array(request.json["table_image"])
+        if request.mimetype == segmenting_server.transport.IMAGES_MIMETYPE:
+            # same dtype as the arrays built from json lists below
+            table_image = segmenting_server.transport.decode_images(
+                request.get_data())[0].astype(int)
+        else:
+            table_image = np.array(request.json["table_image"])
         rows = table_segmenter.segment_table.segment_table(model, table_image)
         return {"rows": rows}
 
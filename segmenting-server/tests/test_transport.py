@@ -0,0 +1,15 @@
+import struct
+
+import numpy as np
+
+from segmenting_server.transport import decode_images, MAGIC
+
+
+def test_decode_images():
+    image = np.arange(12, dtype=np.uint8).reshape(3, 4)
+    data = MAGIC + struct.pack("<I", 1) + struct.pack("<II", 3, 4) + image.tobytes()
+
+    images = decode_images(data)
+
+    assert len(images) == 1
+    assert np.array_equal(images[0], image)